@@ -9,15 +9,15 @@ import asyncio
 from slot_math import (
     SYMBOLS,
     spin_grid_same_probs,
-    evaluate_megaways_win,
+    evaluate_spin,
+    sample_wild_reels,
+    sample_wild_mults,
+    GAME_MODEL,
     paytable,
     symbol_probs,
     VISIBLE_ROWS,
     NUM_REELS,
-    WILD_REEL_COUNTS,
-    WILD_REEL_COUNT_WEIGHTS,
-    FS_MULTIPLIERS,
-    FS_MULT_WEIGHTS,
+    FS_BUY_MULT,
 )
 
 pygame.mixer.pre_init(44100, -16, 2, 512)  # <-- NYTT: bättre latency
@@ -195,7 +195,6 @@ BET_LEVELS = [1, 2, 4, 6, 8, 10, 15, 20, 25, 50, 100]
 
 # Free spins-konfiguration
 N_FREE_SPINS = 10
-FS_BUY_MULT = 130       # kostar 130x bet att köpa FS
 MAX_WIN_MULT = 5000.0   # cap per bonus i bet-multiplar
 
 # Symbolvisning – byt "S" mot "Scatter"
@@ -745,49 +744,6 @@ def draw_paytable_icon(surface, center, radius, hover=False):
     text_rect = text_surf.get_rect(center=center)
     surface.blit(text_surf, text_rect)
 
-def find_winning_positions(grid, paytable, wild_reels=None):
-    if grid is None:
-        return set()
-
-    wild_reels = set(wild_reels or [])
-    num_rows = len(grid)
-    num_reels = len(grid[0]) if num_rows > 0 else 0
-    win_positions = set()
-
-    paying_symbols = set(sym for (sym, _) in paytable.keys())
-
-    for sym in paying_symbols:
-        counts_per_reel = []
-        for col in range(num_reels):
-            if col in wild_reels:
-                count = VISIBLE_ROWS
-            else:
-                count = sum(1 for row in range(num_rows) if grid[row][col] == sym)
-            counts_per_reel.append(count)
-
-        consec_reels = 0
-        for c in counts_per_reel:
-            if c > 0:
-                consec_reels += 1
-            else:
-                break
-
-        if consec_reels >= 3:
-            key = (sym, consec_reels)
-            if key not in paytable:
-                continue
-
-            for col in range(consec_reels):
-                if col in wild_reels:
-                    for row in range(num_rows):
-                        win_positions.add((row, col))
-                else:
-                    for row in range(num_rows):
-                        if grid[row][col] == sym:
-                            win_positions.add((row, col))
-
-    return win_positions
-
 # ========================================================
 # PARTICLE SYSTEM – Global lists
 # ========================================================
@@ -1470,7 +1426,7 @@ async def main():
                                 for i in range(GRID_COLS)
                             ]
 
-                            final_grid = spin_grid_same_probs()
+                            final_grid = spin_grid_same_probs(GAME_MODEL)
 
                             all_positions = [(r, c) for r in range(GRID_ROWS) for c in range(GRID_COLS)]
                             chosen = random.sample(all_positions, 3)
@@ -1589,7 +1545,7 @@ async def main():
                             reel_stop_played = [False] * GRID_COLS
 
                             # Grid-resultatet för detta spin (VIKTIGT!)
-                            final_grid = spin_grid_same_probs()
+                            final_grid = spin_grid_same_probs(GAME_MODEL)
 
                             # Animations-grid (rullar symboler tills hjulen stannar)
                             spin_anim_grid = [
@@ -1663,25 +1619,11 @@ async def main():
                 reel_stop_played = [False] * GRID_COLS      # <-- NYTT
                 if SND_SPIN_START:
                     SND_SPIN_START.play()
-                final_grid = spin_grid_same_probs()
+                final_grid = spin_grid_same_probs(GAME_MODEL)
 
-                k = random.choices(
-                    WILD_REEL_COUNTS, weights=WILD_REEL_COUNT_WEIGHTS, k=1
-                )[0]
-                if k <= 0:
-                    current_wild_reels = []
-                    current_wild_mults = {}
-                else:
-                    k = min(k, NUM_REELS)
-                    current_wild_reels = random.sample(range(NUM_REELS), k)
-                    # säkerställ att indexen är i range och sortera dem
-                    current_wild_reels = sorted(
-                        r for r in current_wild_reels if 0 <= r < NUM_REELS
-                    )
-                    current_wild_mults = {}
-                    for r_idx in current_wild_reels:
-                        m = random.choices(FS_MULTIPLIERS, weights=FS_MULT_WEIGHTS, k=1)[0]
-                        current_wild_mults[r_idx] = m
+                # wild reels + multiplikator per wild reel (förkompilerade vikter)
+                current_wild_reels = sorted(sample_wild_reels(GAME_MODEL))
+                current_wild_mults = sample_wild_mults(current_wild_reels, GAME_MODEL)
 
                 wild_drop_start_times = {}
                 last_win = 0.0
@@ -1739,13 +1681,16 @@ async def main():
                     big_win_active = False
 
                 if game_mode == "base":
-                    if forced_scatter_spin:
+                    # vinst, vinstpositioner och scatters i en genomgång
+                    if current_grid is None:
+                        spin_result = None     # safety fallback så vi aldrig kraschar
+                    else:
+                        spin_result = evaluate_spin(current_grid, GAME_MODEL)
+
+                    if forced_scatter_spin or spin_result is None:
                         base_mult = 0.0
                     else:
-                        if current_grid is None:
-                            base_mult = 0.0    # safety fallback så vi aldrig kraschar
-                        else:
-                            base_mult = evaluate_megaways_win(current_grid, paytable)
+                        base_mult = spin_result.total
 
                     win_amount = base_mult * bet
                     balance += win_amount
@@ -1766,23 +1711,16 @@ async def main():
                             if SND_WIN_SMALL:
                                 SND_WIN_SMALL.play()
 
-                    if forced_scatter_spin:
+                    if forced_scatter_spin or spin_result is None:
                         last_win_positions = set()
                     else:
-                        last_win_positions = find_winning_positions(
-                            current_grid, paytable
-                        )
+                        last_win_positions = spin_result.positions
 
                     if win_amount >= BIG_WIN_THRESHOLD_MULT * bet:
                         big_win_active = True
                         big_win_end_time = now + BIG_WIN_DURATION_MS
 
-                    scatter_count = sum(
-                        1
-                        for row in current_grid
-                        for sym in row
-                        if sym == "S"
-                    )
+                    scatter_count = spin_result.scatter_count if spin_result else 0
 
                     if scatter_count == 3:
                         fs_spins_left = N_FREE_SPINS
@@ -1797,11 +1735,7 @@ async def main():
                         bonus_state = "transition"
                         fs_next_spin_time = None
 
-                        scatter_flash_positions = set()
-                        for rr, row in enumerate(current_grid):
-                            for cc, sym in enumerate(row):
-                                if sym == "S":
-                                    scatter_flash_positions.add((rr, cc))
+                        scatter_flash_positions = spin_result.scatter_positions
 
                         fs_transition_active = True
                         fs_flash_start = now
@@ -1817,9 +1751,10 @@ async def main():
                     forced_scatter_spin = False
 
                 elif game_mode == "fs":
-                    base_mult = evaluate_megaways_win(
-                        current_grid, paytable, wild_reels=current_wild_reels
+                    spin_result = evaluate_spin(
+                        current_grid, GAME_MODEL, wild_reels=current_wild_reels
                     )
+                    base_mult = spin_result.total
 
                     if current_wild_mults:
                         spin_mult_factor = sum(current_wild_mults.values())
@@ -1855,30 +1790,16 @@ async def main():
                             if SND_WIN_SMALL:
                                 SND_WIN_SMALL.play()
 
-                    last_win_positions = find_winning_positions(
-                        current_grid, paytable, wild_reels=current_wild_reels
-                    )
+                    last_win_positions = spin_result.positions
 
                     if spin_win >= BIG_WIN_THRESHOLD_MULT * bet:
                         big_win_active = True
                         big_win_end_time = now + BIG_WIN_DURATION_MS
 
-                    scatter_count_nonwild = 0
-                    retrigger_scatter_positions = set()   # NY
-
-                    for r in range(len(current_grid)):
-                        for c in range(len(current_grid[0])):
-                            if c in current_wild_reels:
-                                continue
-                            if current_grid[r][c] == "S":
-                                scatter_count_nonwild += 1
-                                retrigger_scatter_positions.add((r, c))
-
-                    extra_spins = 0
-                    if scatter_count_nonwild == 2:
-                        extra_spins = 1
-                    elif scatter_count_nonwild == 3:
-                        extra_spins = 3
+                    # scatters under wild reels räknas inte för retriggers
+                    scatter_count_nonwild = spin_result.scatter_count
+                    retrigger_scatter_positions = spin_result.scatter_positions
+                    extra_spins = GAME_MODEL.retrigger_spins.get(scatter_count_nonwild, 0)
 
                     if extra_spins > 0:
                         fs_spins_left += extra_spins
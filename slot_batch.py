@@ -0,0 +1,502 @@
+"""
+Batch-versioner av spelmatematiken i slot_math (NumPy).
+
+Grids representeras här som heltalsarrayer med formen (n, VISIBLE_ROWS, NUM_REELS)
+där varje cell är index i SYMBOLS (uint8). slot_math hålls fri från NumPy
+så att GUI:t (och web-builden) inte behöver det.
+"""
+import numpy as np
+
+from slot_math import SYMBOLS, symbol_probs, VISIBLE_ROWS, NUM_REELS, as_game_model, get_column_engine
+
+SYMBOL_INDEX = {s: i for i, s in enumerate(SYMBOLS)}
+SCATTER_INDEX = SYMBOL_INDEX["S"]
+MAX_SCATTERS = 3        # samma krav som i spin_grid_same_probs
+
+CELLS = VISIBLE_ROWS * NUM_REELS
+
+
+def make_rng(rng=None):
+    """
+    Tar None, ett seed (int) eller en färdig np.random.Generator.
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(rng)
+
+
+def symbol_cdf(probs=None):
+    """
+    Kumulativa vikter i SYMBOLS-ordning (samma som random.choices bygger upp).
+    """
+    if probs is None:
+        probs = symbol_probs
+    p = np.array([probs[s] for s in SYMBOLS], dtype=np.float64)
+    cdf = np.cumsum(p / p.sum())
+    cdf[-1] = 1.0
+    return cdf
+
+
+TABLE_BITS = 16
+
+
+class CellSampler:
+    """
+    Snabb exakt dragning av symbolindex per cell.
+
+    u ~ U[0,1) delas upp i de översta TABLE_BITS bitarna (hink) och resten.
+    För nästan alla hinkar ligger hela intervallet inom en symbol, så en
+    tabelluppslagning räcker. Bara de få hinkar som korsar en cdf-gräns
+    behöver resten av u (ny uniform inom hinken) + searchsorted.
+    Resultatet är samma fördelning som bisect på cdf:en.
+    """
+
+    def __init__(self, probs=None):
+        self.cdf = symbol_cdf(probs)
+        size = 1 << TABLE_BITS
+        edges = np.arange(size + 1, dtype=np.float64) / size
+        thresholds = self.cdf[:-1]
+        lo = np.searchsorted(thresholds, edges[:-1], side="right")
+        hi = np.searchsorted(thresholds, edges[1:], side="left")
+        # 255 = hinken korsar en gräns, avgörs i efterhand
+        self.table = np.where(lo == hi, lo, 255).astype(np.uint8)
+
+    def draw(self, rng, shape):
+        size = 1 << TABLE_BITS
+        buckets = rng.integers(0, size, size=shape, dtype=np.uint16)
+        cells = self.table[buckets]
+
+        amb = np.flatnonzero(cells == 255)
+        if amb.size:
+            u = (buckets.ravel()[amb] + rng.random(amb.size)) / size
+            cells.ravel()[amb] = np.searchsorted(self.cdf, u, side="right")
+        return cells
+
+
+_default_sampler = None
+
+
+def get_cell_sampler(probs=None):
+    global _default_sampler
+    if probs is not None:
+        return CellSampler(probs)
+    if _default_sampler is None:
+        _default_sampler = CellSampler()
+    return _default_sampler
+
+
+def spin_grids(n, rng=None, probs=None):
+    """
+    Batch-motsvarighet till spin_grid_same_probs:
+    - returnerar en (n, 4, 5) uint8-array med symbolindex
+    - grids med > 3 scatters slumpas om (bara de raderna), så fördelningen
+      är exakt densamma som i den skalära funktionen
+    """
+    rng = make_rng(rng)
+    sampler = get_cell_sampler(probs)
+
+    grids = sampler.draw(rng, (n, CELLS))
+
+    bad = np.flatnonzero((grids == SCATTER_INDEX).sum(axis=1) > MAX_SCATTERS)
+    while bad.size:
+        redraw = sampler.draw(rng, (bad.size, CELLS))
+        grids[bad] = redraw
+        bad = bad[(redraw == SCATTER_INDEX).sum(axis=1) > MAX_SCATTERS]
+
+    return grids.reshape(n, VISIBLE_ROWS, NUM_REELS)
+
+
+def _exact_tables(probs):
+    """
+    cdf för trunkerat antal scatters + sampler för icke-scatter-celler.
+    """
+    from slot_math import GAME_MODEL, GameModel
+
+    model = GAME_MODEL if probs is None else GameModel(symbol_probs=probs)
+    w = np.array(model.scatter_count_weights, dtype=np.float64)
+    k_cdf = np.cumsum(w / w.sum())
+    k_cdf[-1] = 1.0
+
+    non_scatter_probs = dict(model.symbol_probs)
+    non_scatter_probs[model.scatter] = 0.0
+    return k_cdf, CellSampler(non_scatter_probs)
+
+
+_default_exact_tables = None
+
+
+def _sorted_cols(cols):
+    """
+    Radvis sortering av en liten lista med (n,)-kolumner -> lista med kolumner.
+    """
+    if not cols:
+        return []
+    return list(np.sort(np.stack(cols, axis=1), axis=1).T)
+
+
+def spin_grids_exact(n, rng=None, probs=None):
+    """
+    Rejection-fri batch-variant av spin_grids (samma fördelning):
+    - antal scatters per grid från den trunkerade binomialen
+    - scatters på likformigt valda (distinkta) celler
+    - övriga celler från den renormaliserade icke-scatter-fördelningen
+    Fast antal slumptal per grid, ingen omdragning.
+    """
+    global _default_exact_tables
+    rng = make_rng(rng)
+    if probs is None:
+        if _default_exact_tables is None:
+            _default_exact_tables = _exact_tables(None)
+        k_cdf, sampler = _default_exact_tables
+    else:
+        k_cdf, sampler = _exact_tables(probs)
+
+    grids = sampler.draw(rng, (n, CELLS))
+    k = np.searchsorted(k_cdf, rng.random(n), side="right")
+
+    rows = np.flatnonzero(k)
+    if rows.size:
+        # dragning utan återläggning: position j väljs bland de CELLS - j lediga
+        # och flyttas förbi redan tagna positioner (i stigande ordning)
+        u = rng.random((rows.size, MAX_SCATTERS))
+        taken = []
+        for j in range(MAX_SCATTERS):
+            pos = (u[:, j] * (CELLS - j)).astype(np.intp)
+            for t in _sorted_cols(taken):
+                pos += pos >= t
+            hit = k[rows] > j
+            grids[rows[hit], pos[hit]] = SCATTER_INDEX
+            taken.append(pos)
+
+    return grids.reshape(n, VISIBLE_ROWS, NUM_REELS)
+
+
+def grid_to_array(grid):
+    """
+    list-of-lists med symbolsträngar -> (4, 5) uint8-array.
+    """
+    return np.array([[SYMBOL_INDEX[sym] for sym in row] for row in grid], dtype=np.uint8)
+
+
+def array_to_grid(arr):
+    """
+    (4, 5) symbolindex -> list-of-lists med symbolsträngar (för slot_math/GUI).
+    """
+    return [[SYMBOLS[i] for i in row] for row in np.asarray(arr).tolist()]
+
+
+def pay_matrix(paytable):
+    """
+    Tät paytable: pays[symbolindex, antal_reels] (0 om kombinationen inte betalar).
+    Tar en GameModel eller en paytable-dict.
+    """
+    return np.array(as_game_model(paytable).pay_rows, dtype=np.float64)
+
+
+def reel_counts(grids, wild_mask=None, model=None):
+    """
+    Antal av varje symbol per hjul: (n, num_reels, antal symboler).
+    wild_mask: None, (5,) eller (n, 5) bool – wild reels räknas som
+    visible_rows träffar av alla symboler. model (standard GAME_MODEL)
+    ger symbolerna och antal rader.
+    """
+    model = as_game_model(model) if model is not None else get_column_engine().model
+    grids = np.asarray(grids)
+    counts = (grids[..., None] == np.arange(len(model.symbols), dtype=np.uint8)).sum(
+        axis=1, dtype=np.int64
+    )
+    if wild_mask is not None:
+        wild = np.asarray(wild_mask, dtype=bool)
+        counts = np.where(wild[..., None], model.visible_rows, counts)
+    return counts
+
+
+def evaluate_megaways_batch(grids, paytable, wild_mask=None):
+    """
+    Batch-motsvarighet till evaluate_megaways_win.
+
+    grids:     (n, 4, 5) symbolindex (från spin_grids)
+    paytable:  GameModel eller paytable-dict
+    wild_mask: None, (5,) eller (n, 5) bool med wild reels per spin
+
+    Returnerar en float64-vektor (n,) med vinstmultipel per spin. Symbolerna
+    summeras i samma ordning som i den skalära funktionen, så resultatet är
+    identiskt bit för bit.
+    """
+    model = as_game_model(paytable)
+    return _evaluate_counts(reel_counts(grids, wild_mask, model), model)
+
+
+def ways_by_symbol(counts):
+    """
+    (run_len, ways) per spin och symbol, båda (n, len(SYMBOLS)), från antal
+    per hjul och symbol (n, NUM_REELS, len(SYMBOLS)).
+    """
+    # antal hjul i rad från vänster där symbolen finns
+    run_len = np.cumprod(counts > 0, axis=1).sum(axis=1)          # (n, S)
+    # ways = produkten av antal träffar på de run_len första hjulen
+    ways_cum = np.cumprod(counts, axis=1)                          # (n, 5, S)
+    idx = np.maximum(run_len - 1, 0)
+    ways = np.take_along_axis(ways_cum, idx[:, None, :], axis=1)[:, 0, :]
+    return run_len, ways
+
+
+def _evaluate_counts(counts, model):
+    """
+    Vinst per spin från antal per hjul och symbol, (n, NUM_REELS, len(SYMBOLS)).
+    """
+    n = counts.shape[0]
+    pays = pay_matrix(model)
+    run_len, ways = ways_by_symbol(counts)
+
+    payouts = ways * pays[np.arange(pays.shape[0]), run_len]       # (n, S)
+
+    total = np.zeros(n, dtype=np.float64)
+    for sym in model.paying_symbols:
+        total += payouts[:, model.symbol_index[sym]]
+    return total
+
+
+def _column_model(paytable):
+    """
+    Modellen bakom kolumnmotorn: paytablen/modellen, annars standardmotorns.
+    """
+    return as_game_model(paytable) if paytable is not None else get_column_engine().model
+
+
+def column_tables(paytable=None):
+    """
+    NumPy-versionen av ColumnEngine-tabellerna för en modell (sparas på motorn):
+    - counts (10^4, len(SYMBOLS)) uint8, scatters (10^4,) uint8
+    - present (10^4,) uint16 bitmask över symboler som finns i kolumnen
+    - alias_prob / alias_index för O(1)-dragning av kolumnindex
+    """
+    engine = get_column_engine(as_game_model(paytable) if paytable is not None else None)
+    tables = getattr(engine, "_np_tables", None)
+    if tables is None:
+        sampler = engine.column_sampler
+        tables = engine._np_tables = {
+            "counts": np.array(engine.counts, dtype=np.uint8),
+            "scatters": np.array(engine.scatters, dtype=np.uint8),
+            "present": np.array(engine.present, dtype=np.uint16),
+            "patterns": np.array(engine.patterns, dtype=np.uint8),
+            "alias_prob": np.array(sampler.prob, dtype=np.float64),
+            "alias_index": np.array(sampler.alias, dtype=np.intp),
+        }
+    return tables
+
+
+def _draw_columns(tables, rng, shape):
+    """
+    Vektoriserad alias-dragning: ett slumptal per kolumn.
+    """
+    prob, alias = tables["alias_prob"], tables["alias_index"]
+    u = rng.random(shape) * len(prob)
+    i = u.astype(np.intp)
+    return np.where(u - i < prob[i], i, alias[i])
+
+
+def spin_columns(n, rng=None, paytable=None):
+    """
+    (n, num_reels) kolumnindex, > model.max_scatters scatters dras om
+    radvis (samma fördelning som spin_grids).
+    """
+    rng = make_rng(rng)
+    model = _column_model(paytable)
+    tables = column_tables(paytable)
+    scatters = tables["scatters"]
+    cols = _draw_columns(tables, rng, (n, model.num_reels))
+    bad = np.flatnonzero(scatters[cols].sum(axis=1) > model.max_scatters)
+    while bad.size:
+        redraw = _draw_columns(tables, rng, (bad.size, model.num_reels))
+        cols[bad] = redraw
+        bad = bad[scatters[redraw].sum(axis=1) > model.max_scatters]
+    return cols
+
+
+def evaluate_columns_batch(cols, paytable=None, wild_mask=None):
+    """
+    Vinst per spin för (n, NUM_REELS) kolumnindex. Spins där ingen symbol
+    finns på alla tre första hjulen (AND av present-maskerna) ger 0 direkt;
+    resten evalueras med en gather i count-tabellen + samma produkt över
+    hjulen som evaluate_megaways_batch (identiskt resultat).
+    """
+    model = _column_model(paytable)
+    cols = np.asarray(cols)
+    live, counts = live_counts(cols, paytable, wild_mask)
+    total = np.zeros(cols.shape[0], dtype=np.float64)
+    total[live] = _evaluate_counts(counts, model)
+    return total
+
+
+def live_counts(cols, paytable=None, wild_mask=None):
+    """
+    (live, counts): index för spins med någon symbol på hjul 1–3 (de enda
+    som kan vinna) och deras antal per hjul och symbol (m, 5, S), wild
+    reels räknade som model.visible_rows träffar.
+    """
+    model = _column_model(paytable)
+    tables = column_tables(paytable)
+    cols = np.asarray(cols)
+    present = tables["present"][cols]                                # (n, 5)
+    wild = None
+    if wild_mask is not None:
+        wild = np.broadcast_to(np.asarray(wild_mask, dtype=bool), cols.shape)
+        present = np.where(wild, np.uint16(0xFFFF), present)
+    live = np.flatnonzero(present[:, 0] & present[:, 1] & present[:, 2])
+
+    counts = tables["counts"][cols[live]].astype(np.int64)           # (m, 5, S)
+    if wild is not None:
+        counts = np.where(wild[live][..., None], model.visible_rows, counts)
+    return live, counts
+
+
+def columns_to_grids(cols, paytable=None):
+    """
+    (n, NUM_REELS) kolumnindex -> (n, 4, 5) symbolindex (som spin_grids).
+    """
+    patterns = column_tables(paytable)["patterns"]                   # (10^4, rows)
+    return patterns[np.asarray(cols)].transpose(0, 2, 1)
+
+
+def _model_cdf(weights):
+    w = np.asarray(weights, dtype=np.float64)
+    cdf = np.cumsum(w / w.sum())
+    cdf[-1] = 1.0
+    return cdf
+
+
+def _fs_tables(model):
+    """
+    cdf:er och uppslag för wild-antal, multiplikatorer och retriggers
+    (sparas på modellen).
+    """
+    tables = getattr(model, "_np_fs_tables", None)
+    if tables is None:
+        retrigger = np.zeros(model.num_reels * model.visible_rows + 1, dtype=np.int64)
+        for count, extra in model.retrigger_spins.items():
+            retrigger[count] = extra
+        tables = model._np_fs_tables = {
+            "wild_counts": np.minimum(np.array(model.wild_reel_counts, dtype=np.int64), model.num_reels),
+            "wild_cdf": _model_cdf(model.wild_reel_count_weights),
+            "mults": np.array(model.fs_multipliers, dtype=np.int64),
+            "mult_cdf": _model_cdf(model.fs_mult_weights),
+            "retrigger": retrigger,
+        }
+    return tables
+
+
+def sample_wild_masks(k, rng, model, wild_cdf=None, mult_cdf=None, draws=False):
+    """
+    (k, NUM_REELS) wild-masker och multiplikatorsumma per spin
+    (samma fördelning som sample_wild_reels + sample_wild_mults):
+    antal wild reels från vikterna, distinkta hjul via slumpad rangordning,
+    en multiplikator per wild reel. Utan wilds är multiplikatorn 1.
+
+    wild_cdf / mult_cdf ersätter modellens fördelningar (index i
+    wild_reel_counts / fs_multipliers). draws=True returnerar även de
+    dragna indexen: (wild, mult_total, count_idx, mult_idx).
+    """
+    t = _fs_tables(model)
+    wild_cdf = t["wild_cdf"] if wild_cdf is None else wild_cdf
+    mult_cdf = t["mult_cdf"] if mult_cdf is None else mult_cdf
+    count_idx = np.searchsorted(wild_cdf, rng.random(k), side="right")
+    n_wild = t["wild_counts"][count_idx]
+    ranks = rng.random((k, model.num_reels)).argsort(axis=1).argsort(axis=1)
+    wild = ranks < n_wild[:, None]
+    mult_idx = np.searchsorted(mult_cdf, rng.random((k, model.num_reels)), side="right")
+    mult_total = np.where(wild, t["mults"][mult_idx], 0).sum(axis=1)
+    mult_total[n_wild == 0] = 1
+    if draws:
+        return wild, mult_total, count_idx, mult_idx
+    return wild, mult_total
+
+
+def simulate_fs_rounds(n_rounds, rng=None, paytable=None, num_free_spins=None, max_win_mult=None,
+                       bet=1.0, wild_sampler=None):
+    """
+    Batch-motsvarighet till run_free_spins: n_rounds rundor i lockstep.
+
+    Varje steg spelar ett spin i alla rundor som fortfarande är aktiva
+    (kolumntabell-motorn för grid + vinst), lägger på retriggers från
+    scatters utanför wild reels och avslutar rundor som har slut på spins
+    eller når capen (vinsten sätts då till capen, som i run_free_spins).
+    Som i run_free_spins betyder max_win_mult=None ingen cap; skicka
+    model.max_win_mult för spelets cap.
+
+    wild_sampler(active, rng) -> (wild, mult_total) ersätter
+    sample_wild_masks (active = index för rundorna som spelar steget);
+    används av slot_importance för vinklade vikter.
+
+    Returnerar (wins, spins_played): (n_rounds,) float64 i bet-enheter
+    och (n_rounds,) int64.
+    """
+    rng = make_rng(rng)
+    model = _column_model(paytable)
+    n0 = model.fs_spins if num_free_spins is None else num_free_spins
+    cap = max_win_mult
+    tables = column_tables(paytable)
+    retrigger = _fs_tables(model)["retrigger"]
+    if wild_sampler is None:
+        wild_sampler = lambda active, rng: sample_wild_masks(active.size, rng, model)
+
+    total = np.zeros(n_rounds, dtype=np.float64)
+    spins_left = np.full(n_rounds, n0, dtype=np.int64)
+    played = np.zeros(n_rounds, dtype=np.int64)
+    active = np.flatnonzero(spins_left > 0)
+
+    while active.size:
+        k = active.size
+        cols = spin_columns(k, rng, paytable)
+        wild, mult_total = wild_sampler(active, rng)
+        base = evaluate_columns_batch(cols, paytable, wild)
+
+        total[active] += base * mult_total
+        played[active] += 1
+
+        scatters = np.where(wild, 0, tables["scatters"][cols]).sum(axis=1)
+        spins_left[active] += retrigger[scatters] - 1
+
+        still = spins_left[active] > 0
+        if cap is not None:
+            hit_cap = total[active] >= cap
+            total[active[hit_cap]] = cap
+            still &= ~hit_cap
+        active = active[still]
+
+    return total * bet, played
+
+
+def estimate_fs_round_ev_batch(num_free_spins=10, n_rounds=200_000, bet=1.0, max_win_mult=None,
+                               paytable=None, rng=None):
+    """
+    Som estimate_fs_round_ev men med simulate_fs_rounds.
+    """
+    wins, _ = simulate_fs_rounds(n_rounds, rng, paytable, num_free_spins, max_win_mult, bet)
+    return float(wins.mean())
+
+
+def simulate_rtp_batch(n_spins=1_000_000, bet=1.0, rng=None, paytable=None, batch_size=1_000_000):
+    """
+    Batch-motsvarighet till simulate_rtp: (avg_win, hit_freq, trig_freq).
+    Base-spins med kolumnmotorn, triggade bonusar med simulate_fs_rounds.
+    """
+    rng = make_rng(rng)
+    model = _column_model(paytable)
+    scatters = column_tables(paytable)["scatters"]
+    total_win = 0.0
+    hits = 0
+    triggers = 0
+    done = 0
+    while done < n_spins:
+        k = min(batch_size, n_spins - done)
+        cols = spin_columns(k, rng, paytable)
+        base = evaluate_columns_batch(cols, paytable) * bet
+        trig = scatters[cols].sum(axis=1) == model.max_scatters
+        fs_wins, _ = simulate_fs_rounds(int(trig.sum()), rng, paytable,
+                                        model.fs_spins, model.max_win_mult, bet)
+        total_win += float(base.sum()) + float(fs_wins.sum())
+        hits += int(np.count_nonzero(base > 0))
+        triggers += int(trig.sum())
+        done += k
+    return total_win / (n_spins * bet), hits / n_spins, triggers / n_spins
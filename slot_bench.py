@@ -0,0 +1,648 @@
+"""
+Kontroller och benchmarks för de snabba motorerna mot referensfunktionerna
+i slot_math. Kör:  python slot_bench.py
+"""
+import pickle
+import random
+import time
+from math import erfc, sqrt
+
+import numpy as np
+
+from slot_math import (
+    paytable,
+    evaluate_megaways_win,
+    find_winning_positions,
+    evaluate_spin,
+    run_free_spins,
+    simulate_spins,
+    spin_grid_same_probs,
+    spin_grid_exact,
+    get_column_engine,
+    GAME_MODEL,
+)
+from slot_exact import exact_base_stats, base_game_report, fs_round_exact
+from slot_fft import fs_round_report
+from slot_parallel import parallel_simulate
+from slot_importance import tail_estimates
+from slot_stratified import stratified_fs_ev
+from slot_reprice import record_outcomes
+from slot_buy import buy_report, simulate_buy
+from slot_sensitivity import sensitivity_report, solve_target_rtp, with_changes, total_rtp
+from slot_bitboard import (
+    grid_to_bitboard,
+    spin_bitboard,
+    evaluate_bitboard,
+    find_winning_positions_bitboard,
+    scatter_count,
+)
+from slot_codec import pack_grids, unpack_grids, pack_grid, unpack_grid, WILD_CODE, PACKED_BYTES
+from slot_batch import (
+    spin_grids,
+    spin_grids_exact,
+    grid_to_array,
+    array_to_grid,
+    evaluate_megaways_batch,
+    spin_columns,
+    evaluate_columns_batch,
+    columns_to_grids,
+    simulate_fs_rounds,
+    simulate_rtp_batch,
+    SCATTER_INDEX,
+)
+
+
+def make_corpus(n_grids=20_000, seed=1234, wild_share=0.5):
+    """
+    Gemensam test-korpus: grids + wild-reel-masker (hälften utan wilds).
+    """
+    rng = np.random.default_rng(seed)
+    grids = spin_grids(n_grids, rng)
+    wild_mask = rng.random((n_grids, grids.shape[2])) < 0.3
+    wild_mask[: int(n_grids * (1 - wild_share))] = False
+    return grids, wild_mask
+
+
+def bench_evaluators(n_grids=200_000, seed=1):
+    grids = spin_grids(n_grids, seed)
+
+    t0 = time.perf_counter()
+    evaluate_megaways_batch(grids, paytable)
+    t_batch = time.perf_counter() - t0
+
+    n_scalar = min(n_grids, 20_000)
+    nested = [array_to_grid(g) for g in grids[:n_scalar]]
+    t0 = time.perf_counter()
+    for g in nested:
+        evaluate_megaways_win(g, paytable)
+    t_scalar = time.perf_counter() - t0
+
+    return {
+        "batch_grids_per_s": n_grids / t_batch,
+        "scalar_grids_per_s": n_scalar / t_scalar,
+    }
+
+
+def chi2_homogeneity(counts_a, counts_b):
+    """
+    Chi2-test att två histogram (samma kategorier) kommer från samma fördelning.
+    Returnerar (chi2, frihetsgrader, p-värde). p-värdet via Wilson–Hilferty.
+    """
+    a = np.asarray(counts_a, dtype=np.float64)
+    b = np.asarray(counts_b, dtype=np.float64)
+    keep = (a + b) > 0
+    a, b = a[keep], b[keep]
+    na, nb = a.sum(), b.sum()
+    ea = (a + b) * na / (na + nb)
+    eb = (a + b) * nb / (na + nb)
+    chi2 = float((((a - ea) ** 2) / ea).sum() + (((b - eb) ** 2) / eb).sum())
+    dof = len(a) - 1
+    if dof <= 0:
+        return chi2, dof, 1.0
+    z = ((chi2 / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / sqrt(2 / (9 * dof))
+    return chi2, dof, 0.5 * erfc(z / sqrt(2))
+
+
+def grid_histograms(grids):
+    """
+    Histogram som jämförs: antal scatters per grid, symbol per cell, scatter-position.
+    """
+    flat = grids.reshape(grids.shape[0], -1)
+    is_scatter = flat == SCATTER_INDEX
+    return {
+        "scatter_count": np.bincount(is_scatter.sum(axis=1), minlength=4),
+        "symbols": np.bincount(flat.ravel(), minlength=SCATTER_INDEX + 1),
+        "scatter_position": is_scatter.sum(axis=0),
+    }
+
+
+def check_exact_sampler(n_scalar=100_000, n_batch=2_000_000, seed=7):
+    """
+    Statistisk ekvivalens: rejection-fri sampler vs nuvarande (rejection).
+    Returnerar {(motor, histogram): (chi2, dof, p)}.
+    """
+    random.seed(seed)
+
+    ref = np.array([grid_to_array(spin_grid_same_probs()) for _ in range(n_scalar)])
+    new = np.array([grid_to_array(spin_grid_exact()) for _ in range(n_scalar)])
+    results = {}
+    h_ref, h_new = grid_histograms(ref), grid_histograms(new)
+    for name in h_ref:
+        results[("scalar", name)] = chi2_homogeneity(h_ref[name], h_new[name])
+
+    rng = np.random.default_rng(seed)
+    h_ref = grid_histograms(spin_grids(n_batch, rng))
+    h_new = grid_histograms(spin_grids_exact(n_batch, rng))
+    for name in h_ref:
+        results[("batch", name)] = chi2_homogeneity(h_ref[name], h_new[name])
+    return results
+
+
+def bench_samplers(n_scalar=100_000, n_batch=2_000_000, seed=1):
+    res = {}
+    for name, f in (("scalar_rejection", spin_grid_same_probs), ("scalar_exact", spin_grid_exact)):
+        t0 = time.perf_counter()
+        for _ in range(n_scalar):
+            f()
+        res[name] = n_scalar / (time.perf_counter() - t0)
+    for name, f in (("batch_rejection", spin_grids), ("batch_exact", spin_grids_exact)):
+        f(10, seed)  # bygg tabeller
+        t0 = time.perf_counter()
+        f(n_batch, seed)
+        res[name] = n_batch / (time.perf_counter() - t0)
+    return res
+
+
+def check_exact_base(n_spins=4_000_000, seed=3):
+    """
+    Exakta base-värden mot batch-simulering: {namn: (exakt, simulerad, z-värde)}.
+    """
+    exact = exact_base_stats()
+    grids = spin_grids(n_spins, seed)
+    wins = evaluate_megaways_batch(grids, paytable)
+    trig = (grids == SCATTER_INDEX).sum(axis=(1, 2)) == 3
+    out = {}
+    for name, sample, value in (
+        ("rtp", wins, exact["rtp"]),
+        ("hit_freq", wins > 0, exact["hit_freq"]),
+        ("trigger_prob", trig, exact["trigger_prob"]),
+    ):
+        mean = float(np.mean(sample))
+        se = float(np.std(sample)) / sqrt(n_spins)
+        out[name] = (value, mean, (mean - value) / se)
+
+    var_exact = base_game_report()["variance"]
+    centered = wins - wins.mean()
+    var_sim = float((centered ** 2).mean())
+    se = sqrt(max(float((centered ** 4).mean()) - var_sim ** 2, 0.0) / n_spins)
+    out["variance"] = (var_exact, var_sim, (var_sim - var_exact) / se)
+    return out
+
+
+def check_fft_round():
+    """
+    FFT-rundfördelningen mot fs_round_exact (väntevärde och cap-sannolikhet).
+    Returnerar {namn: (fft, exakt)} + hela rapporten.
+    """
+    report = fs_round_report()
+    exact = fs_round_exact()
+    return {
+        "ev": (report["mean"], exact["ev"]),
+        "cap_hit_prob": (report["cap_hit_prob"], exact["cap_hit_prob"]),
+    }, report
+
+
+def check_parallel(n_spins=100_000, seed=11, chunk_spins=10_000):
+    """
+    Samma seed ska ge exakt samma delsummor oavsett antal workers.
+    Returnerar (identiska, {workers: spins/s}).
+    """
+    results, rates = [], {}
+    for workers in (1, 2, 4):
+        t0 = time.perf_counter()
+        results.append(parallel_simulate(n_spins=n_spins, seed=seed, workers=workers,
+                                         chunk_spins=chunk_spins))
+        rates[workers] = n_spins / (time.perf_counter() - t0)
+    keys = [(r["total_win"], r["hits"], r["triggers"], r["stats"].m2, r["stats"].m4) for r in results]
+    return all(k == keys[0] for k in keys), rates
+
+
+def check_codec(n_grids=50_000, seed=5):
+    """
+    Round-trip för 4-bitarskodningen, vektoriserat och skalärt, med wilds.
+    Returnerar antal fel (0 = ok) och att vinsterna är oförändrade.
+    """
+    grids, wild_mask = make_corpus(n_grids, seed)
+    packed = pack_grids(grids, wild_mask)
+    assert packed.shape == (n_grids, PACKED_BYTES)
+    out, out_mask = unpack_grids(packed)
+    expected = np.where(wild_mask[:, None, :], WILD_CODE, grids)
+    errors = int(np.count_nonzero(out != expected)) + int(np.count_nonzero(out_mask != wild_mask))
+
+    for g, w, row in zip(grids[:5_000], wild_mask[:5_000], packed[:5_000]):
+        wild_reels = np.flatnonzero(w).tolist()
+        data = pack_grid(array_to_grid(g), wild_reels)
+        errors += data != row.tobytes()
+        grid, reels = unpack_grid(data)
+        errors += reels != wild_reels
+        errors += evaluate_megaways_win(grid, paytable, reels) != evaluate_megaways_win(
+            array_to_grid(g), paytable, wild_reels)
+    return errors
+
+
+def bench_codec(n_grids=200_000, seed=2):
+    """
+    Storlek och hastighet: 4-bitarskodning vs pickle av nästlade listor.
+    """
+    grids = spin_grids(n_grids, seed)
+    nested = [array_to_grid(g) for g in grids]
+    res = {}
+
+    t0 = time.perf_counter()
+    packed = pack_grids(grids)
+    res["pack_grids_per_s"] = n_grids / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    unpack_grids(packed)
+    res["unpack_grids_per_s"] = n_grids / (time.perf_counter() - t0)
+    res["packed_bytes_per_grid"] = packed.nbytes / n_grids
+
+    n_scalar = 50_000
+    t0 = time.perf_counter()
+    blobs = [pack_grid(g) for g in nested[:n_scalar]]
+    res["pack_grid_per_s"] = n_scalar / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for b in blobs:
+        unpack_grid(b)
+    res["unpack_grid_per_s"] = n_scalar / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    data = pickle.dumps(nested, protocol=pickle.HIGHEST_PROTOCOL)
+    res["pickle_dump_grids_per_s"] = n_grids / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    pickle.loads(data)
+    res["pickle_load_grids_per_s"] = n_grids / (time.perf_counter() - t0)
+    res["pickle_bytes_per_grid"] = len(data) / n_grids
+    res["pickle_one_grid_bytes"] = len(pickle.dumps(nested[0], protocol=pickle.HIGHEST_PROTOCOL))
+    return res
+
+
+def check_bitboard(n_grids=20_000, seed=3):
+    """
+    Bitboard-evaluatorn mot evaluate_megaways_win / find_winning_positions
+    (inkl. wild reels och scatters utanför wilds). Returnerar antal fel.
+    """
+    grids, wild_mask = make_corpus(n_grids, seed)
+    errors = 0
+    for g, w in zip(grids, wild_mask):
+        grid = array_to_grid(g)
+        wild_reels = np.flatnonzero(w).tolist()
+        board = grid_to_bitboard(grid, wild_reels)
+        errors += evaluate_bitboard(board, GAME_MODEL) != evaluate_megaways_win(grid, GAME_MODEL, wild_reels)
+        errors += (find_winning_positions_bitboard(board, GAME_MODEL)
+                   != find_winning_positions(grid, GAME_MODEL, wild_reels))
+        errors += scatter_count(board) != int(((g == SCATTER_INDEX) & ~w).sum())
+
+    rng_a, rng_b = random.Random(8), random.Random(8)
+    for _ in range(2_000):
+        board = spin_bitboard(GAME_MODEL, rng_a)
+        errors += board.to_grid() != spin_grid_same_probs(GAME_MODEL, rng_b)
+    return errors
+
+
+def bench_bitboard(n_grids=20_000, seed=3):
+    """
+    Skalär evaluering (grids/s): listor vs bitboard (med och utan
+    konvertering) och evaluate_spin, som kör samma maskkärna från listor.
+    """
+    grids, wild_mask = make_corpus(n_grids, seed)
+    nested = [array_to_grid(g) for g in grids]
+    wilds = [np.flatnonzero(w).tolist() for w in wild_mask]
+    boards = [grid_to_bitboard(g, w) for g, w in zip(nested, wilds)]
+    res = {}
+
+    t0 = time.perf_counter()
+    for g, w in zip(nested, wilds):
+        evaluate_megaways_win(g, GAME_MODEL, w)
+        find_winning_positions(g, GAME_MODEL, w)
+    res["lists_win_and_positions"] = n_grids / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for g, w in zip(nested, wilds):
+        board = grid_to_bitboard(g, w)
+        evaluate_bitboard(board, GAME_MODEL)
+        find_winning_positions_bitboard(board, GAME_MODEL)
+    res["bitboard_incl_convert"] = n_grids / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for board in boards:
+        evaluate_bitboard(board, GAME_MODEL)
+    res["bitboard_eval_only"] = n_grids / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for g, w in zip(nested, wilds):
+        evaluate_megaways_win(g, GAME_MODEL, w)
+    res["lists_eval_only"] = n_grids / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for g, w in zip(nested, wilds):
+        evaluate_spin(g, GAME_MODEL, w)
+    res["evaluate_spin_win_and_positions"] = n_grids / (time.perf_counter() - t0)
+    return res
+
+
+def check_column_engine(n_grids=20_000, n_batch=2_000_000, seed=4):
+    """
+    Kolumntabell-motorn: samma vinst som listversionen (skalärt och batch)
+    och samma gridfördelning som spin_grids (chi2).
+    Returnerar (antal fel, {histogram: (chi2, dof, p)}).
+    """
+    engine = get_column_engine()
+    grids, wild_mask = make_corpus(n_grids, seed)
+    errors = 0
+    for g, w in zip(grids, wild_mask):
+        grid = array_to_grid(g)
+        wild_reels = np.flatnonzero(w).tolist()
+        cols = engine.from_grid(grid)
+        errors += engine.evaluate(cols, wild_reels) != evaluate_megaways_win(grid, GAME_MODEL, wild_reels)
+
+    rng = np.random.default_rng(seed)
+    cols = spin_columns(n_grids, rng)
+    errors += int(np.count_nonzero(
+        evaluate_columns_batch(cols, wild_mask=wild_mask)
+        != evaluate_megaways_batch(columns_to_grids(cols), GAME_MODEL, wild_mask)))
+
+    h_ref = grid_histograms(spin_grids(n_batch, rng))
+    h_new = grid_histograms(columns_to_grids(spin_columns(n_batch, rng)))
+    return errors, {name: chi2_homogeneity(h_ref[name], h_new[name]) for name in h_ref}
+
+
+def bench_column_engine(n_scalar=50_000, n_batch=1_000_000, seed=1):
+    """
+    Spin + evaluering: kolumntabeller vs listor (skalärt) och vs cellvis
+    batch (spins/s).
+    """
+    engine = get_column_engine()
+    rng = random.Random(seed)
+    res = {}
+    t0 = time.perf_counter()
+    for _ in range(n_scalar):
+        evaluate_megaways_win(spin_grid_same_probs(GAME_MODEL, rng), GAME_MODEL)
+    res["scalar_lists"] = n_scalar / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for _ in range(n_scalar):
+        engine.evaluate(engine.spin(rng))
+    res["scalar_columns"] = n_scalar / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    evaluate_megaways_batch(spin_grids(n_batch, seed), GAME_MODEL)
+    res["batch_cells"] = n_batch / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    evaluate_columns_batch(spin_columns(n_batch, seed))
+    res["batch_columns"] = n_batch / (time.perf_counter() - t0)
+    return res
+
+
+def check_win_result(n_grids=20_000, seed=6):
+    """
+    evaluate_spin mot evaluate_megaways_win, find_winning_positions och
+    scatterräkning utanför wild reels. Returnerar (antal fel, speedup för
+    vinst + positioner + scatters mot de separata genomgångarna).
+    """
+    grids, wild_mask = make_corpus(n_grids, seed)
+    nested = [array_to_grid(g) for g in grids]
+    wilds = [np.flatnonzero(w).tolist() for w in wild_mask]
+    errors = 0
+    for grid, g, w, wild_reels in zip(nested, grids, wild_mask, wilds):
+        res = evaluate_spin(grid, GAME_MODEL, wild_reels)
+        errors += res.total != evaluate_megaways_win(grid, GAME_MODEL, wild_reels)
+        errors += res.positions != find_winning_positions(grid, GAME_MODEL, wild_reels)
+        scatters = {(r, c) for r, c in zip(*np.nonzero((g == SCATTER_INDEX) & ~w))}
+        errors += res.scatter_positions != scatters or res.scatter_count != len(scatters)
+        errors += set(res.ways) != set(res.run_lengths)
+
+    t0 = time.perf_counter()
+    for grid, wild_reels in zip(nested, wilds):
+        evaluate_megaways_win(grid, GAME_MODEL, wild_reels)
+        find_winning_positions(grid, GAME_MODEL, wild_reels)
+        sum(1 for row in grid for c, sym in enumerate(row) if sym == "S" and c not in wild_reels)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for grid, wild_reels in zip(nested, wilds):
+        res = evaluate_spin(grid, GAME_MODEL, wild_reels)
+        res.positions
+        res.scatter_count
+    t_new = time.perf_counter() - t0
+    return errors, t_old / t_new
+
+
+def check_fs_batch(n_rounds=1_000_000, seed=12):
+    """
+    Lockstep-simulatorn mot fs_round_exact: {namn: (exakt, simulerad, z)}.
+    """
+    exact = fs_round_exact()
+    wins, played = simulate_fs_rounds(n_rounds, seed, max_win_mult=GAME_MODEL.max_win_mult)
+    cap_hits = wins >= GAME_MODEL.max_win_mult
+    out = {}
+    for name, sample, value in (
+        ("ev", wins, exact["ev"]),
+        ("cap_hit_prob", cap_hits, exact["cap_hit_prob"]),
+        ("expected_spins", played, exact["expected_spins"]),
+    ):
+        mean = float(np.mean(sample))
+        se = float(np.std(sample)) / sqrt(n_rounds)
+        out[name] = (value, mean, (mean - value) / se)
+    return out
+
+
+def bench_fs_batch(n_python=3_000, n_batch=300_000, n_spins=100_000, seed=1):
+    """
+    FS-rundor/s och fulla spel/s: run_free_spins / simulate_spins vs lockstep.
+    """
+    rng = random.Random(seed)
+    res = {}
+    t0 = time.perf_counter()
+    for _ in range(n_python):
+        run_free_spins(GAME_MODEL.fs_spins, 1.0, verbose=False,
+                       max_win_mult=GAME_MODEL.max_win_mult, model=GAME_MODEL, rng=rng)
+    res["fs_rounds_python"] = n_python / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    simulate_fs_rounds(n_batch, seed, max_win_mult=GAME_MODEL.max_win_mult)
+    res["fs_rounds_batch"] = n_batch / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    simulate_spins(GAME_MODEL, n_spins, rng=rng)
+    res["spins_python"] = n_spins / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    simulate_rtp_batch(n_spins * 20, rng=seed)
+    res["spins_batch"] = n_spins * 20 / (time.perf_counter() - t0)
+    return res
+
+
+def check_importance(n_rounds=200_000, seed=3):
+    """
+    IS-skattade P(rundvinst >= t) mot FFT-fördelningen:
+    {t: (exakt, skattning, z, speedup)} + "ev".
+    """
+    report = fs_round_report()
+    est = tail_estimates(n_rounds, rng=seed)
+    out = {}
+    for t, row in est["tails"].items():
+        exact = report["exceedance"].get(t)
+        if exact is None:
+            continue
+        out[t] = (exact, row["p"], (row["p"] - exact) / (row["ci"] / 1.96), row["speedup"])
+    out["ev"] = (report["mean"], est["ev"], (est["ev"] - report["mean"]) / (est["ev_ci"] / 1.96), None)
+    return out
+
+
+def bench_stratified(n_rounds=200_000, seed=4):
+    """
+    Stratifierad vs naiv FS-EV med samma antal rundor. efficiency =
+    hur många gånger fler spins den naiva skattningen behöver för samma
+    varians (varians * spins för naiv / för stratifierad).
+    """
+    exact = fs_round_exact()["ev"]
+    t0 = time.perf_counter()
+    strat = stratified_fs_ev(n_rounds, rng=seed)
+    t_strat = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    wins, played = simulate_fs_rounds(n_rounds, seed + 1, max_win_mult=GAME_MODEL.max_win_mult)
+    t_naive = time.perf_counter() - t0
+    naive_var = float(wins.var(ddof=1)) / n_rounds
+    return {
+        "exact": exact,
+        "naive": (float(wins.mean()), 1.96 * sqrt(naive_var), int(played.sum()), t_naive),
+        "stratified": (strat["ev"], strat["ci"], strat["spins"], t_strat),
+        "efficiency": naive_var * int(played.sum()) / (strat["variance"] * strat["spins"]),
+    }
+
+
+def _paytable_variants(n, seed=0, spread=0.1):
+    rng = np.random.default_rng(seed)
+    return [{key: pay * float(rng.lognormal(0.0, spread)) for key, pay in paytable.items()}
+            for _ in range(n)]
+
+
+def check_reprice(n_spins=200_000, seed=5):
+    """
+    Base-delen av repricern mot evaluate_columns_batch på samma kolumner
+    (record_outcomes drar base-spinsen först ur samma ström): största
+    relativa avvikelse i base-RTP och hit-frekvens över några varianter.
+    """
+    variants = [paytable] + _paytable_variants(4, seed)
+    sample = record_outcomes(n_spins, rng=seed)
+    repriced = sample.reprice(variants)
+    cols = spin_columns(n_spins, seed)
+    worst = 0.0
+    for i, variant in enumerate(variants):
+        wins = evaluate_columns_batch(cols, variant)
+        worst = max(worst,
+                    abs(repriced["base_rtp"][i] / wins.mean() - 1.0),
+                    abs(repriced["hit_freq"][i] - np.count_nonzero(wins) / n_spins))
+    return worst
+
+
+def bench_reprice(n_spins=2_000_000, n_variants=300, seed=6):
+    """
+    En simulering + omprissättning av n_variants paytables, jämfört med
+    en simulate_rtp_batch per variant (uppskattat från en körning).
+    """
+    variants = _paytable_variants(n_variants, seed)
+    t0 = time.perf_counter()
+    sample = record_outcomes(n_spins, rng=seed)
+    t_record = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sample.reprice(variants)
+    t_reprice = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    simulate_rtp_batch(n_spins, rng=seed, paytable=variants[0])
+    t_rerun = time.perf_counter() - t0
+    return {"record": t_record, "reprice": t_reprice, "rerun_all": t_rerun * n_variants,
+            "nnz": sample.nnz}
+
+
+def check_sensitivity(target=0.96):
+    """
+    dRTP/dpay mot en exakt omräkning med +1 i varje cell (största relativa
+    avvikelse), och mål-RTP-lösaren (skala) verifierad med total_rtp.
+    """
+    report = sensitivity_report()
+    base_rtp = report["base"]["rtp"]
+    worst = 0.0
+    for cell, row in report["paytable"].items():
+        bumped = with_changes(paytable={**paytable, cell: row["pay"] + 1.0})
+        diff = exact_base_stats(bumped)["rtp"] - base_rtp
+        worst = max(worst, abs(diff - row["d_rtp"]) / max(row["d_rtp"], 1e-300))
+    solved = solve_target_rtp(target)
+    return worst, solved["value"], total_rtp(solved["model"], use_disk=False), solved["converged"]
+
+
+def check_buy(n_rounds=500_000, seed=8):
+    """
+    Bonusköpet: exakt rapport mot vektoriserad simulering,
+    {mått: (exakt, simulerat)}.
+    """
+    exact = buy_report()
+    sim = simulate_buy(n_rounds, rng=seed)
+    return {key: (exact[key], sim[key]) for key in ("buy_rtp", "sigma", "cap_hit_prob", "profit_prob")}
+
+
+if __name__ == "__main__":
+    res = bench_evaluators()
+    print(f"Batch:  {res['batch_grids_per_s']:,.0f} grids/s")
+    print(f"Skalär: {res['scalar_grids_per_s']:,.0f} grids/s")
+
+    print("\nRejection-fri sampler vs rejection (chi2, dof, p):")
+    for (engine, name), (chi2, dof, p) in check_exact_sampler().items():
+        print(f"  {engine:6s} {name:16s} chi2={chi2:8.2f} dof={dof:2d} p={p:.3f}")
+
+    print("\nGenomströmning (grids/s):")
+    for name, rate in bench_samplers().items():
+        print(f"  {name:18s} {rate:,.0f}")
+
+    print("\nExakt base game vs simulering:")
+    for name, (value, sim, z) in check_exact_base().items():
+        print(f"  {name:12s} exakt={value:.6f} sim={sim:.6f} z={z:+.2f}")
+
+    print("\nFS-rundans fördelning (FFT) vs exakt DP:")
+    compare, report = check_fft_round()
+    for name, (fft, exact) in compare.items():
+        print(f"  {name:12s} fft={fft:.6f} exakt={exact:.6f}")
+    print(f"  sigma={report['sigma']:.2f}")
+    for q, v in report["percentiles"].items():
+        print(f"  P{q * 100:g}: {v:.1f}x")
+    for t, p in report["exceedance"].items():
+        print(f"  P(vinst >= {t}x) = {p:.3e}")
+
+    same, rates = check_parallel()
+    print(f"\nParallell simulering, identiskt resultat för 1/2/4 workers: {same}")
+    for workers, rate in rates.items():
+        print(f"  {workers} workers: {rate:,.0f} spins/s")
+
+    print(f"\nGrid-kodning (4 bitar/cell), round-trip-fel: {check_codec()}")
+    for name, value in bench_codec().items():
+        print(f"  {name:24s} {value:,.1f}")
+
+    print(f"\nBitboard-evaluator, fel mot listversionen: {check_bitboard()}")
+    for name, rate in bench_bitboard().items():
+        print(f"  {name:26s} {rate:,.0f} grids/s")
+
+    errors, chi2 = check_column_engine()
+    print(f"\nKolumntabell-motor, fel mot listversionen: {errors}")
+    for name, (c2, dof, p) in chi2.items():
+        print(f"  {name:16s} chi2={c2:8.2f} dof={dof:2d} p={p:.3f}")
+    for name, rate in bench_column_engine().items():
+        print(f"  {name:16s} {rate:,.0f} spins/s")
+
+    errors, speedup = check_win_result()
+    print(f"\nWinResult (evaluate_spin), fel: {errors}, {speedup:.1f}x snabbare än separata anrop")
+
+    print("\nLockstep-FS-simulator vs exakt:")
+    for name, (value, sim, z) in check_fs_batch().items():
+        print(f"  {name:14s} exakt={value:.6f} sim={sim:.6f} z={z:+.2f}")
+    for name, rate in bench_fs_batch().items():
+        print(f"  {name:18s} {rate:,.0f}/s")
+
+    print("\nImportance sampling (P(rundvinst >= t)) vs FFT:")
+    for t, (exact, est, z, speedup) in check_importance().items():
+        gain = f" speedup={speedup:.1f}x" if speedup is not None else ""
+        print(f"  {t!s:6s} exakt={exact:.6f} IS={est:.6f} z={z:+.2f}{gain}")
+
+    res = bench_stratified()
+    print(f"\nStratifierad FS-EV (exakt {res['exact']:.4f}):")
+    for name in ("naive", "stratified"):
+        ev, ci, spins, secs = res[name]
+        print(f"  {name:10s} {ev:.4f} ± {ci:.4f}  {spins:,} spins  {secs:.1f} s")
+    print(f"  varianssänkning per spin: {res['efficiency']:.1f}x")
+
+    print(f"\nRepricer, base vs evaluate_columns_batch: max avvikelse {check_reprice():.2e}")
+    res = bench_reprice()
+    print(f"  300 varianter x 2M spins: simulering {res['record']:.1f} s + omprissättning "
+          f"{res['reprice']:.1f} s (omkörning per variant ~{res['rerun_all']:.0f} s), nnz {res['nnz']:,}")
+
+    worst, scale, rtp, ok = check_sensitivity()
+    print(f"\nKänslighet: max rel. fel dRTP/dpay {worst:.1e}; paytable * {scale:.6f} ger RTP {rtp:.8f} ({ok})")
+
+    print("\nBonusköp (exakt vs simulerat):")
+    for key, (exact, sim) in check_buy().items():
+        print(f"  {key:13s} {exact:.6f} / {sim:.6f}")
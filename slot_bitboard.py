@@ -0,0 +1,147 @@
+"""
+Bitboard-representation av ett grid och en evaluator som räknar med
+bitmasker istället för att loopa över celler (ren Python, inget NumPy –
+kan användas av GUI:t och i en serverprocess).
+
+Layout: bit (reel * rows + rad). Med 4 rader blir varje hjul en nibble,
+så en symbols förekomst på hela gridet är en 20-bitarsmask och antalet
+träffar på ett hjul är popcount av hjulets nibble. Wild reels är en mask
+med hela nibbles satta som OR:as in i varje symbols mask.
+
+Själva utvärderingen är slot_math.evaluate_masks, samma kärna som
+evaluate_spin använder – här finns bara grid-typen och genvägar till den.
+
+Uppmätt med slot_bench.bench_bitboard (20 000 grids, en kärna):
+
+    evaluate_megaways_win (listor)            ~21 000 grids/s
+    evaluate_bitboard (färdig BitGrid)       ~210 000 grids/s   (~10x)
+    vinst + positioner, listor               ~9 500 grids/s
+    vinst + positioner via grid_to_bitboard  ~52 000 grids/s    (~5.5x)
+    evaluate_spin (listor, samma kärna)      ~90 000 grids/s
+
+Nästan hela vinsten kommer alltså från maskkärnan, som evaluate_spin
+redan använder. BitGrid lönar sig bara när grids skapas direkt som masker
+(spin_bitboard) och konverteringen från listor slipps; då är den ~2x
+snabbare än evaluate_spin.
+"""
+import random
+
+from slot_math import (
+    GAME_MODEL,
+    VISIBLE_ROWS,
+    NUM_REELS,
+    grid_masks,
+    wild_reels_mask,
+    evaluate_masks,
+    mask_positions,
+)
+
+
+class BitGrid:
+    """
+    masks: {symbol: bitmask}, wild: mask för wild reels.
+    """
+    __slots__ = ("masks", "wild", "rows", "reels")
+
+    def __init__(self, masks, wild=0, rows=VISIBLE_ROWS, reels=NUM_REELS):
+        self.masks = masks
+        self.wild = wild
+        self.rows = rows
+        self.reels = reels
+
+    def mask(self, sym):
+        """
+        Symbolens mask inkl. wild reels.
+        """
+        return self.masks.get(sym, 0) | self.wild
+
+    def wild_reels(self):
+        reel = (1 << self.rows) - 1
+        return [c for c in range(self.reels) if (self.wild >> (c * self.rows)) & reel == reel]
+
+    def to_grid(self):
+        """
+        Tillbaka till list-of-lists (wild reels blir "W").
+        """
+        grid = [["W"] * self.reels for _ in range(self.rows)]
+        for sym, m in self.masks.items():
+            while m:
+                low = m & -m
+                bit = low.bit_length() - 1
+                col, row = divmod(bit, self.rows)
+                if not (self.wild >> bit) & 1:
+                    grid[row][col] = sym
+                m ^= low
+        return grid
+
+
+def grid_to_bitboard(grid, wild_reels=None):
+    """
+    list-of-lists med symbolsträngar (+ wild reels) -> BitGrid.
+    """
+    rows = len(grid)
+    return BitGrid(grid_masks(grid), wild_reels_mask(wild_reels, rows), rows, len(grid[0]))
+
+
+def spin_bitboard(model=None, rng=random):
+    """
+    Som spin_grid_same_probs men direkt till en BitGrid (inga listor).
+    Förbrukar slumptalen likadant, så samma rng-tillstånd ger samma grid.
+    """
+    model = model or GAME_MODEL
+    sample_many = model.symbol_sampler.sample_many
+    rows = model.visible_rows
+    reels = model.num_reels
+    n_cells = rows * reels
+    scatter = model.scatter
+    # cell i (radvis, som i spin_grid_same_probs) -> bit (reel * rows + rad)
+    bits = [1 << ((i % reels) * rows + i // reels) for i in range(n_cells)]
+    while True:
+        cells = sample_many(n_cells, rng)
+        if cells.count(scatter) <= model.max_scatters:
+            break
+    masks = {}
+    get = masks.get
+    for sym, bit in zip(cells, bits):
+        masks[sym] = get(sym, 0) | bit
+    return BitGrid(masks, 0, rows, reels)
+
+
+def evaluate_board(board, paytable=None):
+    """
+    Hela WinResult (som evaluate_spin) för en BitGrid.
+    """
+    return evaluate_masks(board.masks, board.wild, paytable or GAME_MODEL, board.rows, board.reels)
+
+
+def evaluate_bitboard(board, paytable=None):
+    """
+    Samma resultat som evaluate_megaways_win (bit för bit, samma
+    summeringsordning) men från en BitGrid.
+    """
+    return evaluate_board(board, paytable).total
+
+
+def winning_mask(board, paytable=None):
+    """
+    Mask med alla celler som ingår i någon vinnande kombination.
+    """
+    return evaluate_board(board, paytable).win_mask
+
+
+mask_to_positions = mask_positions
+
+
+def find_winning_positions_bitboard(board, paytable=None):
+    return mask_to_positions(winning_mask(board, paytable), board.rows)
+
+
+def scatter_count(board, scatter="S", skip_wild=True):
+    """
+    Antal scatters; med skip_wild räknas inte de under wild reels
+    (samma regel som retriggers i run_free_spins).
+    """
+    m = board.masks.get(scatter, 0)
+    if skip_wild:
+        m &= ~board.wild
+    return bin(m).count("1")
@@ -0,0 +1,175 @@
+"""
+Bonusköp (FS_BUY_MULT): RTP, varians och cap-risk.
+
+Köpet kostar priset i bet-multiplar och ger en FS-runda med modellens
+fs_spins och cap; köpspinnets basvinst nollas (forced_scatter_spin i
+main.py). Allt beror alltså bara på rundvinstens fördelning:
+
+- EV och cap-sannolikhet exakt (slot_exact.fs_round_exact)
+- varians, percentiler och P(vinst >= pris) från FFT-fördelningen
+  (slot_fft.fs_round_pmf, gitter step)
+- vektoriserad simulering (slot_batch.simulate_fs_rounds) som kontroll
+
+När fördelningen väl är räknad är ett nytt pris bara en division och en
+summa (reprice_buy), så prisändringar kan utvärderas direkt.
+buy_and_base räknar köpet och base-spelets RTP parallellt.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+
+import numpy as np
+
+from slot_math import GAME_MODEL, FS_BUY_MULT, as_game_model
+from slot_exact import exact_base_stats, fs_round_exact
+from slot_fft import fs_round_pmf, pmf_percentiles, DEFAULT_PERCENTILES
+
+
+def round_distribution(model=None, step=0.5):
+    """
+    Rundvinstens fördelning + exakta momenten: dict med values, probs,
+    ev, variance, cap_hit_prob (EV och cap från fs_round_exact, variansen
+    från gittret).
+    """
+    model = as_game_model(model or GAME_MODEL)
+    exact = fs_round_exact(model)
+    pmf = fs_round_pmf(model, step=step)
+    values, probs = pmf["values"], pmf["probs"]
+    mean = float((values * probs).sum())
+    return {
+        "values": values,
+        "probs": probs,
+        "ev": exact["ev"],
+        "variance": float((((values - mean) ** 2) * probs).sum()),
+        "cap_hit_prob": exact["cap_hit_prob"],
+        "expected_spins": exact["expected_spins"],
+    }
+
+
+def reprice_buy(dist, prices):
+    """
+    Köpets nyckeltal för varje pris (bet-multiplar), från en
+    round_distribution: {pris: {rtp, house_edge, sigma_per_price,
+    profit_prob}}. profit_prob = P(rundvinst >= pris).
+    """
+    values, probs = dist["values"], dist["probs"]
+    # P(X >= t) för alla gitterpunkter på en gång
+    tail = np.cumsum(probs[::-1])[::-1]
+    out = {}
+    for price in prices:
+        i = int(np.searchsorted(values, price, side="left"))
+        rtp = dist["ev"] / price
+        out[price] = {
+            "rtp": rtp,
+            "house_edge": 1.0 - rtp,
+            "sigma_per_price": sqrt(dist["variance"]) / price,
+            "profit_prob": float(tail[i]) if i < len(tail) else 0.0,
+        }
+    return out
+
+
+def price_for_rtp(target_rtp, model=None):
+    """
+    Priset (bet-multiplar) som ger köpet RTP target_rtp.
+    """
+    return fs_round_exact(as_game_model(model or GAME_MODEL))["ev"] / target_rtp
+
+
+def buy_report(model=None, price=FS_BUY_MULT, step=0.5, qs=DEFAULT_PERCENTILES, prices=()):
+    """
+    Exakt/analytisk rapport för bonusköpet till priset price.
+
+    Returnerar dict: price, ev, buy_rtp, house_edge, variance och sigma
+    (rundvinst i bet-multiplar), sigma_per_price, cap_hit_prob,
+    profit_prob, expected_spins, percentiles, break_even_price och
+    prices ({pris: reprice_buy-rad} för extra priser).
+    """
+    dist = round_distribution(model, step)
+    row = reprice_buy(dist, [price])[price]
+    return {
+        "price": price,
+        "ev": dist["ev"],
+        "buy_rtp": row["rtp"],
+        "house_edge": row["house_edge"],
+        "variance": dist["variance"],
+        "sigma": sqrt(dist["variance"]),
+        "sigma_per_price": row["sigma_per_price"],
+        "cap_hit_prob": dist["cap_hit_prob"],
+        "profit_prob": row["profit_prob"],
+        "expected_spins": dist["expected_spins"],
+        "percentiles": pmf_percentiles(dist["values"], dist["probs"], qs),
+        "break_even_price": dist["ev"],
+        "prices": reprice_buy(dist, prices),
+    }
+
+
+def simulate_buy(n_rounds=1_000_000, price=FS_BUY_MULT, rng=None, model=None, z=1.96,
+                 batch_size=200_000, progress=None):
+    """
+    Vektoriserad simulering av n_rounds köp (lockstep-rundor, batch_size
+    åt gången; progress(rundor klara) efter varje batch om den ges).
+    Returnerar dict: rounds, buy_rtp, buy_rtp_ci, sigma, cap_hit_prob, profit_prob.
+    """
+    from slot_batch import make_rng, simulate_fs_rounds
+
+    rng = make_rng(rng)
+    model = as_game_model(model or GAME_MODEL)
+    parts = []
+    done = 0
+    while done < n_rounds:
+        k = min(batch_size, n_rounds - done)
+        parts.append(simulate_fs_rounds(k, rng, model, max_win_mult=model.max_win_mult)[0])
+        done += k
+        if progress is not None:
+            progress(done)
+    wins = np.concatenate(parts)
+    sigma = float(wins.std(ddof=1))
+    return {
+        "rounds": n_rounds,
+        "buy_rtp": float(wins.mean()) / price,
+        "buy_rtp_ci": z * sigma / sqrt(n_rounds) / price,
+        "sigma": sigma,
+        "cap_hit_prob": float(np.mean(wins >= model.max_win_mult)),
+        "profit_prob": float(np.mean(wins >= price)),
+    }
+
+
+def _base_task(model):
+    return exact_base_stats(model)
+
+
+def _buy_task(args):
+    model, price, prices = args
+    return buy_report(model, price, prices=prices)
+
+
+def buy_and_base(model=None, price=FS_BUY_MULT, prices=(), workers=2):
+    """
+    Base-spelets RTP och bonusköpets rapport, beräknade parallellt.
+    Arbetet delas så att processerna inte överlappar: den ena räknar
+    base-fördelningen (exact_base_stats), den andra FS-rundan (buy_report,
+    med fs_round_exact + FFT). FS-delen av total-RTP:n tas från köpets
+    EV, så fs_round_exact räknas bara en gång. Det finns alltså bara två
+    oberoende delar: workers=1 kör dem i tur och ordning, annars används
+    två processer.
+    Returnerar {"base": {base_rtp, hit_freq, trigger_prob, fs_rtp,
+    total_rtp}, "buy": buy_report(...)}.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    if workers == 1:
+        base, buy = _base_task(model), _buy_task((model, price, prices))
+    else:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            base_job = pool.submit(_base_task, model)
+            buy_job = pool.submit(_buy_task, (model, price, tuple(prices)))
+            base, buy = base_job.result(), buy_job.result()
+    fs_rtp = base["trigger_prob"] * float(buy["ev"])
+    return {
+        "base": {
+            "base_rtp": base["rtp"],
+            "hit_freq": base["hit_freq"],
+            "trigger_prob": base["trigger_prob"],
+            "fs_rtp": fs_rtp,
+            "total_rtp": base["rtp"] + fs_rtp,
+        },
+        "buy": buy,
+    }
@@ -0,0 +1,424 @@
+"""
+Icke-interaktivt kommandoradsverktyg för spelmatematiken (för skript/cron).
+
+    python slot_cli.py rtp
+    python slot_cli.py sim --spins 10000000 --workers 8 --seed 42 -o rtp.json
+    python slot_cli.py sim --epsilon 0.005 --spins 500000000
+    python slot_cli.py sim --spins 500000000 --checkpoint run.ck --resume
+    python slot_cli.py fs-ev --spins 200000 --format csv
+    python slot_cli.py fs-ev --spins 200000 --stratified
+    python slot_cli.py fs-tail --spins 200000
+    python slot_cli.py buy-ev --price 130 --prices 120 140 150
+    python slot_cli.py export --spins 100000000 --workers 8 --dir audit_run
+    python slot_cli.py sensitivity --target 0.96 --knob scale
+
+Resultatet skrivs som JSON eller CSV (nyckel,värde) till stdout eller
+--output. Progress och genomströmning skrivs till stderr.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from math import isfinite, sqrt
+
+from slot_math import GAME_MODEL, FS_BUY_MULT
+
+
+class Progress:
+    """
+    Skriver en rad till stderr högst var interval:e sekund (inga \\r, så
+    loggen blir läsbar även utan TTY).
+    """
+
+    def __init__(self, label, total, unit="spins", interval=2.0, quiet=False):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.quiet = quiet
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+
+    def update(self, done, extra=""):
+        now = time.perf_counter()
+        if self.quiet or now - self.last < self.interval:
+            return
+        self.last = now
+        self._write(done, now, extra)
+
+    def finish(self, done, extra=""):
+        if not self.quiet:
+            self._write(done, time.perf_counter(), extra)
+
+    def elapsed(self):
+        return time.perf_counter() - self.t0
+
+    def _write(self, done, now, extra):
+        rate = done / max(now - self.t0, 1e-9)
+        share = f" ({100.0 * done / self.total:.1f} %)" if self.total else ""
+        total = f"/{self.total:,}" if self.total else ""
+        print(f"[{self.label}] {done:,}{total} {self.unit}{share} | {rate:,.0f} {self.unit}/s {extra}",
+              file=sys.stderr, flush=True)
+
+
+def _throughput(n, seconds):
+    return {"wall_time": seconds, "per_s": n / seconds if seconds > 0 else float("inf")}
+
+
+def cmd_rtp(args):
+    from slot_exact import exact_base_stats, base_game_report, fs_round_exact
+
+    base = exact_base_stats(GAME_MODEL)
+    report = base_game_report(GAME_MODEL)
+    fs = fs_round_exact(GAME_MODEL)
+    fs_rtp = base["trigger_prob"] * fs["ev"]
+    return {
+        "base_rtp": base["rtp"],
+        "hit_freq": base["hit_freq"],
+        "trigger_prob": base["trigger_prob"],
+        "base_variance": report["variance"],
+        "base_volatility_index": report["volatility_index"],
+        "fs_round_ev": fs["ev"],
+        "fs_rtp": fs_rtp,
+        "total_rtp": base["rtp"] + fs_rtp,
+    }
+
+
+def cmd_sim(args):
+    from slot_parallel import parallel_simulate, simulate_until
+
+    progress = Progress("sim", None if args.epsilon else args.spins, quiet=args.quiet)
+    if args.epsilon:
+        res = simulate_until(GAME_MODEL, epsilon=args.epsilon, seed=args.seed,
+                             workers=args.workers, chunk_spins=args.batch,
+                             min_spins=min(args.batch * 5, args.spins), max_spins=args.spins,
+                             progress=lambda r: progress.update(
+                                 r["spins"], f"| RTP {r['rtp']:.5f} ± {r['half_width']:.5f}"))
+        n, stats = res["spins"], res["stats"]
+        rtp, hit, trig = res["rtp"], res["hit_freq"], res["trig_freq"]
+        converged = res["converged"]
+    else:
+        totals = parallel_simulate(GAME_MODEL, args.spins, seed=args.seed, workers=args.workers,
+                                   chunk_spins=args.batch, checkpoint=args.checkpoint,
+                                   checkpoint_every=args.every, resume=args.resume,
+                                   progress=lambda t: progress.update(t["spins"]))
+        n, stats = totals["spins"], totals["stats"]
+        rtp = totals["total_win"] / n
+        hit, trig = totals["hits"] / n, totals["triggers"] / n
+        converged = None
+    progress.finish(n)
+
+    out = {
+        "spins": n,
+        "seed": args.seed,
+        "rtp": rtp,
+        "rtp_ci95": 1.96 * stats.std / sqrt(n),
+        "hit_freq": hit,
+        "trigger_freq": trig,
+        "variance": stats.variance,
+        "sigma": stats.std,
+        "skewness": stats.skewness,
+        "kurtosis": stats.kurtosis,
+        "max_win": stats.max,
+        "percentiles": {q: stats.percentile(q) for q in (0.5, 0.9, 0.99, 0.999)},
+        "tail": {t: stats.tail(t) for t in stats.tails},
+    }
+    if converged is not None:
+        out["epsilon"] = args.epsilon
+        out["converged"] = converged
+        out["spins_needed"] = res["spins_needed"]
+        if not converged and not args.quiet:
+            print(f"[sim] precisionen ±{args.epsilon} nåddes inte inom --spins {args.spins:,} "
+                  f"(~{res['spins_needed']:,} spins behövs)", file=sys.stderr)
+    t = _throughput(n, progress.elapsed())
+    out["wall_time"], out["spins_per_s"] = t["wall_time"], t["per_s"]
+    return out
+
+
+def _fs_simulation(args, label):
+    from slot_parallel import parallel_fs_rounds
+
+    progress = Progress(label, args.spins, unit="rounds", quiet=args.quiet)
+    stats = parallel_fs_rounds(GAME_MODEL, args.spins, seed=args.seed, workers=args.workers,
+                               chunk_rounds=args.batch,
+                               progress=lambda s: progress.update(s.n))
+    progress.finish(stats.n)
+    t = _throughput(stats.n, progress.elapsed())
+    return stats, {
+        "rounds": stats.n,
+        "ev": stats.mean,
+        "ev_ci95": 1.96 * stats.std / sqrt(stats.n),
+        "sigma": stats.std,
+        "cap_hit_prob": stats.tail(GAME_MODEL.max_win_mult) if GAME_MODEL.max_win_mult in stats.tails else None,
+        "wall_time": t["wall_time"],
+        "rounds_per_s": t["per_s"],
+    }
+
+
+def cmd_fs_ev(args):
+    from slot_exact import fs_round_exact
+    from slot_fft import fs_round_report
+
+    fs = fs_round_exact(GAME_MODEL)
+    dist = fs_round_report(GAME_MODEL)
+    out = {
+        "ev": fs["ev"],
+        "ev_uncapped": fs["ev_uncapped"],
+        "expected_spins": fs["expected_spins"],
+        "cap_hit_prob": fs["cap_hit_prob"],
+        "sigma": dist["sigma"],
+        "percentiles": dist["percentiles"],
+        "exceedance": dist["exceedance"],
+    }
+    if args.spins and args.stratified:
+        from slot_stratified import stratified_fs_ev
+
+        progress = Progress("fs-ev", args.spins, unit="rounds", quiet=args.quiet)
+        res = stratified_fs_ev(args.spins, rng=args.seed, progress=progress.update)
+        progress.finish(res["rounds"])
+        out["stratified"] = {k: res[k] for k in ("ev", "ci", "rounds", "spins")}
+        out["stratified"]["strata"] = len(res["strata"])
+        out["stratified"]["wall_time"] = progress.elapsed()
+    elif args.spins:
+        out["simulated"] = _fs_simulation(args, "fs-ev")[1]
+    return out
+
+
+def cmd_fs_tail(args):
+    from slot_importance import tail_estimates
+
+    progress = Progress("fs-tail", args.spins, unit="rounds", quiet=args.quiet)
+    out = tail_estimates(args.spins, args.thresholds, rng=args.seed,
+                         wild_tilt=args.wild_tilt, mult_tilt=args.mult_tilt, mix=args.mix,
+                         progress=progress.update)
+    progress.finish(args.spins)
+    t = _throughput(args.spins, progress.elapsed())
+    out["wall_time"], out["rounds_per_s"] = t["wall_time"], t["per_s"]
+    return out
+
+
+def cmd_buy_ev(args):
+    from slot_buy import buy_and_base, simulate_buy
+
+    res = buy_and_base(GAME_MODEL, args.price, args.prices or (), workers=args.workers or 2)
+    out = dict(res["buy"])
+    out["base_game"] = res["base"]
+    if args.spins:
+        progress = Progress("buy-ev", args.spins, unit="rounds", quiet=args.quiet)
+        sim = simulate_buy(args.spins, args.price, rng=args.seed, model=GAME_MODEL,
+                           progress=progress.update)
+        progress.finish(args.spins)
+        t = _throughput(args.spins, progress.elapsed())
+        sim["wall_time"], sim["rounds_per_s"] = t["wall_time"], t["per_s"]
+        out["simulated"] = sim
+    return out
+
+
+def cmd_export(args):
+    from slot_export import export_spins
+
+    progress = Progress("export", args.spins, quiet=args.quiet)
+    manifest = export_spins(args.dir, GAME_MODEL, args.spins, seed=args.seed, workers=args.workers,
+                            chunk_spins=args.batch, progress=progress.update)
+    n = sum(manifest["chunks"])
+    progress.finish(n)
+    t = _throughput(n, progress.elapsed())
+    return {
+        "directory": args.dir,
+        "spins": n,
+        "chunks": len(manifest["chunks"]),
+        "columns": list(manifest["columns"]),
+        "wall_time": t["wall_time"],
+        "spins_per_s": t["per_s"],
+    }
+
+
+def _parse_knob(text):
+    """
+    "scale", en symbol ("A", "S") eller en paytable-cell ("A3" -> ("A", 3)).
+    """
+    if text != "scale" and len(text) > 1 and text[-1].isdigit():
+        return text[:-1], int(text[-1])
+    return text
+
+
+def cmd_sensitivity(args):
+    from slot_sensitivity import sensitivity_report, solve_target_rtp
+
+    report = sensitivity_report(GAME_MODEL)
+    out = {
+        "base": report["base"],
+        "paytable": {f"{sym}{n}": row for (sym, n), row in report["paytable"].items()},
+        "symbols": report["symbols"],
+    }
+    if args.target is not None:
+        res = solve_target_rtp(args.target, _parse_knob(args.knob), GAME_MODEL,
+                               include_fs=not args.base_only)
+        out["solve"] = {
+            "knob": args.knob,
+            "target": args.target,
+            "value": res["value"],
+            "rtp": res["rtp"],
+            "converged": res["converged"],
+            "iterations": len(res["history"]),
+        }
+    return out
+
+
+def flatten(data, prefix=""):
+    """
+    Nästlade dicts -> [(punktad.nyckel, värde)] för CSV.
+    """
+    rows = []
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            rows.extend(flatten(value, f"{name}."))
+        else:
+            rows.append((name, value))
+    return rows
+
+
+def json_safe(value):
+    """
+    Gör resultatet giltig JSON: inf/nan -> None (null), NumPy-tal och
+    -arrayer -> Python-tal/listor.
+    """
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if hasattr(value, "tolist"):
+        return json_safe(value.tolist())
+    if isinstance(value, float) and not isfinite(value):
+        return None
+    return value
+
+
+def write_result(result, fmt, path):
+    out = open(path, "w", newline="", encoding="utf-8") if path else sys.stdout
+    try:
+        if fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(["key", "value"])
+            writer.writerows(flatten(result))
+        else:
+            json.dump(json_safe(result), out, indent=2, allow_nan=False)
+            out.write("\n")
+    finally:
+        if path:
+            out.close()
+
+
+def at_least(minimum):
+    """
+    argparse-typ: heltal >= minimum.
+    """
+    def parse(text):
+        value = int(text)
+        if value < minimum:
+            raise argparse.ArgumentTypeError(f"måste vara minst {minimum}, fick {value}")
+        return value
+    return parse
+
+
+def positive_float(text):
+    """
+    argparse-typ: flyttal > 0.
+    """
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"måste vara > 0, fick {text}")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Spelmatematik för Megaways-sloten utan interaktiv input.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p, spins, batch, min_spins=1, workers_help="processer (standard: antal CPU:er)"):
+        p.add_argument("--spins", type=at_least(min_spins), default=spins,
+                       help=f"antal spins/rundor (standard {spins:,})")
+        p.add_argument("--workers", type=at_least(1), default=None, help=workers_help)
+        p.add_argument("--seed", type=at_least(0), default=0, help="master-seed (heltal >= 0)")
+        p.add_argument("--batch", type=at_least(1), default=batch, help="spins/rundor per chunk")
+
+    def output(p):
+        p.add_argument("-o", "--output", default=None, help="resultatfil (standard stdout)")
+        p.add_argument("--format", choices=("json", "csv"), default="json")
+        p.add_argument("-q", "--quiet", action="store_true", help="ingen progress på stderr")
+
+    p = sub.add_parser("rtp", help="exakt (analytisk) RTP, hit-frekvens och FS-bidrag")
+    output(p)
+    p.set_defaults(func=cmd_rtp)
+
+    p = sub.add_parser("sim", help="simulerad RTP för fullt spel (parallellt)")
+    common(p, 1_000_000, 20_000)
+    p.add_argument("--epsilon", type=positive_float, default=None,
+                   help="kör tills RTP:ns 95 %%-intervall är ±epsilon i RTP-enheter "
+                        "(0.005 = ±0.5 procentenheter, ~2e8 spins; --spins blir taket)")
+    p.add_argument("--checkpoint", default=None, help="checkpoint-fil (JSON)")
+    p.add_argument("--every", type=float, default=5.0, help="sekunder mellan checkpoints")
+    p.add_argument("--resume", action="store_true", help="fortsätt från --checkpoint")
+    output(p)
+    p.set_defaults(func=cmd_sim)
+
+    p = sub.add_parser("fs-ev", help="EV och fördelning för en FS-runda (exakt, ev. simulerad)")
+    common(p, 0, 2_000, min_spins=0)
+    p.add_argument("--stratified", action="store_true",
+                   help="simulera stratifierat per wild-konfiguration (Neyman)")
+    output(p)
+    p.set_defaults(func=cmd_fs_ev)
+
+    p = sub.add_parser("fs-tail", help="svanssannolikheter för en FS-runda med importance sampling")
+    p.add_argument("--spins", type=at_least(1), default=200_000, help="antal rundor (standard 200,000)")
+    p.add_argument("--seed", type=at_least(0), default=0, help="seed (heltal >= 0)")
+    p.add_argument("--thresholds", type=int, nargs="+", default=[1000, 2500, 4000, 5000],
+                   help="vinstgränser t för P(rundvinst >= t) (capen tas alltid med)")
+    p.add_argument("--wild-tilt", type=float, default=2.0)
+    p.add_argument("--mult-tilt", type=float, default=0.3)
+    p.add_argument("--mix", type=float, default=0.2, help="andel dragningar från de vinklade vikterna")
+    output(p)
+    p.set_defaults(func=cmd_fs_tail)
+
+    p = sub.add_parser("buy-ev", help="RTP, varians och cap-risk för bonusköp (+ base-RTP parallellt)")
+    common(p, 0, 2_000, min_spins=0,
+           workers_help="1 = base-RTP och köp i tur och ordning; annars två processer "
+                        "(det finns bara två oberoende delar, fler används inte)")
+    p.add_argument("--price", type=float, default=FS_BUY_MULT, help="pris i bet-multiplar")
+    p.add_argument("--prices", type=float, nargs="+", default=None,
+                   help="fler priser att jämföra (samma fördelning, ingen omräkning)")
+    output(p)
+    p.set_defaults(func=cmd_buy_ev)
+
+    p = sub.add_parser("sensitivity", help="exakta derivator av RTP/hit/trigger + mål-RTP-lösare")
+    p.add_argument("--target", type=float, default=None, help="mål-RTP (base + FS)")
+    p.add_argument("--knob", default="scale",
+                   help='knapp för --target: "scale", en symbol (vikt), "S" (pS) eller en cell som "A3"')
+    p.add_argument("--base-only", action="store_true", help="sikta på base-RTP:n utan FS")
+    output(p)
+    p.set_defaults(func=cmd_sensitivity)
+
+    p = sub.add_parser("export", help="kolumnär export av utfall per spin (.npy-chunks)")
+    common(p, 1_000_000, 100_000)
+    p.add_argument("--dir", required=True, help="katalog för kolumnfilerna")
+    output(p)
+    p.set_defaults(func=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "resume", False) and not args.checkpoint:
+        parser.error("--resume kräver --checkpoint")
+    if getattr(args, "epsilon", None) and args.checkpoint:
+        parser.error("--checkpoint stöds inte ihop med --epsilon")
+    result = args.func(args)
+    write_result(result, args.format, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
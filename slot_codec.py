@@ -0,0 +1,85 @@
+"""
+Kompakt kodning av grids: 4 bitar per cell, 20 celler => 10 byte per grid.
+
+Cellkoder: 0..9 = index i SYMBOLS, WILD_CODE = wild (hela wild reels
+kodas så, symbolerna under en wild påverkar varken vinst eller retriggers).
+Cellerna ligger radvis (rad 0 reel 0..4, rad 1, ...) och två celler delar
+en byte: jämn cell i höga nibbeln, udda i låga. Med udda antal celler
+(andra rows/reels än spelets 4x5) är sista låga nibbeln utfyllnad (0).
+
+- pack_grids / unpack_grids: vektoriserat för (n, 4, 5)-arrayer (slot_batch)
+- pack_grid / unpack_grid: ett slot_math-grid (list-of-lists) <-> bytes
+"""
+import numpy as np
+
+from slot_math import SYMBOLS, VISIBLE_ROWS, NUM_REELS
+
+WILD_CODE = len(SYMBOLS)            # 10
+CELLS = VISIBLE_ROWS * NUM_REELS
+PACKED_BYTES = (CELLS + 1) // 2     # 10
+
+_SYMBOL_CODE = {s: i for i, s in enumerate(SYMBOLS)}
+
+
+def pack_grids(grids, wild_mask=None):
+    """
+    (n, rows, reels) symbolindex (+ ev. (n, reels) eller (reels,) wild_mask)
+    -> (n, ceil(rows * reels / 2)) uint8, dvs. (n, 10) för spelets 4x5.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    n, rows, reels = grids.shape
+    if wild_mask is not None:
+        wild = np.broadcast_to(np.asarray(wild_mask, dtype=bool), (n, reels))
+        grids = np.where(wild[:, None, :], np.uint8(WILD_CODE), grids)
+    cells = rows * reels
+    flat = np.zeros((n, cells + cells % 2), dtype=np.uint8)
+    flat[:, :cells] = grids.reshape(n, cells)
+    return (flat[:, 0::2] << 4) | flat[:, 1::2]
+
+
+def unpack_grids(packed, rows=VISIBLE_ROWS, reels=NUM_REELS):
+    """
+    (n, ceil(rows * reels / 2)) uint8 -> (grids, wild_mask): (n, rows, reels)
+    cellkoder och (n, reels) bool. Cellerna på wild reels har koden WILD_CODE.
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    n = packed.shape[0]
+    cells = rows * reels
+    flat = np.empty((n, 2 * packed.shape[1]), dtype=np.uint8)
+    flat[:, 0::2] = packed >> 4
+    flat[:, 1::2] = packed & 0x0F
+    grids = flat[:, :cells].reshape(n, rows, reels)
+    wild_mask = (grids == WILD_CODE).all(axis=1)
+    return grids, wild_mask
+
+
+def pack_grid(grid, wild_reels=None):
+    """
+    Ett grid (list-of-lists med symbolsträngar) -> ceil(celler / 2) bytes
+    (10 för spelets 4x5).
+    """
+    wild = set(wild_reels or ())
+    codes = [
+        WILD_CODE if c in wild else _SYMBOL_CODE[sym]
+        for row in grid
+        for c, sym in enumerate(row)
+    ]
+    if len(codes) % 2:
+        codes.append(0)
+    return bytes((codes[i] << 4) | codes[i + 1] for i in range(0, len(codes), 2))
+
+
+def unpack_grid(data, rows=VISIBLE_ROWS, reels=NUM_REELS):
+    """
+    bytes -> (grid, wild_reels). Celler på wild reels blir "W".
+    """
+    codes = []
+    for b in data:
+        codes.append(b >> 4)
+        codes.append(b & 0x0F)
+    grid = [
+        [SYMBOLS[code] if code < WILD_CODE else "W" for code in codes[r * reels:(r + 1) * reels]]
+        for r in range(rows)
+    ]
+    wild_reels = [c for c in range(reels) if all(grid[r][c] == "W" for r in range(rows))]
+    return grid, wild_reels
@@ -0,0 +1,724 @@
+"""
+Exakta (analytiska) beräkningar för base game, INKLUSIVE kravet att en grid
+aldrig har mer än 3 scatters (spin_grid_same_probs slår om sådana grids).
+
+Idé: hjulen är oberoende förutom via totalt antal scatters. Per hjul räknas
+fördelningen av (antal av symbolen, antal scatters) fram exakt, hjulen
+kombineras som polynom i antal scatters (trunkerade till grad <= 3), och
+till sist divideras med P(totalt <= 3 scatters).
+"""
+import hashlib
+import os
+from itertools import combinations
+from math import comb, factorial, sqrt
+
+import numpy as np
+
+from slot_math import GAME_MODEL, MODEL_CAP, as_game_model
+
+
+def _column_patterns(cat_probs, rows):
+    """
+    Alla sätt att fördela `rows` celler på kategorierna (multinomial):
+    lista med (antal per kategori, sannolikhet).
+    """
+    patterns = []
+    n_cat = len(cat_probs)
+
+    def rec(i, left, counts, prob, denom):
+        if i == n_cat - 1:
+            p = prob * cat_probs[i] ** left
+            patterns.append((tuple(counts + [left]), p * factorial(rows) / (denom * factorial(left))))
+            return
+        for c in range(left + 1):
+            rec(i + 1, left - c, counts + [c], prob * cat_probs[i] ** c, denom * factorial(c))
+
+    rec(0, rows, [], 1.0, 1)
+    return patterns
+
+
+def _poly_mul(a, b, max_deg):
+    out = [0.0] * (max_deg + 1)
+    for i, x in enumerate(a):
+        if x == 0.0:
+            continue
+        for j, y in enumerate(b):
+            if i + j > max_deg:
+                break
+            out[i + j] += x * y
+    return out
+
+
+# --- CACHE (nyckel = hash av modellen) --- #
+
+def _user_cache_dir():
+    base = (os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "megaways-slot")
+
+
+CACHE_DIR = os.environ.get("SLOT_CACHE_DIR") or _user_cache_dir()
+CACHE_VERSION = 1       # höj när formatet eller beräkningen av de cachade arrayerna ändras
+
+# resultat per modell-hash, som _group_caches: bara de senaste modellerna sparas
+_memory_cache = {}
+MEMORY_CACHE_MODELS = 4
+
+
+def model_hash(model=None):
+    """
+    Stabil hash av allt som påverkar matematiken i en GameModel.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    parts = [
+        model.symbols,
+        [repr(model.symbol_probs[s]) for s in model.symbols],
+        sorted((k, repr(v)) for k, v in model.paytable.items()),
+        model.wild_reel_counts,
+        [repr(w) for w in model.wild_reel_count_weights],
+        model.fs_multipliers,
+        [repr(w) for w in model.fs_mult_weights],
+        model.visible_rows,
+        model.num_reels,
+        model.scatter,
+        model.max_scatters,
+        model.fs_spins,
+        sorted(model.retrigger_spins.items()),
+        model.max_win_mult,
+    ]
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _cached_arrays(kind, model, compute, use_disk=True):
+    """
+    Minnes- och diskcache för resultat som är tuples av arrayer.
+    Diskfilerna heter v<CACHE_VERSION>_<modell-hash>_<kind>.npz.
+    """
+    mkey = model_hash(model)
+    if mkey in _memory_cache:
+        _memory_cache[mkey] = _memory_cache.pop(mkey)         # senast använd sist
+    else:
+        while len(_memory_cache) >= MEMORY_CACHE_MODELS:
+            del _memory_cache[next(iter(_memory_cache))]
+        _memory_cache[mkey] = {}
+    entries = _memory_cache[mkey]
+    if kind in entries:
+        return entries[kind]
+
+    path = os.path.join(CACHE_DIR, f"v{CACHE_VERSION}_{mkey}_{kind}.npz")
+    if use_disk and os.path.exists(path):
+        with np.load(path) as data:
+            result = tuple(data[f"a{i}"] for i in range(len(data.files)))
+    else:
+        result = tuple(compute())
+        if use_disk:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = path + f".{os.getpid()}.tmp.npz"
+                np.savez(tmp, **{f"a{i}": a for i, a in enumerate(result)})
+                os.replace(tmp, path)
+            except OSError:
+                pass   # cachen är bara en optimering
+    entries[kind] = result
+    return result
+
+
+def scatter_count_probs(model=None):
+    """
+    P(antal scatters = k) för k = 0..max_scatters, efter trunkeringen.
+    """
+    model = model or GAME_MODEL
+    w = model.scatter_count_weights
+    z = sum(w)
+    return [x / z for x in w]
+
+
+def _reel_scatter_probs(model):
+    pS = model.symbol_probs.get(model.scatter, 0.0)
+    rows = model.visible_rows
+    return [comb(rows, k) * pS**k * (1 - pS)**(rows - k) for k in range(rows + 1)]
+
+
+def _symbol_reel_moments(model, sym):
+    """
+    Per hjul, som polynom i antal scatters k på hjulet:
+    zero[k] = P(symbolen saknas, k scatters)
+    mean[k] = E[antal symbol * 1{k scatters}]
+    """
+    p = model.symbol_probs[sym]
+    pS = model.symbol_probs.get(model.scatter, 0.0)
+    rows = model.visible_rows
+    zero = [0.0] * (rows + 1)
+    mean = [0.0] * (rows + 1)
+    for (c, k, _), prob in _column_patterns([p, pS, 1.0 - p - pS], rows):
+        if c == 0:
+            zero[k] += prob
+        mean[k] += c * prob
+    return zero, mean
+
+
+def exact_ways_by_cell(model=None, symbols=None):
+    """
+    E[ways * 1{run = n}] per (symbol, n) för n = 3..num_reels, betingat på
+    <= max_scatters. Base-RTP:n är linjär i paytablen: sum pay * värdet,
+    så detta är också dRTP/dpay för varje paytable-cell (även tomma).
+    """
+    model = as_game_model(model or GAME_MODEL)
+    max_k = model.max_scatters
+    reels = model.num_reels
+    any_reel = _reel_scatter_probs(model)
+    z = sum(model.scatter_count_weights)        # P(<= max_k scatters)
+    if symbols is None:
+        symbols = [s for s in model.symbols if s != model.scatter]
+
+    result = {}
+    for sym in symbols:
+        zero, mean = _symbol_reel_moments(model, sym)
+        for run in range(3, reels + 1):
+            poly = [1.0]
+            for _ in range(run):
+                poly = _poly_mul(poly, mean, max_k)
+            if run < reels:
+                poly = _poly_mul(poly, zero, max_k)
+            for _ in range(run + 1, reels):
+                poly = _poly_mul(poly, any_reel, max_k)
+            result[(sym, run)] = sum(poly) / z
+    return result
+
+
+def exact_rtp_by_symbol(model=None):
+    """
+    Exakt base-RTP per symbol: {symbol: bidrag}, betingat på <= max_scatters.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    cells = exact_ways_by_cell(model, model.paying_symbols)
+    result = {}
+    for sym in model.paying_symbols:
+        pays = model.pays[sym]
+        result[sym] = sum(pays[run] * cells[(sym, run)]
+                          for run in range(3, model.num_reels + 1) if pays[run])
+    return result
+
+
+def exact_hit_frequency(model=None):
+    """
+    P(base-vinst > 0), betingat på <= max_scatters.
+
+    DP över hjulen med tillstånd (levande symboler, antal scatters hittills),
+    där "levande" = symbolen finns på alla hjul hittills. När en symbol dör med
+    en betalande längd (eller överlever alla hjul) är spinnet en träff.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    max_k = model.max_scatters
+    reels = model.num_reels
+    rows = model.visible_rows
+    pS = model.symbol_probs.get(model.scatter, 0.0)
+    any_reel = _reel_scatter_probs(model)
+
+    presence_cache = {}
+
+    def presence_dist(alive):
+        # (närvarande delmängd av alive, scatters på hjulet) -> sannolikhet
+        if alive not in presence_cache:
+            syms = sorted(alive)
+            probs = [model.symbol_probs[s] for s in syms]
+            rest = 1.0 - sum(probs) - pS
+            dist = {}
+            for counts, prob in _column_patterns(probs + [pS, rest], rows):
+                present = frozenset(s for s, c in zip(syms, counts) if c > 0)
+                key = (present, counts[len(syms)])
+                dist[key] = dist.get(key, 0.0) + prob
+            presence_cache[alive] = list(dist.items())
+        return presence_cache[alive]
+
+    HIT = "hit"
+    states = {(frozenset(model.paying_symbols), 0): 1.0}
+    for reel in range(reels):
+        new_states = {}
+        for (alive, k), p in states.items():
+            if alive == HIT or not alive:
+                for ks, q in enumerate(any_reel):
+                    if k + ks <= max_k:
+                        key = (alive, k + ks)
+                        new_states[key] = new_states.get(key, 0.0) + p * q
+                continue
+            for (present, ks), q in presence_dist(alive):
+                if k + ks > max_k:
+                    continue
+                # symboler som dör här har run-längd = reel
+                died_paying = any(model.pays[s][reel] for s in alive - present)
+                key = (HIT if died_paying else present, k + ks)
+                new_states[key] = new_states.get(key, 0.0) + p * q
+        states = new_states
+
+    hit = 0.0
+    total = 0.0
+    for (alive, k), p in states.items():
+        total += p
+        if alive == HIT or (alive and any(model.pays[s][reels] for s in alive)):
+            hit += p
+    return hit / total
+
+
+def exact_base_stats(model=None):
+    """
+    Exakt base game utan simulering:
+    - rtp, rtp_by_symbol
+    - hit_freq
+    - trigger_prob (exakt max_scatters scatters) och scatter_count_probs
+    """
+    model = as_game_model(model or GAME_MODEL)
+    by_symbol = exact_rtp_by_symbol(model)
+    scatter_probs = scatter_count_probs(model)
+    return {
+        "rtp": sum(by_symbol[s] for s in model.paying_symbols),
+        "rtp_by_symbol": by_symbol,
+        "hit_freq": exact_hit_frequency(model),
+        "trigger_prob": scatter_probs[model.max_scatters],
+        "scatter_count_probs": scatter_probs,
+    }
+
+
+# --- EXAKT FÖRDELNING FÖR ETT SPIN (MED WILD REELS) --- #
+
+def _reel_groups(model, alive):
+    """
+    Mönster för ett (icke-wild) hjul, projicerat på de levande symbolerna och
+    grupperat på vilka av dem som finns kvar:
+    {kvarvarande: (index i alive som finns kvar, döda symboler, antal (P, n), scatters (P,), sannolikhet (P,))}
+    """
+    pS = model.symbol_probs.get(model.scatter, 0.0)
+    probs = [model.symbol_probs[s] for s in alive]
+    rest = max(0.0, 1.0 - sum(probs) - pS)
+    groups = {}
+    for counts, prob in _column_patterns(probs + [pS, rest], model.visible_rows):
+        if prob <= 0.0:
+            continue
+        keep = tuple(i for i, c in enumerate(counts[:len(alive)]) if c)
+        groups.setdefault(keep, []).append((counts[:len(alive)], counts[len(alive)], prob))
+
+    out = {}
+    for keep, rows in groups.items():
+        survivors = tuple(alive[i] for i in keep)
+        dead = [s for i, s in enumerate(alive) if i not in keep]
+        counts = np.array([[r[0][i] for i in keep] for r in rows], dtype=np.int64).reshape(len(rows), len(keep))
+        out[survivors] = (
+            list(keep),
+            dead,
+            counts,
+            np.array([r[1] for r in rows], dtype=np.int64),
+            np.array([r[2] for r in rows], dtype=np.float64),
+        )
+    return out
+
+
+def _merge_states(ways, win, k_all, k_free, prob):
+    """
+    Slå ihop identiska tillstånd (samma ways, vinst och scatter-räknare).
+    Vinsten jämförs avrundad till 1e-9 (heltalsnyckel).
+    """
+    if len(prob) < 64:
+        # små grupper: sammanslagningen kostar mer än den sparar
+        return ways, win, k_all, k_free, prob
+    win_key = np.rint(win * 1e9).astype(np.int64)
+    keys = [win_key, k_free, k_all] + [ways[:, i] for i in range(ways.shape[1])]
+    order = np.lexsort(keys)
+    sorted_keys = np.column_stack([k[order] for k in keys])
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    first = order[new_group]
+    group_id = np.cumsum(new_group) - 1
+    return (
+        ways[first],
+        win_key[first] / 1e9,
+        k_all[first],
+        k_free[first],
+        np.bincount(group_id, weights=prob[order], minlength=len(first)),
+    )
+
+
+# _reel_groups per modell-hash (inte id(): tillfälliga modeller skräpsamlas
+# och id:n återanvänds). Bara de senaste modellerna sparas.
+_group_caches = {}
+GROUP_CACHE_MODELS = 4
+
+
+def spin_win_pmf(model=None, wild_reels=(), use_disk=True):
+    """
+    Cachad (per modell-hash) version av _spin_win_pmf, se nedan.
+    use_disk=False: bara minnescache (för tillfälliga modeller).
+    """
+    model = as_game_model(model or GAME_MODEL)
+    wild_reels = tuple(sorted(set(wild_reels)))
+    kind = "spin_" + "".join(str(r) for r in wild_reels)
+    return _cached_arrays(kind, model, lambda: _spin_win_pmf(model, wild_reels), use_disk)
+
+
+def _reel_group_cache(model):
+    key = model_hash(model)
+    if key in _group_caches:
+        _group_caches[key] = _group_caches.pop(key)     # senast använd sist
+    else:
+        while len(_group_caches) >= GROUP_CACHE_MODELS:
+            del _group_caches[next(iter(_group_caches))]
+        _group_caches[key] = {}
+    return _group_caches[key]
+
+
+def _spin_win_pmf(model, wild_reels):
+    """
+    Exakt fördelning för ett spin med givna wild reels, betingat på
+    <= max_scatters scatters i hela griden. Returnerar tre arrayer:
+    (line-vinst i bet-multiplar, scatters utanför wild reels, sannolikhet).
+
+    DP över hjulen, grupperad på mängden "levande" symboler (de som finns på
+    alla hjul hittills). Per grupp hålls ways per symbol, vinst hittills och
+    scatter-räknare som arrayer. När en symbol dör (eller efter sista hjulet)
+    betalas pays[symbol][run-längd] * ways.
+    """
+    wild_reels = set(wild_reels)
+    max_k = model.max_scatters
+    rows = model.visible_rows
+    reels = model.num_reels
+    any_reel = np.array(_reel_scatter_probs(model))
+    pays = model.pays
+
+    group_cache = _reel_group_cache(model)
+    start = tuple(model.paying_symbols)
+    states = {start: (
+        np.ones((1, len(start)), dtype=np.int64),
+        np.zeros(1),
+        np.zeros(1, dtype=np.int64),
+        np.zeros(1, dtype=np.int64),
+        np.ones(1),
+    )}
+
+    for reel in range(reels):
+        buckets = {}
+        for alive, (ways, win, k_all, k_free, prob) in states.items():
+            if reel in wild_reels or not alive:
+                # wild reel: alla levande symboler får 4 träffar,
+                # scatters under wild räknas inte för retriggers
+                ks = np.arange(len(any_reel))
+                ka = k_all[:, None] + ks[None, :]
+                kf = k_free[:, None] + (ks * 0 if reel in wild_reels else ks)[None, :]
+                ok = ka <= max_k
+                m_idx, p_idx = np.nonzero(ok)
+                new = (
+                    ways[m_idx] * (rows if reel in wild_reels else 1),
+                    win[m_idx],
+                    ka[ok],
+                    np.broadcast_to(kf, ka.shape)[ok],
+                    prob[m_idx] * any_reel[p_idx],
+                )
+                buckets.setdefault(alive, []).append(new)
+                continue
+
+            if alive not in group_cache:
+                group_cache[alive] = _reel_groups(model, alive)
+            for survivors, (keep, dead, counts, ks, pprob) in group_cache[alive].items():
+                ka = k_all[:, None] + ks[None, :]
+                ok = ka <= max_k
+                if not ok.any():
+                    continue
+                m_idx, p_idx = np.nonzero(ok)
+                dead_pay = np.zeros(len(win))
+                for s in dead:
+                    if pays[s][reel]:
+                        dead_pay += pays[s][reel] * ways[:, alive.index(s)]
+                new = (
+                    ways[m_idx][:, keep] * counts[p_idx],
+                    (win + dead_pay)[m_idx],
+                    ka[ok],
+                    (k_free[:, None] + ks[None, :])[ok],
+                    prob[m_idx] * pprob[p_idx],
+                )
+                buckets.setdefault(survivors, []).append(new)
+
+        states = {}
+        for alive, parts in buckets.items():
+            merged = [np.concatenate([p[i] for p in parts]) for i in range(5)]
+            states[alive] = _merge_states(*merged)
+
+    wins, frees, probs = [], [], []
+    for alive, (ways, win, k_all, k_free, prob) in states.items():
+        final = win.copy()
+        for i, s in enumerate(alive):
+            final += pays[s][reels] * ways[:, i]
+        wins.append(final)
+        frees.append(k_free)
+        probs.append(prob)
+
+    wins = np.concatenate(wins)
+    frees = np.concatenate(frees)
+    probs = np.concatenate(probs)
+    no_ways = np.zeros((len(wins), 0), dtype=np.int64)
+    _, wins, _, frees, probs = _merge_states(no_ways, wins, frees, frees, probs)
+    return wins, frees, probs / probs.sum()
+
+
+# --- FREE SPINS: EXAKT EV OCH ANTAL SPINS --- #
+
+def _mult_sum_dist(model, k):
+    """
+    Fördelning för summan av k wild-multiplikatorer: {summa: sannolikhet}.
+    Inga wild reels => total multiplikator 1.
+    """
+    total = float(sum(model.fs_mult_weights))
+    single = {m: w / total for m, w in zip(model.fs_multipliers, model.fs_mult_weights)}
+    dist = {0: 1.0} if k else {1: 1.0}
+    for _ in range(k):
+        nxt = {}
+        for a, pa in dist.items():
+            for m, pm in single.items():
+                nxt[a + m] = nxt.get(a + m, 0.0) + pa * pm
+        dist = nxt
+    return dist
+
+
+def _wild_configs(model):
+    """
+    Wild-reel-uppsättningar med sannolikhet. Vinsten kräver alltid de tre
+    första hjulen, så hur de wild reels som hamnar bland dem är placerade
+    spelar ingen roll – bara hur många. Det halverar antalet DP-körningar.
+    """
+    reels = model.num_reels
+    total = float(sum(model.wild_reel_count_weights))
+    configs = {}
+    for k, w in zip(model.wild_reel_counts, model.wild_reel_count_weights):
+        k = min(k, reels)
+        if w <= 0:
+            continue
+        subsets = list(combinations(range(reels), k))
+        for subset in subsets:
+            head = sum(1 for r in subset if r < 3)
+            rep = tuple(range(head)) + tuple(r for r in subset if r >= 3)
+            key = (k, rep)
+            configs[key] = configs.get(key, 0.0) + (w / total) / len(subsets)
+    return configs
+
+
+def fs_spin_pmf(model=None, use_disk=True):
+    """
+    Exakt fördelning för ETT free spin: (vinst i bet-multiplar inkl.
+    wild-multiplikatorer, extra spins från retrigger, sannolikhet). Cachad.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    return _cached_arrays("fs_spin", model, lambda: _fs_spin_pmf(model, use_disk), use_disk)
+
+
+def _fs_spin_pmf(model, use_disk=True):
+    wins, extras, probs = [], [], []
+    for (k, wild_reels), p_cfg in _wild_configs(model).items():
+        line, free, p_line = spin_win_pmf(model, wild_reels, use_disk)
+        extra = np.array([model.retrigger_spins.get(int(f), 0) for f in free], dtype=np.int64)
+        for mult, p_mult in _mult_sum_dist(model, k).items():
+            wins.append(line * mult)
+            extras.append(extra)
+            probs.append(p_line * (p_cfg * p_mult))
+
+    wins = np.concatenate(wins)
+    extras = np.concatenate(extras)
+    probs = np.concatenate(probs)
+    no_ways = np.zeros((len(wins), 0), dtype=np.int64)
+    _, wins, _, extras, probs = _merge_states(no_ways, wins, extras, extras, probs)
+    return wins, extras, probs / probs.sum()
+
+
+def _bucket_split(values, probs, step, size):
+    """
+    Lägg värden på gittret 0, step, 2*step, ... (size punkter) och dela varje
+    värde mellan närmaste två punkter så att väntevärdet bevaras.
+    """
+    pos = values / step
+    lo = np.floor(pos).astype(np.int64)
+    frac = pos - lo
+    out = np.zeros(size)
+    np.add.at(out, lo, probs * (1.0 - frac))
+    np.add.at(out, np.minimum(lo + 1, size - 1), probs * frac)
+    return out
+
+
+def fs_round_exact(model=None, num_free_spins=None, max_win_mult=MODEL_CAP,
+                   n_buckets=500, tol=1e-13, max_steps=1000, use_disk=True):
+    """
+    EV och fördelning av antal spins för en free-spins-runda (samma regler
+    som run_free_spins), utan simulering. Per-spin-fördelningen är exakt;
+    capen räknas på ett gitter (se nedan), så med cap är resultatet en
+    hink-approximation med känt och litet diskretiseringsfel.
+
+    - EV utan cap via Wald (exakt): E[T] = E[antal spins] * E[vinst per spin],
+      där E[antal spins] = N0 / (1 - E[extra spins per spin]).
+    - Capen: eftersom vinsterna är >= 0 är capad vinst = min(T, cap).
+      Korrektionen E[T] - E[min(T, cap)] är INTE liten (~567 bet-multiplar
+      mot capad EV ~135.9 för standardmodellen) och räknas med en DP över
+      (spins kvar, ackumulerad vinst på gittret 0, step, ..., cap med
+      step = cap / n_buckets). När en runda når capen läggs både
+      överskottet och förväntad vinst från de spins som inte spelas (Wald
+      igen) till korrektionen.
+
+    Diskretiseringsfel: varje spin-vinst delas mellan de två närmaste
+    gitterpunkterna så att väntevärdet bevaras, så felet uppstår bara för
+    rundor som ligger inom några step från capen. Empiriskt (standard-
+    modellen, cap 5000) minskar EV-felet ~3.5x per halverat step:
+    n_buckets=500 (step 10x) ger EV 135.87535 mot gränsvärdet 135.87540
+    (fel ~5e-5, ~4e-7 relativt) och cap_hit_prob 0.008778 mot 0.008769
+    (fel ~9e-6, ~0.1 % relativt, avtar som O(step)). Värdena stämmer med
+    FFT-gittret (slot_fft) och 1M simulerade rundor. Felet kan skattas
+    genom att köra om med dubbla n_buckets.
+
+    max_win_mult: MODEL_CAP (default) = modellens cap, None = ingen cap
+    (samma som run_free_spins/simulate_fs_rounds), annars capen i
+    bet-multiplar.
+
+    Returnerar dict med ev, ev_uncapped, spin_ev, expected_spins,
+    spin_count_probs (index = antal spelade spins), cap_hit_prob och
+    unresolved (sannolikhetsmassa som inte hann avslutas, ~0).
+    use_disk=False cachar per-spin-fördelningen bara i minnet.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    n0 = model.fs_spins if num_free_spins is None else num_free_spins
+    cap = model.max_win_mult if max_win_mult == MODEL_CAP else max_win_mult
+
+    wins, extras, probs = fs_spin_pmf(model, use_disk)
+    spin_ev = float((wins * probs).sum())
+    extra_ev = float((extras * probs).sum())
+    future_per_spin = spin_ev / (1.0 - extra_ev)       # förväntad vinst per spin kvar
+    ev_uncapped = n0 * future_per_spin
+
+    extra_values = sorted(set(int(e) for e in extras))
+    if cap is None:
+        cap = float("inf")
+        step = 1.0
+        size = 1
+        kernels = {e: (np.array([probs[extras == e].sum()]), 0.0, 0.0) for e in extra_values}
+    else:
+        step = cap / n_buckets
+        size = n_buckets + 1                             # index n_buckets = capen
+        kernels = {}
+        for e in extra_values:
+            sel = (extras == e) & (wins < cap)
+            over = (extras == e) & (wins >= cap)
+            kernels[e] = (
+                _bucket_split(wins[sel], probs[sel], step, size),
+                float(probs[over].sum()),
+                float((wins[over] * probs[over]).sum()),
+            )
+
+    grid_values = np.arange(size) * step
+    states = {n0: np.zeros(size)}
+    states[n0][0] = 1.0
+    spin_count = [0.0]
+    cap_hit = 0.0
+    excess = 0.0
+
+    for step_no in range(1, max_steps + 1):
+        new_states = {}
+        done = 0.0
+        for r, dist in states.items():
+            mass = dist.sum()
+            mean_total = (dist * grid_values).sum()
+            for e in extra_values:
+                kernel, over_p, over_m = kernels[e]
+                left = r - 1 + e
+                future = left * future_per_spin
+                if size > 1:
+                    conv = np.convolve(dist, kernel)
+                    below = conv[: size - 1]
+                    above = conv[size - 1:]
+                    above_vals = np.arange(size - 1, len(conv)) * step
+                    hit = above.sum()
+                    excess += (above * (above_vals - cap)).sum() + hit * future
+                else:
+                    below = dist * kernel[0]
+                    hit = 0.0
+                # enstaka spin som själv slår i capen
+                if over_p:
+                    hit_over = mass * over_p
+                    excess += mean_total * over_p + mass * over_m - cap * hit_over + hit_over * future
+                    hit += hit_over
+                cap_hit += hit
+                done += hit
+                if left == 0:
+                    done += below.sum()
+                else:
+                    if size > 1:
+                        below = np.concatenate([below, [0.0]])
+                    if left in new_states:
+                        new_states[left] += below
+                    else:
+                        new_states[left] = below.copy()
+        spin_count.append(done)
+        states = new_states
+        if sum(d.sum() for d in states.values()) < tol:
+            break
+
+    unresolved = float(sum(d.sum() for d in states.values()))
+    spin_count = np.array(spin_count)
+    return {
+        "ev": ev_uncapped - excess,
+        "ev_uncapped": ev_uncapped,
+        "spin_ev": spin_ev,
+        "retrigger_ev": extra_ev,
+        "expected_spins": float((spin_count * np.arange(len(spin_count))).sum()),
+        "expected_spins_uncapped": n0 / (1.0 - extra_ev),
+        "spin_count_probs": spin_count,
+        "cap_hit_prob": cap_hit,
+        "unresolved": unresolved,
+    }
+
+
+# --- BASE GAME: HELA VINSTFÖRDELNINGEN --- #
+
+# hinkgränser (i bet-multiplar) för vinsttabellen: [lo, hi)
+WIN_BUCKET_EDGES = [0.0, 1e-9, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, float("inf")]
+
+
+def base_win_pmf(model=None):
+    """
+    Exakt sannolikhetsfunktion för vinstmultipeln i ett base spin:
+    (vinstvärden, sannolikheter), sorterade. Cachad per modell-hash.
+    """
+    model = as_game_model(model or GAME_MODEL)
+
+    def compute():
+        wins, _, probs = spin_win_pmf(model, ())
+        no_ways = np.zeros((len(wins), 0), dtype=np.int64)
+        zeros = np.zeros(len(wins), dtype=np.int64)
+        _, values, _, _, p = _merge_states(no_ways, wins, zeros, zeros, probs)
+        order = np.argsort(values)
+        return values[order], p[order]
+
+    return _cached_arrays("base_pmf", model, compute)
+
+
+def win_bucket_table(values, probs, edges=WIN_BUCKET_EDGES):
+    """
+    Lista med (lo, hi, sannolikhet, RTP-bidrag) per hink [lo, hi).
+    """
+    rows = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        sel = (values >= lo) & (values < hi)
+        rows.append((lo, hi, float(probs[sel].sum()), float((values[sel] * probs[sel]).sum())))
+    return rows
+
+
+def base_game_report(model=None, edges=WIN_BUCKET_EDGES):
+    """
+    Exakt base game utan simulering:
+    rtp, hit_freq, variance, sigma, volatility_index (1.96 * sigma, dvs 95 %),
+    max_win och win_buckets (se win_bucket_table).
+    """
+    values, probs = base_win_pmf(model)
+    mean = float((values * probs).sum())
+    variance = float((((values - mean) ** 2) * probs).sum())
+    sigma = sqrt(variance)
+    return {
+        "rtp": mean,
+        "hit_freq": float(probs[values > 0].sum()),
+        "variance": variance,
+        "sigma": sigma,
+        "volatility_index": 1.96 * sigma,
+        "max_win": float(values[probs > 0].max()),
+        "win_buckets": win_bucket_table(values, probs, edges),
+    }
@@ -0,0 +1,160 @@
+"""
+Kolumnär export av utfall per spin (för revision/analys).
+
+Simuleringen körs chunk för chunk via slot_parallel (samma seed/chunk-
+strömmar som parallel_simulate, så totalerna stämmer med en vanlig
+körning). Varje chunk skrivs direkt som en .npy-fil per kolumn:
+
+    <katalog>/manifest.json
+    <katalog>/<kolumn>/000000.npy, 000001.npy, ...
+
+Minnet är begränsat till de chunks som ligger ute hos workers. Läsaren
+öppnar filerna memory-mappade, så man kan skära ut delar utan att läsa in
+allt.
+
+Både chunkfilerna och manifestet skrivs atomiskt (tmp-fil + os.replace)
+och manifestet uppdateras först när alla kolumner i en chunk finns. En
+avbruten export är därför läsbar fram till sista färdiga chunk; filer från
+en halvskriven chunk finns inte med i manifestet och ignoreras.
+"""
+import json
+import os
+
+import numpy as np
+
+from slot_math import GAME_MODEL, SPIN_RECORD_FIELDS, as_game_model, simulate_spins
+from slot_parallel import CHUNK_SPINS, chunk_rng, iter_chunks, save_checkpoint
+
+COLUMNS = {
+    "index": np.uint64,          # globalt spin-nummer (chunk * chunk_spins + i)
+    "base_win": np.float64,
+    "scatters": np.uint8,
+    "fs_triggered": np.bool_,
+    "fs_win": np.float64,
+    "fs_spins": np.uint16,
+    "fs_wild_reels": np.uint16,  # summa wild reels över FS-rundan
+    "fs_mult_sum": np.uint32,    # summa wild-multipliers över FS-rundan
+}
+
+MANIFEST = "manifest.json"
+
+
+def _record_chunk(args):
+    model, n_spins, bet, seed, chunk = args
+    records = {name: [] for name in SPIN_RECORD_FIELDS}
+    simulate_spins(model, n_spins, bet, chunk_rng(seed, chunk), records=records)
+    return chunk, {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in records.items()}
+
+
+def _chunk_path(directory, column, chunk):
+    return os.path.join(directory, column, f"{chunk:06d}.npy")
+
+
+def _save_array(path, array):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def export_spins(directory, paytable=None, n_spins=1_000_000, bet=1.0, seed=0, workers=None,
+                 chunk_spins=CHUNK_SPINS, progress=None):
+    """
+    Simulerar n_spins och skriver en kolumnfil per chunk och kolumn.
+    manifest.json skrivs om (atomiskt) efter varje chunk, så en avbruten
+    export går att läsa fram till sista färdiga chunk.
+    progress(spins_klara) anropas efter varje chunk om den ges.
+    """
+    from slot_exact import model_hash
+
+    model = as_game_model(paytable or GAME_MODEL)
+    for column in COLUMNS:
+        os.makedirs(os.path.join(directory, column), exist_ok=True)
+
+    manifest = {
+        "version": 1,
+        "model": model_hash(model),
+        "seed": str(seed),
+        "bet": bet,
+        "chunk_spins": chunk_spins,
+        "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+        "chunks": [],
+    }
+    done = 0
+    for chunk, columns in iter_chunks(model, n_spins, bet, seed, workers, chunk_spins,
+                                      task=_record_chunk):
+        n = len(columns["base_win"])
+        columns["index"] = np.arange(chunk * chunk_spins, chunk * chunk_spins + n, dtype=np.uint64)
+        for name, dtype in COLUMNS.items():
+            _save_array(_chunk_path(directory, name, chunk), columns[name].astype(dtype, copy=False))
+        manifest["chunks"].append(n)
+        save_checkpoint(os.path.join(directory, MANIFEST), manifest)
+        done += n
+        if progress is not None:
+            progress(done)
+    return manifest
+
+
+class SpinExport:
+    """
+    Läsare för en export-katalog. Kolumner öppnas memory-mappade per chunk.
+
+        data = SpinExport("run1")
+        len(data)                          # antal spins
+        data.read("fs_win", 10**6, 2 * 10**6)
+        for chunk in data.iter_chunks(["base_win", "fs_win"]): ...
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.columns = list(self.manifest["columns"])
+        self.chunk_sizes = list(self.manifest["chunks"])
+        self.offsets = np.concatenate([[0], np.cumsum(self.chunk_sizes, dtype=np.int64)])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def chunk(self, column, i):
+        """
+        Chunk i av en kolumn som memmap (ingen inläsning). En chunk som
+        manifestet listar men som saknas eller har fel längd ger
+        FileNotFoundError resp. ValueError.
+        """
+        if column not in self.manifest["columns"]:
+            raise KeyError(column)
+        if not 0 <= i < len(self.chunk_sizes):
+            raise IndexError(f"chunk {i} finns inte i exporten ({len(self.chunk_sizes)} chunks)")
+        path = _chunk_path(self.directory, column, i)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} saknas men finns i {MANIFEST}")
+        data = np.load(path, mmap_mode="r")
+        if len(data) != self.chunk_sizes[i]:
+            raise ValueError(f"{path}: {len(data)} spins, manifestet säger {self.chunk_sizes[i]}")
+        return data
+
+    def read(self, column, start=0, stop=None):
+        """
+        Spins [start, stop) av en kolumn som en vanlig array.
+        Läser bara de chunks som överlappar intervallet.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return np.empty(0, dtype=np.dtype(self.manifest["columns"][column]))
+        first = int(np.searchsorted(self.offsets, start, side="right")) - 1
+        last = int(np.searchsorted(self.offsets, stop, side="left"))
+        parts = []
+        for i in range(first, last):
+            lo = max(start - self.offsets[i], 0)
+            hi = min(stop - self.offsets[i], self.chunk_sizes[i])
+            parts.append(self.chunk(column, i)[lo:hi])
+        return np.concatenate(parts)
+
+    def iter_chunks(self, columns=None):
+        """
+        Ger {kolumn: memmap} chunk för chunk (fast minne oavsett storlek).
+        """
+        columns = self.columns if columns is None else columns
+        for i in range(len(self.chunk_sizes)):
+            yield {name: self.chunk(name, i) for name in columns}
@@ -0,0 +1,157 @@
+"""
+Hela vinstfördelningen för en free-spins-runda (samma regler som
+run_free_spins) via diskretiserad faltning med FFT.
+
+Per-spin-fördelningen (vinst inkl. multiplikatorer + extra spins) kommer
+exakt från slot_exact.fs_spin_pmf. Rundans totalvinst är en summa av ett
+slumpmässigt antal spins där antalet beror på retriggers, så DP:n går över
+"spins kvar" och håller en fördelning över ackumulerad vinst per tillstånd.
+Allt som når capen (MAX_WIN_MULT) samlas i en punktmassa på capen. Utan
+cap (max_win_mult=None) slutar gittret på horizon och massan ovanför samlas
+på samma sätt i sista punkten (overflow_prob).
+"""
+import numpy as np
+
+from slot_math import GAME_MODEL, MODEL_CAP, as_game_model
+from slot_exact import fs_spin_pmf, _bucket_split
+
+DEFAULT_PERCENTILES = (0.5, 0.75, 0.9, 0.95, 0.99, 0.999, 0.9999)
+UNCAPPED_HORIZON = 50_000                 # gittrets slut utan cap (bet-multiplar)
+
+
+def _fft_size(n):
+    size = 1
+    while size < n:
+        size *= 2
+    return size
+
+
+def fs_round_pmf(model=None, num_free_spins=None, max_win_mult=MODEL_CAP,
+                 step=0.5, tol=1e-14, max_steps=1000, horizon=UNCAPPED_HORIZON):
+    """
+    Fördelning för totalvinsten i en FS-runda (bet-multiplar).
+
+    Vinster läggs på gittret 0, step, 2*step, ... < cap (väntevärdesbevarande
+    uppdelning mellan närmaste gitterpunkter). Varje steg faltas fördelningen
+    för varje "spins kvar"-tillstånd med per-spin-kärnan för varje antal
+    extra spins (0, +1, +3) i frekvensplanet, och massa över capen flyttas
+    till cap-atomen.
+
+    max_win_mult: MODEL_CAP (default) = modellens cap, None = ingen cap
+    (samma som fs_round_exact och simulate_fs_rounds). Utan cap slutar
+    gittret på horizon; massan ovanför hamnar i sista punkten och mean är
+    den exakta Wald-EV:n.
+
+    Returnerar dict:
+    - values, probs: gitter + cap (sista elementet är capen / horizon)
+    - cap_hit_prob:  P(rundan når capen) (0 utan cap)
+    - overflow_prob: P(rundvinst >= horizon) utan cap, annars 0
+    - mean:          E[rundvinst] (capad om capen gäller)
+    - unresolved:    massa som inte hann avslutas inom max_steps (~0)
+    """
+    model = as_game_model(model or GAME_MODEL)
+    n0 = model.fs_spins if num_free_spins is None else num_free_spins
+    cap = model.max_win_mult if max_win_mult == MODEL_CAP else max_win_mult
+    uncapped = cap is None
+    cap = float(horizon if uncapped else cap)
+
+    size = int(np.ceil(cap / step))
+    step = cap / size                     # gittret slutar exakt på capen
+    n_fft = _fft_size(2 * size + 1)
+
+    wins, extras, probs_spin = fs_spin_pmf(model)
+    extra_values = sorted(set(int(e) for e in extras))
+    kernels = {}
+    for e in extra_values:
+        sel = (extras == e) & (wins < cap)
+        over = (extras == e) & (wins >= cap)
+        kernel = _bucket_split(wins[sel], probs_spin[sel], step, size + 1)
+        kernels[e] = (np.fft.rfft(kernel, n_fft), float(probs_spin[over].sum()))
+
+    finished = np.zeros(size)
+    cap_mass = 0.0
+    states = {n0: np.zeros(size)}
+    states[n0][0] = 1.0
+
+    for _ in range(max_steps):
+        spectra = {}
+        for r, dist in states.items():
+            mass = dist.sum()
+            spec = np.fft.rfft(dist, n_fft)
+            for e in extra_values:
+                kernel_spec, over_p = kernels[e]
+                cap_mass += mass * over_p
+                left = r - 1 + e
+                if left in spectra:
+                    spectra[left] += spec * kernel_spec
+                else:
+                    spectra[left] = spec * kernel_spec
+
+        new_states = {}
+        for left, spec in spectra.items():
+            conv = np.fft.irfft(spec, n_fft)[: 2 * size + 1]
+            np.maximum(conv, 0.0, out=conv)   # avrundningsbrus från FFT
+            cap_mass += conv[size:].sum()
+            below = conv[:size]
+            if left == 0:
+                finished += below
+            else:
+                new_states[left] = below
+        states = new_states
+        if sum(d.sum() for d in states.values()) < tol:
+            break
+
+    unresolved = float(sum(d.sum() for d in states.values()))
+    values = np.append(np.arange(size) * step, cap)
+    probs = np.append(finished, cap_mass)
+    if uncapped:
+        mean = n0 * float((wins * probs_spin).sum()) / (1.0 - float((extras * probs_spin).sum()))
+    else:
+        mean = float((values * probs).sum())
+    return {
+        "values": values,
+        "probs": probs,
+        "cap_hit_prob": 0.0 if uncapped else float(cap_mass),
+        "overflow_prob": float(cap_mass) if uncapped else 0.0,
+        "mean": mean,
+        "unresolved": unresolved,
+    }
+
+
+def pmf_percentiles(values, probs, qs=DEFAULT_PERCENTILES):
+    """
+    {q: minsta värde v med P(X <= v) >= q}.
+    """
+    cdf = np.cumsum(probs) / probs.sum()
+    return {q: float(values[min(np.searchsorted(cdf, q), len(values) - 1)]) for q in qs}
+
+
+def exceedance(values, probs, thresholds):
+    """
+    {t: P(X >= t)} – svansrisken, t.ex. nära capen.
+    """
+    total = probs.sum()
+    return {t: float(probs[values >= t].sum() / total) for t in thresholds}
+
+
+def fs_round_report(model=None, step=0.5, qs=DEFAULT_PERCENTILES,
+                    thresholds=(100, 500, 1000, 2500, 4000, 5000), max_win_mult=MODEL_CAP,
+                    horizon=UNCAPPED_HORIZON):
+    """
+    Sammanfattning av rundfördelningen: mean, sigma, cap_hit_prob,
+    percentiles och exceedance (P(rundvinst >= t)). max_win_mult som i
+    fs_round_pmf; utan cap räknas sigma på gittret (trunkerat vid horizon).
+    """
+    res = fs_round_pmf(model, max_win_mult=max_win_mult, step=step, horizon=horizon)
+    values, probs = res["values"], res["probs"]
+    mean = res["mean"]
+    sigma = float(np.sqrt((((values - mean) ** 2) * probs).sum()))
+    return {
+        "mean": mean,
+        "sigma": sigma,
+        "cap_hit_prob": res["cap_hit_prob"],
+        "overflow_prob": res["overflow_prob"],
+        "percentiles": pmf_percentiles(values, probs, qs),
+        "exceedance": exceedance(values, probs, thresholds),
+        "unresolved": res["unresolved"],
+    }
@@ -0,0 +1,144 @@
+"""
+Importance sampling för svansen i en FS-runda (cap-träffar, stora vinster).
+
+Stora rundvinster kommer nästan bara från spins med många wild reels och
+höga multiplikatorer, som har små vikter (WILD_REEL_COUNT_WEIGHTS,
+FS_MULT_WEIGHTS). Här dras de istället från vinklade vikter
+
+    q = (1 - mix) * p + mix * p_theta,   p_theta,i  ∝  p_i * exp(theta * v_i)
+
+(v = antal wild reels resp. multiplikatorns värde), och varje runda får
+vikten L = prod p/q över alla dragningar som påverkar rundan: ett
+wild-antal per spin och en multiplikator per wild reel. Symbolerna dras
+som vanligt. Eftersom E_q[L * f] = E_p[f] blir skattningarna
+väntevärdesriktiga för godtyckligt f – här P(rundvinst >= t) och EV.
+
+Blandningen (mix < 1) behövs eftersom en runda har ~10 spins: med ren
+exponentiell vinkling blir de vanliga spinsen (0 wilds) för osannolika,
+kvoterna multipliceras över rundan och vikterna degenererar. Med
+blandningen är p/q <= 1 / (1 - mix) per dragning.
+
+Simuleringen är slot_batch.simulate_fs_rounds (lockstep) med en vinklad
+wild_sampler; log L ackumuleras per runda.
+"""
+import numpy as np
+
+from slot_math import GAME_MODEL, as_game_model
+from slot_batch import make_rng, simulate_fs_rounds, sample_wild_masks, _model_cdf
+
+# ~15x lägre varians för cap-träffar än vanlig Monte Carlo (slot_bench)
+DEFAULT_WILD_TILT = 2.0
+DEFAULT_MULT_TILT = 0.3
+DEFAULT_MIX = 0.2
+DEFAULT_THRESHOLDS = (1000, 2500, 4000, 5000)
+
+
+def tilted_weights(values, weights, theta, mix=1.0):
+    """
+    (p, q): normerade originalvikter och vinklade vikter
+    q = (1 - mix) * p + mix * p_theta, p_theta ∝ p_i * exp(theta * v_i).
+    """
+    v = np.asarray(values, dtype=np.float64)
+    p = np.asarray(weights, dtype=np.float64)
+    p = p / p.sum()
+    p_theta = p * np.exp(theta * (v - v.max()))
+    return p, (1.0 - mix) * p + mix * p_theta / p_theta.sum()
+
+
+def simulate_fs_rounds_is(n_rounds, rng=None, paytable=None, wild_tilt=DEFAULT_WILD_TILT,
+                          mult_tilt=DEFAULT_MULT_TILT, mix=DEFAULT_MIX, num_free_spins=None,
+                          max_win_mult=None, bet=1.0):
+    """
+    n_rounds FS-rundor med vinklade wild-/multiplikatorvikter.
+
+    Returnerar (wins, weights): rundvinster (bet-enheter) och
+    likelihood-kvoterna p(runda) / q(runda). max_win_mult=None ger ingen
+    cap (som simulate_fs_rounds).
+    """
+    rng = make_rng(rng)
+    model = as_game_model(paytable or GAME_MODEL)
+    p_count, q_count = tilted_weights(model.wild_reel_counts, model.wild_reel_count_weights, wild_tilt, mix)
+    p_mult, q_mult = tilted_weights(model.fs_multipliers, model.fs_mult_weights, mult_tilt, mix)
+    log_ratio_count = np.log(p_count) - np.log(q_count)
+    log_ratio_mult = np.log(p_mult) - np.log(q_mult)
+    wild_cdf = _model_cdf(q_count)
+    mult_cdf = _model_cdf(q_mult)
+
+    log_w = np.zeros(n_rounds, dtype=np.float64)
+
+    def wild_sampler(active, rng):
+        wild, mult_total, count_idx, mult_idx = sample_wild_masks(
+            active.size, rng, model, wild_cdf, mult_cdf, draws=True)
+        # multiplikatorer på hjul utan wild påverkar inget och räknas inte
+        log_w[active] += log_ratio_count[count_idx] + np.where(wild, log_ratio_mult[mult_idx], 0.0).sum(axis=1)
+        return wild, mult_total
+
+    wins, _ = simulate_fs_rounds(n_rounds, rng, paytable, num_free_spins, max_win_mult, bet,
+                                 wild_sampler=wild_sampler)
+    return wins, np.exp(log_w)
+
+
+def _mean_se(values):
+    """
+    (medelvärde, standardfel) för w * f över rundorna.
+    """
+    n = values.size
+    return float(values.mean()), float(values.std(ddof=1) / np.sqrt(n)) if n > 1 else float("nan")
+
+
+def tail_estimates(n_rounds=200_000, thresholds=DEFAULT_THRESHOLDS, rng=None, paytable=None,
+                   wild_tilt=DEFAULT_WILD_TILT, mult_tilt=DEFAULT_MULT_TILT, mix=DEFAULT_MIX,
+                   z=1.96, batch_size=100_000, progress=None):
+    """
+    Väntevärdesriktiga svanssannolikheter P(rundvinst >= t) med
+    konfidensintervall (skattning ± z * standardfel), från vinklade rundor.
+    Rundorna simuleras batch_size åt gången; progress(rundor klara)
+    anropas efter varje batch om den ges.
+
+    Returnerar dict:
+    - rounds, wild_tilt, mult_tilt, mix
+    - ev, ev_ci:              IS-skattad EV per runda (kontroll mot fs_round_exact)
+    - cap_hit_prob:           P(rundan når capen)
+    - tails:                  {t: {"p", "ci", "hits", "speedup"}}; hits = antal
+                              rundor >= t i urvalet, speedup = variansen för
+                              vanlig Monte Carlo (p(1-p)) / IS-variansen, dvs.
+                              hur många gånger fler rundor utan IS som behövs
+    - ess:                    effektiv urvalsstorlek (sum w)^2 / sum w^2
+    """
+    rng = make_rng(rng)
+    model = as_game_model(paytable or GAME_MODEL)
+    cap = model.max_win_mult
+    parts = []
+    done = 0
+    while done < n_rounds:
+        k = min(batch_size, n_rounds - done)
+        parts.append(simulate_fs_rounds_is(k, rng, model, wild_tilt, mult_tilt, mix, max_win_mult=cap))
+        done += k
+        if progress is not None:
+            progress(done)
+    wins, w = (np.concatenate(x) for x in zip(*parts))
+    thresholds = sorted(set(thresholds) | {cap})
+
+    ev, ev_se = _mean_se(wins * w)
+    tails = {}
+    for t in thresholds:
+        hit = wins >= t
+        p, se = _mean_se(np.where(hit, w, 0.0))
+        plain_var = p * (1.0 - p)
+        tails[t] = {
+            "p": p,
+            "ci": z * se,
+            "hits": int(hit.sum()),
+            "speedup": plain_var / (se * se * n_rounds) if se > 0 else float("inf"),
+        }
+    return {
+        "rounds": n_rounds,
+        "wild_tilt": wild_tilt,
+        "mult_tilt": mult_tilt,
+        "mix": mix,
+        "ev": ev,
+        "ev_ci": z * ev_se,
+        "cap_hit_prob": tails[cap]["p"],
+        "tails": tails,
+        "ess": float(w.sum() ** 2 / (w * w).sum()),
+    }
@@ -1,6 +1,8 @@
 from math import sqrt, comb
 import random
 
+from slot_stats import RunningStats
+
 VISIBLE_ROWS = 4
 NUM_REELS = 5
 
@@ -70,26 +72,51 @@ paytable = {
 weights = [symbol_probs[s] for s in SYMBOLS]
 
 
-def spin_grid_same_probs():
+def spin_grid_same_probs(model=None, rng=random):
     """
     Spin:
-    - använder SYMBOLS + symbol_probs
+    - använder SYMBOLS + symbol_probs (via modellens alias-sampler)
     - ser till att antal scatters 'S' aldrig blir > 3
+    - rng: random-modulen eller en egen random.Random (egen ström)
     """
+    model = model or GAME_MODEL
+    sample_many = model.symbol_sampler.sample_many
+    rows = model.visible_rows
+    reels = model.num_reels
+    scatter = model.scatter
     while True:
-        grid = []
-        for _ in range(VISIBLE_ROWS):
-            row_syms = random.choices(SYMBOLS, weights=weights, k=NUM_REELS)
-            grid.append(row_syms)
+        cells = sample_many(rows * reels, rng)
+        grid = [cells[r * reels:(r + 1) * reels] for r in range(rows)]
 
         # räkna scatters
-        scatter_count = sum(sym == "S" for row in grid for sym in row)
+        scatter_count = cells.count(scatter)
 
         # kravet: MER än 3 ska vara omöjligt -> re-spinna om >3
-        if scatter_count <= 3:
+        if scatter_count <= model.max_scatters:
             return grid
 
 
+def spin_grid_exact(model=None, rng=random):
+    """
+    Samma fördelning som spin_grid_same_probs, men utan att slänga grids:
+    - antal scatters k dras från binomialen trunkerad till <= 3
+    - k scatters placeras på likformigt valda celler
+    - resten fylls från icke-scatter-symbolerna (renormaliserade)
+    Alltid exakt 1 + k + (20 - k) slumptal per spin.
+    """
+    model = model or GAME_MODEL
+    rows = model.visible_rows
+    reels = model.num_reels
+    cells = rows * reels
+
+    k = model.scatter_count_sampler.sample(rng)
+    flat = model.non_scatter_sampler.sample_many(cells, rng)
+    if k:
+        for pos in rng.sample(range(cells), k):
+            flat[pos] = model.scatter
+    return [flat[r * reels:(r + 1) * reels] for r in range(rows)]
+
+
 def print_grid(grid):
     for row in grid:
         print(" ".join(row))
@@ -113,14 +140,45 @@ def print_grid_with_wilds(grid, wild_reels):
     print()
 
 
+_compiled_models = {}
+COMPILED_MODELS_MAX = 8
+
+
+def as_game_model(paytable):
+    """
+    Tillåter att anropare skickar antingen en GameModel eller en rå paytable-dict.
+    Dicts jämförs på innehåll: standard-paytablen mappas till den
+    förkompilerade GAME_MODEL och andra paytables kompileras en gång och
+    cachas (de senaste COMPILED_MODELS_MAX). En dict som ändrats på plats
+    får alltså en ny modell med de nya beloppen. Heta loopar bör skicka
+    en GameModel direkt.
+    """
+    if hasattr(paytable, "paying_symbols"):
+        # GameModel (även när slot_math körs som __main__ och klassen finns två gånger)
+        return paytable
+    key = tuple(sorted(paytable.items()))
+    if key == GAME_MODEL.paytable_key:
+        return GAME_MODEL
+    model = _compiled_models.pop(key, None)
+    if model is None:
+        model = GameModel(paytable=paytable)
+        while len(_compiled_models) >= COMPILED_MODELS_MAX:
+            del _compiled_models[next(iter(_compiled_models))]
+    _compiled_models[key] = model      # senast använd sist
+    return model
+
+
 def evaluate_megaways_win(grid, paytable, wild_reels=None):
     """
     Beräknar line-vinst (i bet-multiplar).
+    paytable:
+        - GameModel eller paytable-dict med (symbol, antal) -> vinst
     wild_reels:
         - None eller tom => ingen wild reel (base game)
         - iterable med kolumner (0–4) som är wild reels
           (hela hjul = wild, räknas som 4 träffar av valfri symbol)
     """
+    model = as_game_model(paytable)
     num_rows = len(grid)
     num_reels = len(grid[0])
     total_win = 0.0
@@ -130,14 +188,14 @@ def evaluate_megaways_win(grid, paytable, wild_reels=None):
     else:
         wild_reels = set(wild_reels)
 
-    paying_symbols = set(sym for (sym, _) in paytable.keys())
-
-    for sym in paying_symbols:
+    # fast ordning (SYMBOLS) så att summeringen blir identisk med batch-versionen
+    for sym in model.paying_symbols:
+        pays = model.pays[sym]
         counts_per_reel = []
         for col in range(num_reels):
             if col in wild_reels:
                 # wild reel: kan alltid representera symbolen, 4 positioner
-                count = VISIBLE_ROWS
+                count = model.visible_rows
             else:
                 count = sum(1 for row in range(num_rows) if grid[row][col] == sym)
             counts_per_reel.append(count)
@@ -149,17 +207,209 @@ def evaluate_megaways_win(grid, paytable, wild_reels=None):
             else:
                 break
 
-        if consec_reels >= 3:
-            key = (sym, consec_reels)
-            if key in paytable:
-                ways = 1
-                for c in counts_per_reel[:consec_reels]:
-                    ways *= c
-                total_win += ways * paytable[key]
+        if consec_reels >= 3 and pays[consec_reels]:
+            ways = 1
+            for c in counts_per_reel[:consec_reels]:
+                ways *= c
+            total_win += ways * pays[consec_reels]
 
     return total_win
 
 
+def find_winning_positions(grid, paytable, wild_reels=None):
+    """
+    Alla (rad, kolumn) som ingår i någon vinnande kombination (för GUI:t).
+    """
+    if grid is None:
+        return set()
+
+    model = as_game_model(paytable)
+    wild_reels = set(wild_reels or [])
+    num_rows = len(grid)
+    num_reels = len(grid[0]) if num_rows > 0 else 0
+    win_positions = set()
+
+    for sym in model.paying_symbols:
+        pays = model.pays[sym]
+        counts_per_reel = []
+        for col in range(num_reels):
+            if col in wild_reels:
+                count = model.visible_rows
+            else:
+                count = sum(1 for row in range(num_rows) if grid[row][col] == sym)
+            counts_per_reel.append(count)
+
+        consec_reels = 0
+        for c in counts_per_reel:
+            if c > 0:
+                consec_reels += 1
+            else:
+                break
+
+        if consec_reels >= 3 and pays[consec_reels]:
+            for col in range(consec_reels):
+                if col in wild_reels:
+                    for row in range(num_rows):
+                        win_positions.add((row, col))
+                else:
+                    for row in range(num_rows):
+                        if grid[row][col] == sym:
+                            win_positions.add((row, col))
+
+    return win_positions
+
+
+_reel_layouts = {}
+
+
+def _reel_layout(rows, reels):
+    """
+    (reel_mask, shifts, popcount-tabell för ett hjul) för bitmasker med
+    bit (reel * rows + rad), dvs en nibble per hjul när rows = 4.
+    """
+    key = (rows, reels)
+    if key not in _reel_layouts:
+        _reel_layouts[key] = (
+            (1 << rows) - 1,
+            [c * rows for c in range(reels)],
+            [bin(i).count("1") for i in range(1 << rows)],
+        )
+    return _reel_layouts[key]
+
+
+def _symbol_run(m, reel_mask, shifts, pop):
+    """
+    (antal hjul i rad från vänster där masken har träffar, ways).
+    """
+    ways = 1
+    run = 0
+    for shift in shifts:
+        nib = (m >> shift) & reel_mask
+        if not nib:
+            break
+        ways *= pop[nib]
+        run += 1
+    return run, ways
+
+
+def mask_positions(mask, rows=VISIBLE_ROWS):
+    """
+    Bitmask -> {(rad, kolumn)} (samma format som find_winning_positions).
+    """
+    positions = set()
+    while mask:
+        low = mask & -mask
+        col, row = divmod(low.bit_length() - 1, rows)
+        positions.add((row, col))
+        mask ^= low
+    return positions
+
+
+class WinResult:
+    """
+    Resultat av evaluate_spin:
+    - total:             vinstmultipel (före FS-multiplikatorer), samma som
+                         evaluate_megaways_win
+    - ways, run_lengths: {symbol: ways} / {symbol: antal hjul} för vinnande symboler
+    - positions:         alla (rad, kolumn) i vinnande kombinationer
+    - scatter_positions: scatters som inte ligger under wild reels
+    - scatter_count:     antal sådana scatters (trigger/retrigger)
+    Positionerna hålls som bitmasker och blir set först när de läses.
+    """
+    __slots__ = ("total", "ways", "run_lengths", "win_mask", "scatter_mask", "rows")
+
+    def __init__(self, total, ways, run_lengths, win_mask, scatter_mask, rows):
+        self.total = total
+        self.ways = ways
+        self.run_lengths = run_lengths
+        self.win_mask = win_mask
+        self.scatter_mask = scatter_mask
+        self.rows = rows
+
+    @property
+    def positions(self):
+        return mask_positions(self.win_mask, self.rows)
+
+    @property
+    def scatter_positions(self):
+        return mask_positions(self.scatter_mask, self.rows)
+
+    @property
+    def scatter_count(self):
+        return bin(self.scatter_mask).count("1")
+
+
+def grid_masks(grid):
+    """
+    list-of-lists -> {symbol: bitmask} med bit (reel * rows + rad).
+    """
+    rows = len(grid)
+    masks = {}
+    get = masks.get
+    for r, row in enumerate(grid):
+        bit = 1 << r
+        for sym in row:
+            masks[sym] = get(sym, 0) | bit
+            bit <<= rows
+    return masks
+
+
+def wild_reels_mask(wild_reels, rows=VISIBLE_ROWS):
+    """
+    Mask med hela hjul (nibbles) satta för varje wild reel.
+    """
+    wild = 0
+    if wild_reels:
+        reel = (1 << rows) - 1
+        for c in wild_reels:
+            wild |= reel << (c * rows)
+    return wild
+
+
+def evaluate_masks(masks, wild, paytable, rows=VISIBLE_ROWS, reels=NUM_REELS):
+    """
+    Megaways-utvärdering från bitmasker ({symbol: mask} + wild-mask),
+    gemensam kärna för evaluate_spin och slot_bitboard. Wild reels OR:as
+    in som hela nibbles och ways/run-längd räknas per symbol från maskerna.
+    Summeringsordningen är densamma som i evaluate_megaways_win, så total
+    blir identisk. Returnerar en WinResult.
+    """
+    model = as_game_model(paytable)
+    reel_mask, shifts, pop = _reel_layout(rows, reels)
+    get = masks.get
+
+    total_win = 0.0
+    ways_by_sym = {}
+    runs = {}
+    win_mask = 0
+    s1, s2 = shifts[1], shifts[2]
+    for sym in model.paying_symbols:
+        m = get(sym, 0) | wild
+        # minst en träff på vart och ett av de tre första hjulen
+        if not (m & reel_mask and (m >> s1) & reel_mask and (m >> s2) & reel_mask):
+            continue
+        run, ways = _symbol_run(m, reel_mask, shifts, pop)
+        pay = model.pays[sym][run]
+        if pay:
+            total_win += ways * pay
+            ways_by_sym[sym] = ways
+            runs[sym] = run
+            win_mask |= m & ((1 << (run * rows)) - 1)
+
+    scatter_mask = get(model.scatter, 0) & ~wild
+    return WinResult(total_win, ways_by_sym, runs, win_mask, scatter_mask, rows)
+
+
+def evaluate_spin(grid, paytable, wild_reels=None):
+    """
+    Allt GUI:t och simuleringen behöver efter ett spin, i EN genomgång av
+    gridet: varje symbol blir en bitmask (en nibble per hjul) som
+    utvärderas av evaluate_masks.
+    """
+    rows = len(grid)
+    return evaluate_masks(grid_masks(grid), wild_reels_mask(wild_reels, rows), paytable, rows, len(grid[0]))
+
+
 def theoretical_rtp(symbol_probs, paytable, visible_rows=VISIBLE_ROWS):
     """
     OBS: bara base game (A–I), räknar inte värdet av free spins + wilds.
@@ -200,21 +450,295 @@ WILD_REEL_COUNT_WEIGHTS = [70.5, 25.89, 3, 0.5, 0.1, 0.01]  # procent-vikter
 FS_MULTIPLIERS = [1, 2, 5, 8]
 FS_MULT_WEIGHTS = [86, 12.9, 1, 0.1]
 
+# bonusregler
+N_FREE_SPINS = 10                   # 3 scatters i base game => 10 free spins
+RETRIGGER_SPINS = {2: 1, 3: 3}      # scatters (ej under wild) i bonus => extra spins
+MAX_WIN_MULT = 5000                 # cap per bonus i bet-multiplar
+MODEL_CAP = "model"                 # max_win_mult-värde: använd modellens cap (None = ingen cap)
+FS_BUY_MULT = 130                   # bonusköp: pris i bet-multiplar (main.py)
+
+
+class AliasSampler:
+    """
+    Walker/Vose alias-metod: tabellerna byggs EN gång från vikterna,
+    därefter kostar varje dragning O(1) (en random() + en jämförelse),
+    istället för att random.choices bygger kumulativa vikter + bisect varje gång.
+    """
 
-def sample_wild_reels():
+    def __init__(self, values, weights):
+        n = len(values)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # rester (avrundningsfel) får sannolikhet 1 i sin egen kolumn
+
+        self.values = list(values)
+        self.prob = prob
+        self.alias = alias
+        self.n = n
+
+    def sample(self, rng=random):
+        u = rng.random() * self.n
+        i = int(u)
+        if u - i < self.prob[i]:
+            return self.values[i]
+        return self.values[self.alias[i]]
+
+    def sample_many(self, k, rng=random):
+        values = self.values
+        prob = self.prob
+        alias = self.alias
+        n = self.n
+        rnd = rng.random
+        out = []
+        for _ in range(k):
+            u = rnd() * n
+            i = int(u)
+            out.append(values[i] if u - i < prob[i] else values[alias[i]])
+        return out
+
+
+class GameModel:
+    """
+    Kompilerad spelmodell som byggs EN gång från SYMBOLS, symbol_probs,
+    paytable och FS-vikterna, så att ingen behöver härleda detta per spin:
+    - symbol_index:     symbol -> index i symbols
+    - paying_symbols:   betalande symboler i SYMBOLS-ordning
+    - pays[sym]:        tät lista, pays[sym][antal_reels] (0 = ingen vinst)
+    - pay_rows[i]:      samma som pays men per symbolindex
+    - symbol_sampler, wild_count_sampler, mult_sampler: alias-samplers
+    """
+
+    def __init__(self,
+                 symbols=SYMBOLS,
+                 symbol_probs=symbol_probs,
+                 paytable=paytable,
+                 wild_reel_counts=WILD_REEL_COUNTS,
+                 wild_reel_count_weights=WILD_REEL_COUNT_WEIGHTS,
+                 fs_multipliers=FS_MULTIPLIERS,
+                 fs_mult_weights=FS_MULT_WEIGHTS,
+                 visible_rows=VISIBLE_ROWS,
+                 num_reels=NUM_REELS,
+                 scatter="S",
+                 max_scatters=3,
+                 fs_spins=N_FREE_SPINS,
+                 retrigger_spins=RETRIGGER_SPINS,
+                 max_win_mult=MAX_WIN_MULT):
+        self.symbols = list(symbols)
+        self.symbol_probs = dict(symbol_probs)
+        self.paytable = dict(paytable)
+        self.paytable_key = tuple(sorted(self.paytable.items()))
+        self.visible_rows = visible_rows
+        self.num_reels = num_reels
+        self.scatter = scatter
+        self.max_scatters = max_scatters
+        self.fs_spins = fs_spins
+        self.retrigger_spins = dict(retrigger_spins)
+        self.max_win_mult = max_win_mult
+
+        self.symbol_index = {s: i for i, s in enumerate(self.symbols)}
+        self.probs = [self.symbol_probs[s] for s in self.symbols]
+        self.symbol_sampler = AliasSampler(self.symbols, self.probs)
+
+        # exakt (rejection-fri) grid: antal scatters ~ trunkerad binomial,
+        # övriga celler från den renormaliserade icke-scatter-fördelningen
+        cells = visible_rows * num_reels
+        pS = self.symbol_probs.get(scatter, 0.0)
+        self.scatter_count_weights = [
+            comb(cells, k) * pS**k * (1 - pS)**(cells - k) for k in range(max_scatters + 1)
+        ]
+        self.scatter_count_sampler = AliasSampler(
+            list(range(max_scatters + 1)), self.scatter_count_weights
+        )
+        non_scatter = [s for s in self.symbols if s != scatter]
+        self.non_scatter_sampler = AliasSampler(
+            non_scatter, [self.symbol_probs[s] for s in non_scatter]
+        )
+
+        paying_set = set(sym for (sym, _) in self.paytable.keys())
+        self.paying_symbols = [s for s in self.symbols if s in paying_set]
+
+        self.pays = {s: [0.0] * (num_reels + 1) for s in self.symbols}
+        for (sym, n), value in self.paytable.items():
+            self.pays[sym][n] = value
+        self.pay_rows = [self.pays[s] for s in self.symbols]
+
+        self.wild_reel_counts = list(wild_reel_counts)
+        self.wild_reel_count_weights = list(wild_reel_count_weights)
+        self.wild_count_sampler = AliasSampler(self.wild_reel_counts, self.wild_reel_count_weights)
+
+        self.fs_multipliers = list(fs_multipliers)
+        self.fs_mult_weights = list(fs_mult_weights)
+        self.mult_sampler = AliasSampler(self.fs_multipliers, self.fs_mult_weights)
+
+    def __getstate__(self):
+        # lat byggda tabeller (_column_engine, _np_fs_tables, ~1 MB) följer
+        # inte med till andra processer; de byggs om där vid behov
+        return {k: v for k, v in vars(self).items() if not k.startswith("_")}
+
+
+GAME_MODEL = GameModel()
+
+
+class ColumnEngine:
+    """
+    Alternativ motor där ett hjul (en kolumn med visible_rows celler) är en
+    enda tabellrad. Med 10 symboler och 4 rader finns 10^4 mönster; för
+    varje mönster förberäknas antal per symbol, en bitmask över vilka
+    symboler som finns, antal scatters och sannolikheten.
+
+    - spin(rng):        num_reels kolumnindex (alias-dragning, 5 istället för
+                        20 slumptal), omdragning vid > max_scatters som i
+                        spin_grid_same_probs => samma fördelning
+    - evaluate(cols):   samma resultat som evaluate_megaways_win; symboler som
+                        inte finns på de tre första hjulen sållas bort med en AND
+    Kolumnindex: sum(symbolindex på rad r * len(symbols)**r).
+    """
+
+    def __init__(self, model=None):
+        model = model or GAME_MODEL
+        self.model = model
+        n_sym = len(model.symbols)
+        rows = model.visible_rows
+        scatter_i = model.symbol_index[model.scatter]
+
+        self.patterns = []      # kolumnindex -> tuple med symbolindex per rad
+        self.counts = []        # kolumnindex -> tuple med antal per symbolindex
+        self.present = []       # kolumnindex -> bitmask över symbolindex
+        self.scatters = []      # kolumnindex -> antal scatters
+        self.probs = []         # kolumnindex -> sannolikhet (utan scatter-trunkering)
+        for idx in range(n_sym ** rows):
+            pattern = []
+            rest = idx
+            for _ in range(rows):
+                rest, sym_i = divmod(rest, n_sym)
+                pattern.append(sym_i)
+            counts = [0] * n_sym
+            p = 1.0
+            for sym_i in pattern:
+                counts[sym_i] += 1
+                p *= model.probs[sym_i]
+            self.patterns.append(tuple(pattern))
+            self.counts.append(tuple(counts))
+            self.present.append(sum(1 << i for i, c in enumerate(counts) if c))
+            self.scatters.append(counts[scatter_i])
+            self.probs.append(p)
+
+        self.column_sampler = AliasSampler(list(range(n_sym ** rows)), self.probs)
+        self.paying = [(model.symbol_index[sym], model.pays[sym]) for sym in model.paying_symbols]
+        self.all_symbols = (1 << n_sym) - 1
+
+    def spin(self, rng=random):
+        sample_many = self.column_sampler.sample_many
+        scatters = self.scatters
+        reels = self.model.num_reels
+        max_scatters = self.model.max_scatters
+        while True:
+            cols = sample_many(reels, rng)
+            if sum(scatters[c] for c in cols) <= max_scatters:
+                return cols
+
+    def evaluate(self, cols, wild_reels=None):
+        counts = self.counts
+        rows = self.model.visible_rows
+        if wild_reels:
+            wild = set(wild_reels)
+            reel_counts = [None if i in wild else counts[c] for i, c in enumerate(cols)]
+            present = [self.all_symbols if i in wild else self.present[c] for i, c in enumerate(cols)]
+        else:
+            reel_counts = [counts[c] for c in cols]
+            present = [self.present[c] for c in cols]
+
+        candidates = present[0] & present[1] & present[2]
+        if not candidates:
+            return 0.0
+
+        total_win = 0.0
+        for sym_i, pays in self.paying:
+            if not (candidates >> sym_i) & 1:
+                continue
+            ways = 1
+            run = 0
+            for rc in reel_counts:
+                c = rows if rc is None else rc[sym_i]
+                if not c:
+                    break
+                ways *= c
+                run += 1
+            if pays[run]:
+                total_win += ways * pays[run]
+        return total_win
+
+    def scatter_count(self, cols, wild_reels=None):
+        wild = set(wild_reels or ())
+        return sum(self.scatters[c] for i, c in enumerate(cols) if i not in wild)
+
+    def to_grid(self, cols):
+        symbols = self.model.symbols
+        return [[symbols[self.patterns[c][r]] for c in cols] for r in range(self.model.visible_rows)]
+
+    def from_grid(self, grid):
+        n_sym = len(self.model.symbols)
+        index = self.model.symbol_index
+        cols = []
+        for c in range(self.model.num_reels):
+            idx = 0
+            for r in reversed(range(self.model.visible_rows)):
+                idx = idx * n_sym + index[grid[r][c]]
+            cols.append(idx)
+        return cols
+
+
+def get_column_engine(model=None):
+    """
+    ColumnEngine för modellen, byggs en gång (~10^4 mönster) och sparas på modellen.
+    """
+    model = model or GAME_MODEL
+    engine = getattr(model, "_column_engine", None)
+    if engine is None:
+        engine = model._column_engine = ColumnEngine(model)
+    return engine
+
+
+def sample_wild_reels(model=None, rng=random):
     """
     Slumpa antal wild reels enligt given distribution
     och välj så många distinkta hjul bland de 5.
     """
-    k = random.choices(WILD_REEL_COUNTS, weights=WILD_REEL_COUNT_WEIGHTS, k=1)[0]
+    model = model or GAME_MODEL
+    k = model.wild_count_sampler.sample(rng)
     if k <= 0:
         return []
-    k = min(k, NUM_REELS)
+    k = min(k, model.num_reels)
     # välj k distinkta reelser
-    return random.sample(range(NUM_REELS), k)
+    return rng.sample(range(model.num_reels), k)
 
 
-def run_free_spins(num_free_spins, bet, verbose=True, max_win_mult=None):
+def sample_wild_mults(wild_reels, model=None, rng=random):
+    """
+    Slumpa multiplikator FÖR VARJE wild reel -> {reel: mult}.
+    """
+    model = model or GAME_MODEL
+    sample = model.mult_sampler.sample
+    return {r: sample(rng) for r in wild_reels}
+
+
+def run_free_spins(num_free_spins, bet, verbose=True, max_win_mult=None, model=None, rng=random,
+                   summary=None):
     """
     Kör en free-spins-runda:
     - startar med num_free_spins
@@ -228,7 +752,12 @@ def run_free_spins(num_free_spins, bet, verbose=True, max_win_mult=None):
         * beräkna line win med wild reels och multiplikator
     - om max_win_mult sätts (t.ex. 5000), capsas vinstmultipeln där
       och bonusen avslutas direkt.
+    - summary: valfri dict som fylls med "spins" (spelade spins),
+      "wild_reels" (summa wild reels) och "mult_sum" (summa wild-multipliers)
     """
+    model = model or GAME_MODEL
+    wild_reel_total = 0
+    mult_sum = 0
     total_win_mult = 0.0     # vinst i bet-multiplar
     spins_played = 0
     total_spins = num_free_spins
@@ -237,41 +766,31 @@ def run_free_spins(num_free_spins, bet, verbose=True, max_win_mult=None):
         spins_played += 1
 
         # välj wild reels
-        wild_reels = sample_wild_reels()
+        wild_reels = sample_wild_reels(model, rng)
 
         # välj multiplikator FÖR VARJE wild reel
-        wild_mults = {}
-        for r in wild_reels:
-            m = random.choices(FS_MULTIPLIERS, weights=FS_MULT_WEIGHTS, k=1)[0]
-            wild_mults[r] = m
+        wild_mults = sample_wild_mults(wild_reels, model, rng)
 
         if wild_mults:
             mult_total = sum(wild_mults.values())
+            wild_reel_total += len(wild_mults)
+            mult_sum += mult_total
         else:
             mult_total = 1  # inga wild reels => ingen extra multiplikator
 
         # i bonusen får S förekomma igen (för retriggers)
-        grid = spin_grid_same_probs()
+        grid = spin_grid_same_probs(model, rng)
 
-        base_mult = evaluate_megaways_win(grid, paytable, wild_reels=wild_reels)
+        result = evaluate_spin(grid, model, wild_reels=wild_reels)
+        base_mult = result.total
         spin_mult = base_mult * mult_total
         total_win_mult += spin_mult
 
-        # räkna scatters i free spin → extra spins
-        # men IGNORERA scatters under wild-reels
-        scatter_count_nonwild = 0
-        for r in range(len(grid)):
-            for c in range(len(grid[0])):
-                if c in wild_reels:
-                    continue
-                if grid[r][c] == "S":
-                    scatter_count_nonwild += 1
-
-        extra_spins = 0
-        if scatter_count_nonwild == 2:
-            extra_spins = 1
-        elif scatter_count_nonwild == 3:
-            extra_spins = 3
+        # scatters i free spin → extra spins
+        # (scatters under wild-reels räknas inte, se WinResult.scatter_count)
+        scatter_count_nonwild = result.scatter_count
+
+        extra_spins = model.retrigger_spins.get(scatter_count_nonwild, 0)
 
         if extra_spins > 0:
             total_spins += extra_spins
@@ -298,6 +817,11 @@ def run_free_spins(num_free_spins, bet, verbose=True, max_win_mult=None):
                 print(f"\n*** MAX WIN REACHED: {max_win_mult}x! Bonus avslutas. ***")
             break
 
+    if summary is not None:
+        summary["spins"] = spins_played
+        summary["wild_reels"] = wild_reel_total
+        summary["mult_sum"] = mult_sum
+
     total_win_amount = total_win_mult * bet
 
     if verbose:
@@ -306,43 +830,127 @@ def run_free_spins(num_free_spins, bet, verbose=True, max_win_mult=None):
     return total_win_amount
 
 
-def estimate_fs_round_ev(num_free_spins=10, n_rounds=200_000, bet=1.0, max_win_mult=None):
+def estimate_fs_round_ev(num_free_spins=10, n_rounds=200_000, bet=1.0, max_win_mult=None, model=None,
+                         rng=random, batch=False):
+    """
+    Simulerad EV per FS-runda. batch=True kör alla rundor i lockstep med
+    NumPy (slot_batch.simulate_fs_rounds, seedas från rng).
+    """
+    if batch:
+        from slot_batch import estimate_fs_round_ev_batch
+        return estimate_fs_round_ev_batch(num_free_spins, n_rounds, bet, max_win_mult,
+                                          model, rng.getrandbits(64))
     total = 0.0
     for _ in range(n_rounds):
         total += run_free_spins(num_free_spins=num_free_spins,
                                 bet=bet,
                                 verbose=False,
-                                max_win_mult=max_win_mult)
+                                max_win_mult=max_win_mult,
+                                model=model,
+                                rng=rng)
     return total / n_rounds
 
 
-def simulate_rtp(paytable, n_spins=1_000_000, bet=1.0):
+SPIN_RECORD_FIELDS = ("base_win", "scatters", "fs_triggered", "fs_win",
+                      "fs_spins", "fs_wild_reels", "fs_mult_sum")
+
+
+def simulate_spins(paytable, n_spins, bet=1.0, rng=random, records=None):
     """
-    Simulerar RTP inkl. free spins:
-    - base game + triggers (3 scatters) + free spins med (0–5) wild reels
+    Kör n_spins fulla spel (base + ev. free spins) och returnerar
+    delsummorna som simulate_rtp och den parallella drivern bygger på:
+    {"spins", "total_win", "hits", "triggers", "stats"} där stats är en
+    RunningStats över totalvinsten per spin (O(1) minne).
+    Delsummor från flera körningar slås ihop med merge_spin_totals.
+
+    records: valfri dict {fält: lista} (fält i SPIN_RECORD_FIELDS) som
+    får en rad per spin – för export. Slumptalen förbrukas likadant med
+    eller utan records.
     """
+    model = as_game_model(paytable)
+    stats = RunningStats()
+    add = stats.add
     total_win = 0.0
     hit_count = 0
     fs_triggers = 0
 
     for _ in range(n_spins):
-        grid = spin_grid_same_probs()
-        base_mult = evaluate_megaways_win(grid, paytable)
+        grid = spin_grid_same_probs(model, rng)
+        result = evaluate_spin(grid, model)
+        base_mult = result.total
         win = base_mult * bet
-        total_win += win
         if win > 0:
             hit_count += 1
 
-        # räkna scatters
-        scatter_count = sum(sym == "S" for row in grid for sym in row)
+        scatter_count = result.scatter_count
+        fs_win = 0.0
+        fs_summary = {"spins": 0, "wild_reels": 0, "mult_sum": 0}
         if scatter_count == 3:
             fs_triggers += 1
-            fs_win = run_free_spins(num_free_spins=10, bet=bet, verbose=False, max_win_mult=5000)
-            total_win += fs_win
+            fs_win = run_free_spins(num_free_spins=model.fs_spins, bet=bet, verbose=False,
+                                    max_win_mult=model.max_win_mult, model=model, rng=rng,
+                                    summary=fs_summary)
+            win += fs_win
+        total_win += win
+        add(win)
+
+        if records is not None:
+            records["base_win"].append(base_mult * bet)
+            records["scatters"].append(scatter_count)
+            records["fs_triggered"].append(scatter_count == 3)
+            records["fs_win"].append(fs_win)
+            records["fs_spins"].append(fs_summary["spins"])
+            records["fs_wild_reels"].append(fs_summary["wild_reels"])
+            records["fs_mult_sum"].append(fs_summary["mult_sum"])
+
+    return {
+        "spins": n_spins,
+        "total_win": total_win,
+        "hits": hit_count,
+        "triggers": fs_triggers,
+        "stats": stats,
+    }
 
-    avg_win = total_win / (n_spins * bet)  # RTP per satsad 1
-    hit_freq = hit_count / n_spins
-    trig_freq = fs_triggers / n_spins
+
+def empty_spin_totals():
+    return {"spins": 0, "total_win": 0.0, "hits": 0, "triggers": 0, "stats": RunningStats()}
+
+
+def add_spin_totals(out, part):
+    """
+    Lägger delsummorna part (från simulate_spins) till out, på plats.
+    """
+    for key in ("spins", "total_win", "hits", "triggers"):
+        out[key] += part[key]
+    out["stats"].merge(part["stats"])
+    return out
+
+
+def merge_spin_totals(parts):
+    """
+    Slår ihop delsummor från simulate_spins i given ordning
+    (samma ordning => exakt samma float-resultat).
+    """
+    out = empty_spin_totals()
+    for part in parts:
+        add_spin_totals(out, part)
+    return out
+
+
+def simulate_rtp(paytable, n_spins=1_000_000, bet=1.0, rng=random, batch=False):
+    """
+    Simulerar RTP inkl. free spins:
+    - base game + triggers (3 scatters) + free spins med (0–5) wild reels
+    - batch=True: samma fördelning via NumPy (slot_batch.simulate_rtp_batch,
+      seedas från rng), begränsad av NumPy istället för interpretatorn
+    """
+    if batch:
+        from slot_batch import simulate_rtp_batch
+        return simulate_rtp_batch(n_spins, bet, rng.getrandbits(64), as_game_model(paytable))
+    totals = simulate_spins(paytable, n_spins, bet, rng)
+    avg_win = totals["total_win"] / (n_spins * bet)  # RTP per satsad 1
+    hit_freq = totals["hits"] / n_spins
+    trig_freq = totals["triggers"] / n_spins
     return avg_win, hit_freq, trig_freq
 
 
@@ -411,8 +1019,9 @@ def play_game():
         print("\nGrid:")
         print_grid(grid)
 
-        # base game-vinst (line wins)
-        win_mult = evaluate_megaways_win(grid, paytable)
+        # base game-vinst (line wins) + scatters i samma genomgång
+        result = evaluate_spin(grid, paytable)
+        win_mult = result.total
         win_amount = win_mult * bet
         balance += win_amount
         total_win += win_amount
@@ -422,8 +1031,7 @@ def play_game():
         print(f"Nytt saldo:         {balance:.2f}")
 
         # kolla scatters för free spins
-        scatter_count = sum(sym == "S" for row in grid for sym in row)
-        if scatter_count == 3:
+        if result.scatter_count == 3:
             print("\n*** FREE SPINS TRIGGADE! 10 FREE SPINS! ***")
             fs_win = run_free_spins(num_free_spins=10, bet=bet, verbose=True, max_win_mult=5000)
             balance += fs_win
@@ -449,22 +1057,22 @@ def theoretical_total_rtp_with_fs(symbol_probs, paytable, visible_rows=VISIBLE_R
     """
     Teoretisk total-RTP:
     - base game (exakt analytiskt)
-    - free spins (EV uppskattad via simulering av free-spins-rundor)
+    - free spins (EV analytiskt via slot_exact.fs_round_exact, inkl. retriggers;
+      capen på ett gitter med fel ~5e-5 bet-multiplar)
     """
     # 1) Base-RTP analytiskt
     rtp_base = theoretical_rtp(symbol_probs, paytable, visible_rows=visible_rows)
 
-    # 2) Trigger-sannolikhet q = P(exakt 3 S) (Binomial(20,pS)) – approx pga truncation
+    # 2) Trigger-sannolikhet q = P(exakt 3 S | högst 3 S) (Binomial(20,pS) trunkerad vid 3)
     pS_local = symbol_probs.get("S", 0.0)
     cells = visible_rows * NUM_REELS  # 4 * 5 = 20
-    q_trig = comb(cells, 3) * (pS_local**3) * ((1 - pS_local)**(cells - 3))
+    binom = [comb(cells, k) * (pS_local**k) * ((1 - pS_local)**(cells - k)) for k in range(4)]
+    q_trig = binom[3] / sum(binom)
 
-    # 3) EV per free-spins-runda (10 FS) via riktad simulering
-    N_FS = 10
-    EV_fs_round = estimate_fs_round_ev(num_free_spins=N_FS,
-                                       n_rounds=20_000,
-                                       bet=1.0,
-                                       max_win_mult=5000)
+    # 3) EV per free-spins-runda (10 FS), analytiskt istället för simulering
+    from slot_exact import fs_round_exact
+    model = GameModel(symbol_probs=symbol_probs, paytable=paytable, visible_rows=visible_rows)
+    EV_fs_round = fs_round_exact(model, num_free_spins=N_FREE_SPINS, max_win_mult=MAX_WIN_MULT)["ev"]
 
     # 4) RTP-bidrag från free spins per base spin
     rtp_fs = q_trig * EV_fs_round  # bet=1 => denna är i RTP-enheter
@@ -473,6 +1081,19 @@ def theoretical_total_rtp_with_fs(symbol_probs, paytable, visible_rows=VISIBLE_R
     return rtp_total, rtp_base, rtp_fs, q_trig, EV_fs_round
 
 
+def theoretical_buy_rtp(price=FS_BUY_MULT, model=None):
+    """
+    Bonusköp: priset (i bet-multiplar) ger direkt en FS-runda. Köpspinnets
+    basvinst nollas (forced_scatter_spin i main.py), så RTP = EV(FS-runda) / pris.
+    EV:n är analytisk via slot_exact.fs_round_exact (inkl. retriggers och cap,
+    diskretiseringsfel ~5e-5 bet-multiplar).
+    Returnerar (buy_rtp, EV_fs_round).
+    """
+    from slot_exact import fs_round_exact
+    ev = fs_round_exact(as_game_model(model or GAME_MODEL))["ev"]
+    return ev / price, ev
+
+
 def theoretical_variance(symbol_probs, paytable, visible_rows=VISIBLE_ROWS):
     """
     OBS: bara base game (utan scatters / free spins).
@@ -508,27 +1129,13 @@ def theoretical_variance(symbol_probs, paytable, visible_rows=VISIBLE_ROWS):
     return variance, sigma
 
 
-def simulate_variance(paytable, n_spins=200_000, bet=1.0):
+def simulate_variance(paytable, n_spins=200_000, bet=1.0, rng=random):
     """
     Simulerar varians för totalvinst per base spin inkl free spins.
+    Strömmande (Welford), så minnet är konstant oavsett n_spins.
     """
-    wins = []
-    for _ in range(n_spins):
-        grid = spin_grid_same_probs()
-        base_mult = evaluate_megaways_win(grid, paytable)
-        win = base_mult * bet
-
-        scatter_count = sum(sym == "S" for row in grid for sym in row)
-        if scatter_count == 3:
-            win += run_free_spins(num_free_spins=10, bet=bet, verbose=False, max_win_mult=5000)
-
-        wins.append(win)
-
-    EX = sum(wins) / len(wins)
-    EX2 = sum(w*w for w in wins) / len(wins)
-    variance = EX2 - EX**2
-    sigma = sqrt(variance)
-    return variance, sigma
+    stats = simulate_spins(paytable, n_spins, bet, rng)["stats"]
+    return stats.variance, stats.std
 
 
 if __name__ == "__main__":
@@ -537,20 +1144,54 @@ if __name__ == "__main__":
         rtp_base = theoretical_rtp(symbol_probs, paytable)
         print(f"Teoretisk RTP (endast base game): {rtp_base:.6f}")
 
+        from slot_exact import exact_base_stats, base_game_report
+        exact = exact_base_stats()
+        print(f"Exakt base-RTP (inkl scatter-trunkering): {exact['rtp']:.6f}")
+        print(f"Exakt hit-frekvens (base):                {exact['hit_freq']:.6f}")
+        print(f"Exakt FS-trigger-sannolikhet:             {exact['trigger_prob']:.6f}")
+        report = base_game_report()
+        print(f"Exakt varians (base):                     {report['variance']:.6f}")
+        print(f"Volatilitetsindex (base, 95 %):           {report['volatility_index']:.6f}")
+
         rtp_total, rtp_base2, rtp_fs, q_trig, EV_fs_round = theoretical_total_rtp_with_fs(symbol_probs, paytable)
-        print(f"Teoretisk total-RTP (inkl free spins, FS EV simulerad): {rtp_total:.6f}")
+        print(f"Teoretisk total-RTP (inkl free spins, FS EV analytisk): {rtp_total:.6f}")
         print(f"  - Trigger-sannolikhet q:         {q_trig:.6f}")
         print(f"  - EV per FS-runda (10 FS):       {EV_fs_round:.6f}")
         print(f"  - RTP-bidrag från free spins:    {rtp_fs:.6f}")
-
-        avg_win, hit_freq, trig_freq = simulate_rtp(paytable, n_spins=100_000, bet=1.0)
-        print(f"\nSimulerad total-RTP (fullt spel):  {avg_win:.6f}")
-        print(f"Simulerad hit-frekvens (base):     {hit_freq:.6f}")
-        print(f"Simulerad FS-trigger-frekvens:     {trig_freq:.6f}")
-
-        var_sim, sigma_sim = simulate_variance(paytable, n_spins=100_000, bet=1.0)
-        print(f"\nSimulerad Varians (inkl FS):       {var_sim:.6f}")
-        print(f"Simulerad Sigma (inkl FS):         {sigma_sim:.6f}")
+        buy_rtp, _ = theoretical_buy_rtp()
+        print(f"Bonusköp ({FS_BUY_MULT}x bet):               RTP {buy_rtp:.6f}")
+
+        # simulera tills RTP:ns 95 %-intervall är smalare än ±epsilon
+        from slot_parallel import simulate_until, UNTIL_EPSILON, UNTIL_MAX_SPINS
+        answer = input("Precision för simulerad RTP, ± i RTP-enheter "
+                       f"(0.005 = ±0.5 procentenheter; Enter = {UNTIL_EPSILON}): ").strip()
+        epsilon = float(answer) if answer else UNTIL_EPSILON
+        if epsilon <= 0:
+            raise SystemExit("Precisionen måste vara > 0.")
+        # kort pilot (samma seed, alltså början av den riktiga körningen) skattar
+        # hur många spins precisionen kräver innan den långa körningen startar
+        sim = simulate_until(paytable, epsilon=epsilon, max_spins=200_000)
+        if not sim["converged"]:
+            needed = sim["spins_needed"]
+            minutes = needed / sim["spins_per_s"] / 60
+            over = f", men taket är {UNTIL_MAX_SPINS:,}" if needed > UNTIL_MAX_SPINS else ""
+            print(f"±{epsilon} kräver ~{needed:,} spins (~{minutes:,.1f} min i den här takten{over}).")
+            if input("Starta simuleringen? [J/n]: ").strip().lower() not in ("n", "nej"):
+                sim = simulate_until(paytable, epsilon=epsilon)
+        stats = sim["stats"]
+        print(f"\nSimulerad total-RTP (fullt spel):  {sim['rtp']:.6f} ± {sim['half_width']:.6f}")
+        if not sim["converged"]:
+            print(f"  Precisionen ±{epsilon} nåddes inte inom {sim['spins']:,} spins "
+                  f"(~{sim['spins_needed']:,} spins skulle behövas).")
+        print(f"Simulerad hit-frekvens (base):     {sim['hit_freq']:.6f}")
+        print(f"Simulerad FS-trigger-frekvens:     {sim['trig_freq']:.6f}")
+        print(f"Spins: {sim['spins']:,} | tid: {sim['wall_time']:.1f} s | {sim['spins_per_s']:,.0f} spins/s")
+
+        print(f"\nSimulerad Varians (inkl FS):       {stats.variance:.6f}")
+        print(f"Simulerad Sigma (inkl FS):         {stats.std:.6f}")
+        print(f"Simulerad skevhet / kurtosis:      {stats.skewness:.3f} / {stats.kurtosis:.3f}")
+        print(f"Percentiler (P99 / P99.9):         {stats.percentile(0.99):.2f}x / {stats.percentile(0.999):.2f}x")
+        print(f"Största vinst:                     {stats.max:.2f}x")
 
     else:
         play_game()
@@ -0,0 +1,266 @@
+"""
+Parallell drivrutin för simulate_rtp / simulate_variance (process-pool).
+
+Spinsen delas upp i chunks med fast storlek. Varje chunk får en egen
+random.Random-ström som härleds från master-seedet och chunk-numret, och
+delsummorna slås ihop i chunk-ordning. Resultatet beror därför bara på
+(seed, n_spins, chunk_spins) – inte på antalet workers.
+"""
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, sqrt
+
+from slot_math import (
+    GAME_MODEL,
+    as_game_model,
+    simulate_spins,
+    run_free_spins,
+    empty_spin_totals,
+    add_spin_totals,
+)
+from slot_stats import RunningStats
+
+CHUNK_SPINS = 20_000
+UNTIL_MAX_SPINS = 300_000_000     # standardtak för simulate_until
+UNTIL_EPSILON = 0.005             # ±0.5 %-enheter: ~1.2-1.8e8 spins (sigma ~28-34); 0.0005 kräver ~2e10
+
+
+def chunk_rng(seed, chunk):
+    """
+    Oberoende ström per chunk (str-seeds hashas med SHA-512 av random).
+    """
+    return random.Random(f"{seed}/{chunk}")
+
+
+def _run_chunk(args):
+    model, n_spins, bet, seed, chunk = args
+    return simulate_spins(model, n_spins, bet, chunk_rng(seed, chunk))
+
+
+def _run_fs_chunk(args):
+    model, n_rounds, bet, seed, chunk = args
+    rng = chunk_rng(f"fs/{seed}", chunk)
+    stats = RunningStats()
+    for _ in range(n_rounds):
+        stats.add(run_free_spins(model.fs_spins, bet, verbose=False,
+                                 max_win_mult=model.max_win_mult, model=model, rng=rng))
+    return stats
+
+
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _in_worker(task, job):
+    return task((_worker_model,) + job)
+
+
+def iter_chunks(paytable=None, n_spins=None, bet=1.0, seed=0, workers=None,
+                chunk_spins=CHUNK_SPINS, start_chunk=0, task=_run_chunk):
+    """
+    Ger delsummor (simulate_spins-dicts) chunk för chunk, i ordning.
+
+    n_spins=None ger en oändlig ström (avbryts av den som itererar).
+    start_chunk hoppar över redan körda chunks. Högst 2 * workers chunks
+    ligger ute åt gången. task((model, n, bet, seed, chunk)) är funktionen
+    som kör en chunk (standard: fulla spel via simulate_spins).
+
+    Modellen skickas en gång per worker (pool-initializer); jobben är
+    bara (n, bet, seed, chunk).
+    """
+    model = as_game_model(paytable or GAME_MODEL)
+    workers = workers or os.cpu_count() or 1
+
+    def jobs():
+        chunk = start_chunk
+        done = start_chunk * chunk_spins
+        while n_spins is None or done < n_spins:
+            n = chunk_spins if n_spins is None else min(chunk_spins, n_spins - done)
+            yield (n, bet, seed, chunk)
+            chunk += 1
+            done += n
+
+    if workers == 1:
+        for job in jobs():
+            yield task((model,) + job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as pool:
+        pending = deque()
+        try:
+            for job in jobs():
+                pending.append(pool.submit(_in_worker, task, job))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # avbruten iteration (t.ex. precisionsmålet nått): släng köade chunks
+            for future in pending:
+                future.cancel()
+
+
+def save_checkpoint(path, state):
+    """
+    Atomisk skrivning: skriv till en tmp-fil i samma katalog och byt namn
+    med os.replace, så filen är alltid antingen den gamla eller den nya.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _checkpoint_settings(model, n_spins, bet, seed, chunk_spins):
+    from slot_exact import model_hash
+    return {"model": model_hash(model), "n_spins": n_spins, "bet": bet,
+            "seed": str(seed), "chunk_spins": chunk_spins}
+
+
+def parallel_simulate(paytable=None, n_spins=1_000_000, bet=1.0, seed=0, workers=None,
+                      chunk_spins=CHUNK_SPINS, checkpoint=None, checkpoint_every=5.0,
+                      resume=False, progress=None):
+    """
+    Sammanslagna delsummor för n_spins spel (se simulate_spins).
+
+    checkpoint: sökväg till en JSON-fil som skrivs (atomiskt) högst var
+    checkpoint_every:e sekund och när körningen är klar. Den innehåller
+    inställningarna, nästa chunk-nummer och ackumulatorerna. Eftersom varje
+    chunk har en egen ström räcker chunk-numret som RNG-tillstånd.
+    resume=True fortsätter från checkpoint-filen om den finns; slutresultatet
+    blir exakt detsamma som för en oavbruten körning med samma seed.
+    progress(totals) anropas efter varje chunk om den ges.
+    """
+    model = as_game_model(paytable or GAME_MODEL)
+    totals = empty_spin_totals()
+    start_chunk = 0
+    settings = None
+
+    if checkpoint is not None:
+        settings = _checkpoint_settings(model, n_spins, bet, seed, chunk_spins)
+        if resume and os.path.exists(checkpoint):
+            state = load_checkpoint(checkpoint)
+            if state["settings"] != settings:
+                raise ValueError(f"checkpoint {checkpoint} hör till en annan körning: {state['settings']}")
+            start_chunk = state["next_chunk"]
+            totals.update(state["totals"])
+            totals["stats"] = RunningStats.from_dict(state["stats"])
+
+    def save(next_chunk):
+        save_checkpoint(checkpoint, {
+            "settings": settings,
+            "next_chunk": next_chunk,
+            "totals": {k: v for k, v in totals.items() if k != "stats"},
+            "stats": totals["stats"].to_dict(),
+        })
+
+    chunk = start_chunk
+    last_save = time.monotonic()
+    for part in iter_chunks(model, n_spins, bet, seed, workers, chunk_spins, start_chunk):
+        add_spin_totals(totals, part)
+        chunk += 1
+        if progress is not None:
+            progress(totals)
+        if checkpoint is not None and time.monotonic() - last_save >= checkpoint_every:
+            save(chunk)
+            last_save = time.monotonic()
+    if checkpoint is not None:
+        save(chunk)
+    return totals
+
+
+def parallel_rtp(paytable=None, n_spins=1_000_000, bet=1.0, seed=0, workers=None,
+                 chunk_spins=CHUNK_SPINS):
+    """
+    Parallell simulate_rtp: (avg_win, hit_freq, trig_freq).
+    """
+    totals = parallel_simulate(paytable, n_spins, bet, seed, workers, chunk_spins)
+    n = totals["spins"]
+    return totals["total_win"] / (n * bet), totals["hits"] / n, totals["triggers"] / n
+
+
+def parallel_variance(paytable=None, n_spins=1_000_000, bet=1.0, seed=0, workers=None,
+                      chunk_spins=CHUNK_SPINS):
+    """
+    Parallell simulate_variance: (variance, sigma).
+    """
+    stats = parallel_simulate(paytable, n_spins, bet, seed, workers, chunk_spins)["stats"]
+    return stats.variance, stats.std
+
+
+def parallel_fs_rounds(paytable=None, n_rounds=100_000, bet=1.0, seed=0, workers=None,
+                       chunk_rounds=2_000, progress=None):
+    """
+    Simulerar n_rounds fristående FS-rundor (run_free_spins med modellens
+    spins och cap). Returnerar en RunningStats över rundvinsterna.
+    """
+    stats = RunningStats()
+    for part in iter_chunks(paytable, n_rounds, bet, seed, workers, chunk_rounds,
+                            task=_run_fs_chunk):
+        stats.merge(part)
+        if progress is not None:
+            progress(stats)
+    return stats
+
+
+def simulate_until(paytable=None, epsilon=UNTIL_EPSILON, z=1.96, bet=1.0, seed=0, workers=None,
+                   chunk_spins=CHUNK_SPINS, min_spins=100_000, max_spins=UNTIL_MAX_SPINS,
+                   progress=None):
+    """
+    Simulerar chunk för chunk tills RTP:ns konfidensintervall
+    (rtp ± z * sigma / sqrt(n)) har halvbredd <= epsilon, eller max_spins nåtts.
+    epsilon är i RTP-enheter (0.005 = ±0.5 %-enheter). max_spins=None
+    kör utan tak (stannar aldrig om epsilon är ouppnåelig).
+
+    Stoppbeslutet tas på sammanslagna chunks i ordning, så samma seed ger
+    samma resultat för alla antal workers. progress(result) anropas efter
+    varje chunk om den ges.
+
+    Returnerar dict: rtp, half_width, hit_freq, trig_freq, spins,
+    wall_time, spins_per_s, converged, spins_needed, stats.
+    converged=False betyder att taket nåddes först; spins_needed är då
+    en skattning av hur många spins epsilon kräver, (z * sigma / epsilon)^2.
+    """
+    totals = empty_spin_totals()
+    stats = totals["stats"]
+    t0 = time.perf_counter()
+    result = None
+
+    for part in iter_chunks(paytable, max_spins, bet, seed, workers, chunk_spins):
+        add_spin_totals(totals, part)
+
+        n = totals["spins"]
+        wall = time.perf_counter() - t0
+        half_width = z * stats.std / (bet * sqrt(n))
+        result = {
+            "rtp": totals["total_win"] / (n * bet),
+            "half_width": half_width,
+            "hit_freq": totals["hits"] / n,
+            "trig_freq": totals["triggers"] / n,
+            "spins": n,
+            "wall_time": wall,
+            "spins_per_s": n / wall if wall > 0 else float("inf"),
+            "converged": n >= min_spins and half_width <= epsilon,
+            "spins_needed": ceil((z * stats.std / (bet * epsilon)) ** 2),
+            "stats": stats,
+        }
+        if progress is not None:
+            progress(result)
+        if result["converged"]:
+            break
+    return result
@@ -0,0 +1,221 @@
+"""
+What-if-prissättning av paytable-varianter på samma simulerade utfall
+(common random numbers).
+
+Vinsten är linjär i paytablen: ett spin ger sum över (symbol, run) av
+ways * pay[symbol][run], och ett FS-spin samma sak gånger
+multiplikatorsumman. record_outcomes simulerar en gång (kolumnmotorn i
+slot_batch) och sparar glesa vektorer:
+
+- base: per spin, (symbol, run) -> ways
+- fs:   per FS-runda, (symbol, run) -> sum över rundans spins av
+        multiplikatorsumma * ways
+
+Rundorna spelas till slut utan cap (scatters/retriggers beror inte på
+paytablen). Eftersom vinsterna är >= 0 är den capade rundvinsten
+min(summa, cap), vilket ger samma resultat som run_free_spins som slutar
+vid capen. Utfallet för en paytable är då en gles matris gånger
+paytable-vektorn, och hundratals varianter kan jämföras på identiska
+utfall utan att simulera om.
+
+Symbolsannolikheter, wild-vikter och retriggers kommer från modellen som
+simuleras; varianterna får bara ändra utbetalningarna.
+"""
+import numpy as np
+
+from slot_math import GAME_MODEL, MODEL_CAP, SYMBOLS, NUM_REELS, as_game_model
+from slot_batch import (
+    make_rng,
+    column_tables,
+    spin_columns,
+    live_counts,
+    ways_by_symbol,
+    sample_wild_masks,
+    pay_matrix,
+    _fs_tables,
+)
+
+MIN_RUN = 3                              # kortaste run som sparas (hjul 1–3 krävs)
+RUNS = NUM_REELS + 1                     # kolumner per symbol i paytable-vektorn
+N_FEATURES = len(SYMBOLS) * RUNS
+
+
+def paytable_vector(paytable):
+    """
+    Paytable (dict eller GameModel) -> vektor (N_FEATURES,) med index
+    symbolindex * RUNS + run.
+    """
+    pays = pay_matrix(paytable)
+    if pays[:, :MIN_RUN].any():
+        raise ValueError(f"paytablen betalar för run < {MIN_RUN}, som inte sparas")
+    return pays.ravel()
+
+
+def _features(counts, rows, scale=None):
+    """
+    Glesa (rad, feature, ways)-tripletter för spins med run >= MIN_RUN.
+    """
+    run_len, ways = ways_by_symbol(counts)
+    r, sym = np.nonzero(run_len >= MIN_RUN)
+    vals = ways[r, sym].astype(np.float64)
+    if scale is not None:
+        vals *= scale[r]
+    return rows[r], (sym * RUNS + run_len[r, sym]).astype(np.int16), vals
+
+
+def _coalesce(rows, feat, vals):
+    """
+    Summerar dubbletter av (rad, feature) och sorterar efter rad.
+    """
+    key = rows.astype(np.int64) * N_FEATURES + feat
+    uniq, inv = np.unique(key, return_inverse=True)
+    return uniq // N_FEATURES, (uniq % N_FEATURES).astype(np.int16), np.bincount(inv, weights=vals)
+
+
+def _record_fs_rounds(n_rounds, rng, model):
+    """
+    n_rounds FS-rundor i lockstep utan cap. Returnerar (rows, feat, vals, spins).
+    """
+    scatters = column_tables(model)["scatters"]
+    retrigger = _fs_tables(model)["retrigger"]
+    spins_left = np.full(n_rounds, model.fs_spins, dtype=np.int64)
+    active = np.flatnonzero(spins_left > 0)
+    parts = []
+    played = 0
+    while active.size:
+        cols = spin_columns(active.size, rng, model)
+        wild, mult_total = sample_wild_masks(active.size, rng, model)
+        live, counts = live_counts(cols, model, wild)
+        parts.append(_features(counts, active[live], mult_total[live]))
+        played += active.size
+
+        n_scatter = np.where(wild, 0, scatters[cols]).sum(axis=1)
+        spins_left[active] += retrigger[n_scatter] - 1
+        active = active[spins_left[active] > 0]
+    if not parts:
+        return np.empty(0, np.int64), np.empty(0, np.int16), np.empty(0), 0
+    rows, feat, vals = (np.concatenate(x) for x in zip(*parts))
+    return (*_coalesce(rows, feat, vals), played)
+
+
+def _dense_blocks(rows, feat, vals, feats, block_rows):
+    """
+    Den glesa matrisen (rad, feature, värde) som täta block (m, len(feats))
+    över raderna som har något element. Ger (radnummer, block).
+    """
+    if rows.size == 0:
+        return
+    new_row = np.concatenate([[True], rows[1:] != rows[:-1]])
+    starts = np.flatnonzero(new_row)
+    local = np.cumsum(new_row) - 1                   # radposition för varje element
+    col = np.searchsorted(feats, feat)
+    for lo in range(0, starts.size, block_rows):
+        hi = min(lo + block_rows, starts.size)
+        a = starts[lo]
+        b = starts[hi] if hi < starts.size else rows.size
+        dense = np.zeros((hi - lo, feats.size))
+        dense[local[a:b] - lo, col[a:b]] = vals[a:b]
+        yield rows[starts[lo:hi]], dense
+
+
+class OutcomeSample:
+    """
+    Sparade utfall från record_outcomes. reprice(paytables) ger RTP,
+    hit-frekvens, sigma m.m. för varje paytable på samma spins.
+    """
+
+    def __init__(self, n_spins, base, fs, trigger_spins, fs_spins_played, max_win_mult):
+        self.n_spins = n_spins
+        self.base = base                      # (rows, feat, vals), rad = spin
+        self.fs = fs                          # (rows, feat, vals), rad = FS-runda
+        self.trigger_spins = trigger_spins    # spin-index för varje FS-runda (växande)
+        self.fs_spins_played = fs_spins_played
+        self.max_win_mult = max_win_mult
+
+    @property
+    def nnz(self):
+        return self.base[0].size + self.fs[0].size
+
+    def reprice(self, paytables, max_win_mult=MODEL_CAP, block_rows=1 << 14):
+        """
+        Utfall för varje paytable (dicts eller GameModels) i bet-multiplar.
+        Returnerar dict med arrayer (en post per paytable): rtp, base_rtp,
+        fs_rtp, hit_freq, sigma, cap_hit_prob (per FS-runda).
+        max_win_mult: MODEL_CAP (default) = capen i den simulerade modellen,
+        None = ingen cap, som i fs_round_exact.
+
+        Glesa rader packas upp blockvis (block_rows rader, bara de features
+        som förekommer) och multipliceras med alla paytables på en gång.
+        """
+        cap = self.max_win_mult if max_win_mult == MODEL_CAP else max_win_mult
+        feats = np.union1d(self.base[1], self.fs[1])
+        pays = np.stack([paytable_vector(p) for p in paytables], axis=1)[feats]
+        k = pays.shape[1]
+        n = self.n_spins
+        n_rounds = len(self.trigger_spins)
+
+        base_sum = np.zeros(k)
+        base_sq = np.zeros(k)
+        hits = np.zeros(k)
+        for _, dense in _dense_blocks(*self.base, feats, block_rows):
+            win = dense @ pays
+            base_sum += win.sum(axis=0)
+            base_sq += (win * win).sum(axis=0)
+            hits += (win > 0).sum(axis=0)
+
+        fs = np.zeros((n_rounds, k))
+        for rows, dense in _dense_blocks(*self.fs, feats, block_rows):
+            fs[rows] = dense @ pays
+        capped = fs >= cap if cap is not None else np.zeros(fs.shape, dtype=bool)
+        if cap is not None:
+            fs = np.minimum(fs, cap)
+
+        # basvinsten på spinsen som triggade (för korstermen i sum(win^2))
+        trig_base = np.zeros((n_rounds, k))
+        on_trigger = np.isin(self.base[0], self.trigger_spins)
+        sub = tuple(x[on_trigger] for x in self.base)
+        for rows, dense in _dense_blocks(*sub, feats, block_rows):
+            trig_base[np.searchsorted(self.trigger_spins, rows)] = dense @ pays
+
+        fs_sum = fs.sum(axis=0)
+        sq = base_sq + ((trig_base + fs) ** 2 - trig_base ** 2).sum(axis=0)
+        mean = (base_sum + fs_sum) / n
+        return {
+            "rtp": mean,
+            "base_rtp": base_sum / n,
+            "fs_rtp": fs_sum / n,
+            "hit_freq": hits / n,
+            "sigma": np.sqrt(np.maximum(sq / n - mean * mean, 0.0)),
+            "cap_hit_prob": capped.mean(axis=0) if n_rounds else np.zeros(k),
+        }
+
+
+def record_outcomes(n_spins=1_000_000, rng=None, paytable=None, batch_size=1_000_000):
+    """
+    Simulerar n_spins fulla spel (base + FS) och sparar de glesa
+    ways-vektorerna. Returnerar en OutcomeSample.
+    """
+    rng = make_rng(rng)
+    model = as_game_model(paytable or GAME_MODEL)
+    scatters = column_tables(model)["scatters"]
+    base_parts, fs_parts, triggers = [], [], []
+    n_rounds = 0
+    fs_played = 0
+    done = 0
+    while done < n_spins:
+        k = min(batch_size, n_spins - done)
+        cols = spin_columns(k, rng, model)
+        live, counts = live_counts(cols, model)
+        base_parts.append(_features(counts, done + live))
+
+        trig = np.flatnonzero(scatters[cols].sum(axis=1) == model.max_scatters)
+        rows, feat, vals, played = _record_fs_rounds(trig.size, rng, model)
+        fs_parts.append((rows + n_rounds, feat, vals))
+        triggers.append(done + trig)
+        n_rounds += trig.size
+        fs_played += played
+        done += k
+
+    base = tuple(np.concatenate(x) for x in zip(*base_parts))
+    fs = tuple(np.concatenate(x) for x in zip(*fs_parts))
+    return OutcomeSample(n_spins, base, fs, np.concatenate(triggers), fs_played, model.max_win_mult)
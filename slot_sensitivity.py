@@ -0,0 +1,231 @@
+"""
+Känslighetsrapport för base game: hur RTP, hit-frekvens och
+trigger-sannolikhet ändras med paytable-celler och symbolsannolikheter,
+utan simulering (allt bygger på slot_exact).
+
+- Paytable-celler: base-RTP är linjär i paytablen, så dRTP/dpay är exakt
+  E[ways * 1{run}] (slot_exact.exact_ways_by_cell). Hit-frekvens och
+  triggers beror inte på beloppen (bara på vilka celler som betalar),
+  så de derivatorna är 0.
+- Symbolsannolikheter: knapparna är vikterna w (base_probs för A–I) och
+  pS, med symbol_probs = (1 - pS) * w / sum(w) och P(S) = pS som i
+  slot_math. Derivatorna är centrala differenser av den exakta modellen.
+  d_<mått> för en vikt är en renormaliserad viktkänslighet: w_k ändras
+  och alla symbolsannolikheter räknas om, så p_k ändras med
+  dp_k/dw_k = (1 - pS) * (W - w_k) / W^2 (W = sum(w)) och de övriga
+  symbolerna (utom S) tappar massan proportionellt. d_<mått>_per_prob är
+  samma riktning per enhet sannolikhetsmassa, d_<mått> / (dp_k/dw_k).
+  Tecknet säger vad som händer med hela spelet, inte med symbolens egen
+  vinst: fler A (högst betalande) ger lägre RTP eftersom A då tränger
+  undan F/G, som står för flest ways (d_rtp/d_wA ~ -2.86).
+
+Elasticitet = (x / f) * df/dx, dvs. %-ändring i f per % ändring i knappen,
+så att knappar av olika storlek går att jämföra.
+
+solve_target_rtp justerar en knapp (hela paytablen, en cell, en vikt
+eller pS) tills RTP:n (base + FS) når målet; varje iteration räknas
+exakt (sekantmetoden).
+"""
+from slot_math import GAME_MODEL, GameModel, as_game_model
+from slot_exact import exact_base_stats, exact_ways_by_cell, fs_round_exact
+
+METRICS = ("rtp", "hit_freq", "trigger_prob")
+
+
+def with_changes(model=None, symbol_probs=None, paytable=None):
+    """
+    Kopia av modellen med nya symbolsannolikheter och/eller paytable.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    return GameModel(
+        symbols=model.symbols,
+        symbol_probs=model.symbol_probs if symbol_probs is None else symbol_probs,
+        paytable=model.paytable if paytable is None else paytable,
+        wild_reel_counts=model.wild_reel_counts,
+        wild_reel_count_weights=model.wild_reel_count_weights,
+        fs_multipliers=model.fs_multipliers,
+        fs_mult_weights=model.fs_mult_weights,
+        visible_rows=model.visible_rows,
+        num_reels=model.num_reels,
+        scatter=model.scatter,
+        max_scatters=model.max_scatters,
+        fs_spins=model.fs_spins,
+        retrigger_spins=model.retrigger_spins,
+        max_win_mult=model.max_win_mult,
+    )
+
+
+def symbol_knobs(model=None):
+    """
+    (vikter för icke-scatter-symboler, pS). Vikterna summerar till 1
+    (samma som base_probs för standardmodellen).
+    """
+    model = as_game_model(model or GAME_MODEL)
+    pS = model.symbol_probs.get(model.scatter, 0.0)
+    weights = {s: p / (1.0 - pS) for s, p in model.symbol_probs.items() if s != model.scatter}
+    return weights, pS
+
+
+def probs_from_knobs(weights, pS, scatter="S"):
+    total = sum(weights.values())
+    probs = {s: (1.0 - pS) * w / total for s, w in weights.items()}
+    probs[scatter] = pS
+    return probs
+
+
+def _base_metrics(model):
+    stats = exact_base_stats(model)
+    return {key: stats[key] for key in METRICS}
+
+
+def _with_knob(model, knob, value):
+    """
+    Modellen med en knapp satt till value. knob: "scale" (hela paytablen),
+    (symbol, n) (en cell), en symbol (dess vikt) eller scatter (pS).
+    """
+    if knob == "scale":
+        return with_changes(model, paytable={k: v * value for k, v in model.paytable.items()})
+    if isinstance(knob, tuple):
+        paytable = dict(model.paytable)
+        paytable[knob] = value
+        return with_changes(model, paytable=paytable)
+    weights, pS = symbol_knobs(model)
+    if knob == model.scatter:
+        pS = value
+    else:
+        weights[knob] = value
+    return with_changes(model, symbol_probs=probs_from_knobs(weights, pS, model.scatter))
+
+
+def knob_value(model, knob):
+    if knob == "scale":
+        return 1.0
+    if isinstance(knob, tuple):
+        return model.paytable.get(knob, 0.0)
+    weights, pS = symbol_knobs(model)
+    return pS if knob == model.scatter else weights[knob]
+
+
+def _elasticity(x, f, d):
+    return x * d / f if f else 0.0
+
+
+def sensitivity_report(model=None, rel_step=1e-4):
+    """
+    Derivator och elasticiteter för base game.
+
+    Returnerar dict:
+    - base:     {rtp, hit_freq, trigger_prob} för modellen
+    - paytable: {(symbol, n): {"pay", "d_rtp", "rtp_elasticity"}} för alla
+                celler n = 3..num_reels (d hit/trigger = 0, se modul-doc)
+    - symbols:  {knapp: {"value", "prob", "d_<mått>", "d_<mått>_per_prob",
+                "<mått>_elasticity"}} för varje symbolvikt och
+                scatter-sannolikheten. d_<mått> är den renormaliserade
+                viktkänsligheten (se modul-doc), d_<mått>_per_prob samma
+                riktning per enhet sannolikhetsmassa; för S är de lika.
+    """
+    model = as_game_model(model or GAME_MODEL)
+    base = _base_metrics(model)
+
+    paytable = {}
+    for cell, ways in exact_ways_by_cell(model).items():
+        pay = model.paytable.get(cell, 0.0)
+        paytable[cell] = {
+            "pay": pay,
+            "d_rtp": ways,
+            "rtp_elasticity": _elasticity(pay, base["rtp"], ways),
+        }
+
+    weights, pS = symbol_knobs(model)
+    total = sum(weights.values())
+    symbols = {}
+    for knob in list(weights) + [model.scatter]:
+        x = knob_value(model, knob)
+        h = rel_step * x
+        up = _base_metrics(_with_knob(model, knob, x + h))
+        down = _base_metrics(_with_knob(model, knob, x - h))
+        # dp/dknapp: för vikter via renormaliseringen, för S är knappen pS själv
+        dp = 1.0 if knob == model.scatter else (1.0 - pS) * (total - x) / total ** 2
+        row = {"value": x, "prob": model.symbol_probs[knob]}
+        for key in METRICS:
+            d = (up[key] - down[key]) / (2.0 * h)
+            row[f"d_{key}"] = d
+            row[f"d_{key}_per_prob"] = d / dp
+            row[f"{key}_elasticity"] = _elasticity(x, base[key], d)
+        symbols[knob] = row
+
+    return {"base": base, "paytable": paytable, "symbols": symbols}
+
+
+def total_rtp(model=None, include_fs=True, use_disk=True):
+    """
+    Exakt RTP: base + trigger_prob * EV(FS-runda) (med include_fs).
+    """
+    model = as_game_model(model or GAME_MODEL)
+    base = exact_base_stats(model)
+    if not include_fs:
+        return base["rtp"]
+    return base["rtp"] + base["trigger_prob"] * fs_round_exact(model, use_disk=use_disk)["ev"]
+
+
+def _scaled_rtp(model, scale, include_fs):
+    """
+    RTP med hela paytablen * scale. FS-vinsterna skalar också, så
+    EV(FS) = scale * EV(oskalad runda med capen / scale) – samma
+    per-spin-fördelning (cachad), bara capen ändras.
+    """
+    base = exact_base_stats(model)
+    rtp = scale * base["rtp"]
+    if include_fs:
+        cap = model.max_win_mult / scale if model.max_win_mult is not None else None
+        rtp += base["trigger_prob"] * scale * fs_round_exact(model, max_win_mult=cap)["ev"]
+    return rtp
+
+
+def solve_target_rtp(target, knob="scale", model=None, include_fs=True, tol=1e-9, max_iter=30):
+    """
+    Sätter en knapp så att RTP:n blir target (sekantmetoden, exakt
+    utvärdering i varje steg).
+
+    knob: "scale" (alla paytable-belopp * faktor), (symbol, n),
+    en symbol (base_probs-vikten) eller scatter-symbolen (pS).
+    include_fs=False siktar på base-RTP:n.
+
+    Med "scale" återanvänds FS-fördelningen (snabbt); övriga knappar
+    räknar om den exakta FS-fördelningen för varje iteration (sekunder
+    per steg).
+
+    Returnerar dict: knob, value, rtp, model, converged, history [(värde, rtp)].
+    """
+    model = as_game_model(model or GAME_MODEL)
+    if knob == "scale":
+        evaluate = lambda x: _scaled_rtp(model, x, include_fs)
+    else:
+        # mellanstegens modeller hålls utanför diskcachen
+        evaluate = lambda x: total_rtp(_with_knob(model, knob, x), include_fs, use_disk=False)
+
+    x0 = knob_value(model, knob)
+    f0 = evaluate(x0)
+    x1 = x0 * 1.01 if x0 else 1e-3
+    f1 = evaluate(x1)
+    history = [(x0, f0), (x1, f1)]
+    converged = abs(f1 - target) <= tol
+    for _ in range(max_iter):
+        if converged or f1 == f0:
+            break
+        x2 = x1 + (target - f1) * (x1 - x0) / (f1 - f0)
+        if x2 <= 0:
+            x2 = x1 / 2.0          # knapparna är belopp/sannolikheter > 0
+        x0, f0 = x1, f1
+        x1, f1 = x2, evaluate(x2)
+        history.append((x1, f1))
+        converged = abs(f1 - target) <= tol
+
+    return {
+        "knob": knob,
+        "value": x1,
+        "rtp": f1,
+        "model": _with_knob(model, knob, x1),
+        "converged": converged,
+        "history": history,
+    }
@@ -0,0 +1,226 @@
+"""
+Strömmande statistik för simuleringar (ren Python, O(1) minne).
+
+RunningStats håller antal, medel och centrala moment M2..M4 (Welford /
+Pébay), min/max och ett log-skalat histogram med fasta hinkar. Två
+ackumulatorer kan slås ihop (merge), så varje shard/worker kan räkna på
+sitt och resultatet kombineras efteråt.
+"""
+from math import floor, log10, sqrt
+
+
+class LogHistogram:
+    """
+    Fasta hinkar: hink 0 = exakt 0 (de flesta spins), därefter
+    per_decade hinkar per tiopotens från lo till hi. Värden under lo
+    hamnar i första log-hinken, värden över hi i sista.
+    """
+
+    def __init__(self, lo=0.01, hi=100_000.0, per_decade=20):
+        self.lo = lo
+        self.hi = hi
+        self.per_decade = per_decade
+        self.log_lo = log10(lo)
+        self.n_log = int(round((log10(hi) - self.log_lo) * per_decade))
+        self.counts = [0] * (self.n_log + 1)
+
+    def index(self, x):
+        if x <= 0:
+            return 0
+        i = int(floor((log10(x) - self.log_lo) * self.per_decade))
+        return 1 + min(max(i, 0), self.n_log - 1)
+
+    def add(self, x):
+        self.counts[self.index(x)] += 1
+
+    def edges(self, i):
+        """
+        (nedre, övre) gräns för hink i (hink 0 = (0, 0)).
+        """
+        if i == 0:
+            return 0.0, 0.0
+        k = i - 1
+        return (10 ** (self.log_lo + k / self.per_decade),
+                10 ** (self.log_lo + (k + 1) / self.per_decade))
+
+    def merge(self, other):
+        if (other.lo, other.hi, other.per_decade) != (self.lo, self.hi, self.per_decade):
+            raise ValueError("histogrammen har olika hinkar")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    def to_dict(self):
+        return {"lo": self.lo, "hi": self.hi, "per_decade": self.per_decade,
+                "counts": list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, d):
+        hist = cls(d["lo"], d["hi"], d["per_decade"])
+        if len(d["counts"]) != len(hist.counts):
+            raise ValueError("fel antal hinkar i sparat histogram")
+        hist.counts = list(d["counts"])
+        return hist
+
+    def percentile(self, q):
+        """
+        Ungefärlig q-kvantil (0 < q < 1), log-linjär interpolation i hinken.
+        """
+        total = sum(self.counts)
+        if total == 0:
+            return float("nan")
+        target = q * total
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                if i == 0:
+                    return 0.0
+                lo, hi = self.edges(i)
+                frac = (target - seen) / c
+                return lo * (hi / lo) ** frac
+            seen += c
+        return self.edges(len(self.counts) - 1)[1]
+
+
+class RunningStats:
+    """
+    Mergebar ackumulator: add(x) per observation, merge(other) per shard.
+    variance är populationsvariansen (samma som E[X^2] - E[X]^2).
+    tails: trösklar t där antalet x >= t räknas exakt (max-win-svansen).
+    """
+
+    def __init__(self, histogram=None, tails=(100, 1000, 5000)):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.hist = histogram if histogram is not None else LogHistogram()
+        self.tails = tuple(tails)
+        self.tail_counts = [0] * len(self.tails)
+
+    def add(self, x):
+        n1 = self.n
+        self.n = n = n1 + 1
+        delta = x - self.mean
+        delta_n = delta / n
+        delta_n2 = delta_n * delta_n
+        term1 = delta * delta_n * n1
+        self.mean += delta_n
+        self.m4 += term1 * delta_n2 * (n * n - 3 * n + 3) + 6 * delta_n2 * self.m2 - 4 * delta_n * self.m3
+        self.m3 += term1 * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.m2 += term1
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        self.hist.add(x)
+        for i, t in enumerate(self.tails):
+            if x >= t:
+                self.tail_counts[i] += 1
+
+    def merge(self, other):
+        """
+        Lägger ihop other i self (parallella formler för M2..M4).
+        """
+        if other.tails != self.tails:
+            raise ValueError("ackumulatorerna har olika tail-trösklar")
+        self.tail_counts = [a + b for a, b in zip(self.tail_counts, other.tail_counts)]
+        na, nb = self.n, other.n
+        if nb == 0:
+            return self
+        if na == 0:
+            self.n, self.mean = other.n, other.mean
+            self.m2, self.m3, self.m4 = other.m2, other.m3, other.m4
+            self.min, self.max = other.min, other.max
+            self.hist.merge(other.hist)
+            return self
+
+        n = na + nb
+        delta = other.mean - self.mean
+        d2 = delta * delta
+        a2, a3 = self.m2, self.m3
+        b2, b3 = other.m2, other.m3
+
+        self.m4 = (self.m4 + other.m4
+                   + d2 * d2 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+                   + 6 * d2 * (na * na * b2 + nb * nb * a2) / n ** 2
+                   + 4 * delta * (na * b3 - nb * a3) / n)
+        self.m3 = (a3 + b3
+                   + d2 * delta * na * nb * (na - nb) / n ** 2
+                   + 3 * delta * (na * b2 - nb * a2) / n)
+        self.m2 = a2 + b2 + d2 * na * nb / n
+        self.mean += delta * nb / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.hist.merge(other.hist)
+        return self
+
+    def to_dict(self):
+        """
+        JSON-vänlig ögonblicksbild (floats sparas exakt av json).
+        """
+        return {
+            "n": self.n, "mean": self.mean,
+            "m2": self.m2, "m3": self.m3, "m4": self.m4,
+            "min": self.min, "max": self.max,
+            "tails": list(self.tails), "tail_counts": list(self.tail_counts),
+            "hist": self.hist.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        stats = cls(LogHistogram.from_dict(d["hist"]), d["tails"])
+        stats.n, stats.mean = d["n"], d["mean"]
+        stats.m2, stats.m3, stats.m4 = d["m2"], d["m3"], d["m4"]
+        stats.min, stats.max = d["min"], d["max"]
+        stats.tail_counts = list(d["tail_counts"])
+        return stats
+
+    @property
+    def variance(self):
+        return self.m2 / self.n if self.n else float("nan")
+
+    @property
+    def std(self):
+        return sqrt(self.variance)
+
+    @property
+    def skewness(self):
+        if self.m2 == 0:
+            return float("nan")
+        return sqrt(self.n) * self.m3 / self.m2 ** 1.5
+
+    @property
+    def kurtosis(self):
+        """
+        Excess-kurtosis (0 för normalfördelning).
+        """
+        if self.m2 == 0:
+            return float("nan")
+        return self.n * self.m4 / (self.m2 * self.m2) - 3.0
+
+    def percentile(self, q):
+        return self.hist.percentile(q)
+
+    def tail(self, threshold):
+        """
+        P(X >= threshold) för en av tail-trösklarna.
+        """
+        return self.tail_counts[self.tails.index(threshold)] / self.n if self.n else 0.0
+
+    def summary(self, qs=(0.5, 0.9, 0.99, 0.999)):
+        return {
+            "n": self.n,
+            "mean": self.mean,
+            "variance": self.variance,
+            "std": self.std,
+            "skewness": self.skewness,
+            "kurtosis": self.kurtosis,
+            "min": self.min,
+            "max": self.max,
+            "percentiles": {q: self.percentile(q) for q in qs},
+            "tail": {t: self.tail(t) for t in self.tails},
+        }
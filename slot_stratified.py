@@ -0,0 +1,212 @@
+"""
+Stratifierad skattning av EV per FS-runda (Neyman-allokering).
+
+Ett FS-spins vinst beror på wild-konfigurationen bara via (antal wild
+reels, multiplikatorsumma) – vinsten är basvinsten * summan. Dessa
+klasser ordnas (först antal wilds, sedan summan) och har kända
+sannolikheter från WILD_REEL_COUNT_WEIGHTS / FS_MULT_WEIGHTS.
+
+En runda hamnar i stratum h om den "värsta" klassen bland de
+fs_spins första spinsen är h. Med F(h) = P(klass <= h) per spin är
+
+    P(stratum h) = F(h)^n0 - F(h - 1)^n0
+
+exakt, och rundor kan dras betingat på stratumet: antalet spins i klass h
+är binomialt (betingat på >= 1), de placeras slumpmässigt och resten dras
+från klasserna < h. Retrigger-spins dras som vanligt. Rundorna spelas i
+lockstep med slot_batch.simulate_fs_rounds.
+
+    EV = sum_h P_h * medel_h,   Var = sum_h P_h^2 * s_h^2 / n_h
+
+En pilotomgång skattar s_h, sedan fördelas resten av rundorna med
+n_h ∝ P_h * s_h (Neyman). De sällsynta strata (3+ wilds, x5/x8) som
+dominerar variansen får då många fler rundor än sin sannolikhet.
+Piloten är proportionell mot P_h med ett golv, och strata vars bidrag
+till EV är högst P_h * cap < negligible hoppas över helt (de minsta har
+P_h ~ 1e-18); summan av deras bidrag redovisas som bias_bound.
+"""
+from math import comb
+
+import numpy as np
+
+from slot_math import GAME_MODEL, as_game_model
+from slot_batch import make_rng, simulate_fs_rounds, _fs_tables
+
+
+def spin_classes(paytable=None):
+    """
+    Alla (antal wilds, multiplikatorsumma) för ett FS-spin, sorterade.
+    Returnerar (n_wild, mult_total, probs) som arrayer.
+    """
+    model = as_game_model(paytable or GAME_MODEL)
+    t = _fs_tables(model)
+    count_p = np.diff(np.concatenate([[0.0], t["wild_cdf"]]))
+    mult_p = np.diff(np.concatenate([[0.0], t["mult_cdf"]]))
+
+    # fördelning för summan av c multiplikatorer: c-faldig faltning
+    sum_dist = {0: {1: 1.0}}          # utan wilds är multiplikatorn 1
+    cur = {0: 1.0}
+    for c in range(1, int(t["wild_counts"].max()) + 1):
+        nxt = {}
+        for s, p in cur.items():
+            for m, pm in zip(t["mults"], mult_p):
+                nxt[s + int(m)] = nxt.get(s + int(m), 0.0) + p * pm
+        cur = nxt
+        sum_dist[c] = cur
+
+    classes = {}
+    for c, pc in zip(t["wild_counts"], count_p):
+        for s, ps in sum_dist[int(c)].items():
+            classes[(int(c), s)] = classes.get((int(c), s), 0.0) + pc * ps
+    keys = sorted(k for k, p in classes.items() if p > 0)
+    n_wild = np.array([k[0] for k in keys], dtype=np.int64)
+    mult_total = np.array([k[1] for k in keys], dtype=np.int64)
+    probs = np.array([classes[k] for k in keys])
+    return n_wild, mult_total, probs / probs.sum()
+
+
+def stratum_probs(probs, n0):
+    """
+    P(värsta klassen bland n0 spins = h) för varje klass h.
+
+    F(h)^n0 - F(h - 1)^n0 räknas via svanssannolikheterna
+    S_h = P(klass > h) med log1p/expm1: för sällsynta h ligger båda
+    termerna nära 1 och den direkta differensen blir bara avrundningsbrus.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    probs = probs / probs.sum()
+    above = np.append(np.cumsum(probs[::-1])[::-1][1:], 0.0)     # S_h
+    with np.errstate(divide="ignore"):
+        log_f = n0 * np.log1p(-above)                            # log F(h)^n0
+        log_below = n0 * np.log1p(-np.minimum(above + probs, 1.0))
+    return np.exp(log_f) * -np.expm1(log_below - log_f)
+
+
+def _sample_first_spins(h, n, n0, probs, rng):
+    """
+    (n, n0) klassindex för de n0 första spinsen, betingat på att
+    den största klassen är h.
+    """
+    below = probs[:h].sum()
+    r = probs[h] / (below + probs[h])
+    # antal spins i klass h: Binomial(n0, r) betingat på >= 1
+    pmf = np.array([comb(n0, j) * r ** j * (1.0 - r) ** (n0 - j) for j in range(1, n0 + 1)])
+    j = 1 + np.searchsorted(np.cumsum(pmf / pmf.sum()), rng.random(n), side="right").clip(0, n0 - 1)
+    out = np.full((n, n0), h, dtype=np.int64)
+    if h > 0:
+        cdf = np.cumsum(probs[:h] / below)
+        cdf[-1] = 1.0
+        low = np.searchsorted(cdf, rng.random((n, n0)), side="right")
+        # slumpad ordning: positionerna med lägst rang får klass h
+        ranks = rng.random((n, n0)).argsort(axis=1).argsort(axis=1)
+        out = np.where(ranks < j[:, None], h, low)
+    return out
+
+
+def simulate_stratum(h, n_rounds, rng=None, paytable=None, classes=None):
+    """
+    n_rounds rundor betingade på stratum h, med modellens cap.
+    Returnerar (wins, spins_played).
+    """
+    rng = make_rng(rng)
+    model = as_game_model(paytable or GAME_MODEL)
+    n_wild, mult_total, probs = classes if classes is not None else spin_classes(model)
+    n0 = model.fs_spins
+    first = _sample_first_spins(h, n_rounds, n0, probs, rng)
+    cdf = np.cumsum(probs)
+    cdf[-1] = 1.0
+    step = np.zeros(n_rounds, dtype=np.int64)
+
+    def wild_sampler(active, rng):
+        s = step[active]
+        early = s < n0
+        cls = np.searchsorted(cdf, rng.random(active.size), side="right")
+        cls[early] = first[active[early], s[early]]
+        step[active] += 1
+        ranks = rng.random((active.size, model.num_reels)).argsort(axis=1).argsort(axis=1)
+        return ranks < n_wild[cls][:, None], mult_total[cls]
+
+    return simulate_fs_rounds(n_rounds, rng, model, max_win_mult=model.max_win_mult,
+                              wild_sampler=wild_sampler)
+
+
+def neyman_allocation(weights, sigmas, n, minimum=2):
+    """
+    n_h ∝ P_h * s_h (minst minimum per stratum), summa ~n.
+    """
+    score = np.asarray(weights) * np.asarray(sigmas)
+    if score.sum() <= 0:
+        score = np.asarray(weights, dtype=np.float64)
+    alloc = np.floor(n * score / score.sum()).astype(np.int64)
+    return np.maximum(alloc, minimum)
+
+
+def stratified_fs_ev(n_rounds=200_000, rng=None, paytable=None, pilot=0.05, min_pilot=20,
+                     negligible=1e-7, z=1.96, progress=None):
+    """
+    Stratifierad EV per FS-runda (bet-enheter, modellens fs_spins och cap).
+
+    Piloten får andelen pilot av n_rounds fördelad ∝ P_h, minst min_pilot
+    rundor per stratum, och skattar s_h; resten av n_rounds fördelas med
+    Neyman-allokering. Strata med P_h * cap < negligible simuleras inte
+    (utan cap hoppas bara P_h = 0 över).
+
+    Returnerar dict: ev, ci, rounds, spins, variance (av EV-skattningen),
+    skipped_prob och bias_bound (sannolikheten för de överhoppade strata
+    och max underskattning av EV, skipped_prob * cap) och strata: lista med
+    (n_wild, mult_total, P_h, n_h, medel_h, s_h). progress(rundor klara)
+    anropas efter varje stratum om den ges.
+    """
+    rng = make_rng(rng)
+    model = as_game_model(paytable or GAME_MODEL)
+    classes = spin_classes(model)
+    weights = stratum_probs(classes[2], model.fs_spins)
+    cap = model.max_win_mult
+    used = weights > 0 if cap is None else weights * cap >= negligible
+    keep = np.flatnonzero(used)
+    skipped_prob = float(weights[~used].sum())
+    pilots = np.maximum(np.floor(pilot * n_rounds * weights[keep]).astype(np.int64), min_pilot)
+
+    samples = {}
+    spins = 0
+    done = 0
+    for h, n in zip(keep, pilots):
+        wins, played = simulate_stratum(h, int(n), rng, model, classes)
+        samples[h] = [wins]
+        spins += int(played.sum())
+        done += int(n)
+        if progress is not None:
+            progress(done)
+
+    sigmas = np.array([samples[h][0].std(ddof=1) for h in keep])
+    extra = neyman_allocation(weights[keep], sigmas, max(n_rounds - done, 0), minimum=0)
+    for h, n in zip(keep, extra):
+        if n > 0:
+            wins, played = simulate_stratum(h, int(n), rng, model, classes)
+            samples[h].append(wins)
+            spins += int(played.sum())
+            done += int(n)
+            if progress is not None:
+                progress(done)
+
+    ev = 0.0
+    variance = 0.0
+    strata = []
+    rounds = 0
+    for h in keep:
+        wins = np.concatenate(samples[h])
+        mean, s = float(wins.mean()), float(wins.std(ddof=1))
+        ev += weights[h] * mean
+        variance += weights[h] ** 2 * s * s / wins.size
+        rounds += wins.size
+        strata.append((int(classes[0][h]), int(classes[1][h]), float(weights[h]), int(wins.size), mean, s))
+    return {
+        "ev": ev,
+        "ci": z * variance ** 0.5,
+        "variance": variance,
+        "rounds": rounds,
+        "spins": spins,
+        "skipped_prob": skipped_prob,
+        "bias_bound": skipped_prob * cap if cap is not None else 0.0,
+        "strata": strata,
+    }
@@ -0,0 +1,69 @@
+import numpy as np
+
+from slot_math import GAME_MODEL, GameModel, evaluate_spin, evaluate_megaways_win
+from slot_batch import (
+    simulate_fs_rounds,
+    array_to_grid,
+    evaluate_megaways_batch,
+    column_tables,
+    spin_columns,
+    columns_to_grids,
+    evaluate_columns_batch,
+    simulate_rtp_batch,
+)
+from slot_bench import make_corpus
+
+
+def test_batch_evaluator_matches_scalar_bit_for_bit():
+    grids, wild_mask = make_corpus()
+    batch = evaluate_megaways_batch(grids, GAME_MODEL, wild_mask)
+    assert (batch > 0).any() and wild_mask.any()
+    for g, w, value in zip(grids, wild_mask, batch):
+        grid = array_to_grid(g)
+        wild_reels = np.flatnonzero(w).tolist()
+        assert evaluate_spin(grid, GAME_MODEL, wild_reels).total == value
+        assert evaluate_megaways_win(grid, GAME_MODEL, wild_reels) == value
+
+
+def test_batch_evaluator_raw_paytable_and_shared_mask():
+    grids, _ = make_corpus(2_000, 9)
+    mask = np.array([False, True, False, False, True])
+    batch = evaluate_megaways_batch(grids, GAME_MODEL.paytable, mask)
+    expected = [evaluate_spin(array_to_grid(g), GAME_MODEL, [1, 4]).total for g in grids]
+    assert np.array_equal(batch, expected)
+
+
+def test_simulate_fs_rounds_cap_only_when_given():
+    # None = ingen cap, som run_free_spins / estimate_fs_round_ev
+    cap = GAME_MODEL.max_win_mult
+    uncapped, _ = simulate_fs_rounds(20_000, 5)
+    capped, _ = simulate_fs_rounds(20_000, 5, max_win_mult=cap)
+    assert uncapped.max() > cap
+    assert capped.max() == cap
+
+
+def test_column_engine_matches_grid_evaluator():
+    rng = np.random.default_rng(18)
+    n = 100_000
+    tables = column_tables(GAME_MODEL)
+    cols = spin_columns(n, rng, GAME_MODEL)
+    grids = columns_to_grids(cols, GAME_MODEL)
+    # tabellerna beskriver samma kolumner som grids
+    assert np.array_equal(tables["scatters"][cols].sum(axis=1),
+                          (grids == GAME_MODEL.symbols.index(GAME_MODEL.scatter)).sum(axis=(1, 2)))
+    assert tables["scatters"][cols].sum(axis=1).max() <= GAME_MODEL.max_scatters
+    for wild_mask in (None, rng.random((n, 5)) < 0.3):
+        by_cols = evaluate_columns_batch(cols, GAME_MODEL, wild_mask)
+        by_grid = evaluate_megaways_batch(grids, GAME_MODEL, wild_mask)
+        assert (by_cols > 0).any()
+        assert np.count_nonzero(by_cols != by_grid) == 0
+
+
+def test_column_engine_reads_scatter_limit_from_model():
+    model = GameModel(max_scatters=2)
+    scatters = column_tables(model)["scatters"]
+    cols = spin_columns(200_000, np.random.default_rng(20), model)
+    n_scatter = scatters[cols].sum(axis=1)
+    assert n_scatter.max() == 2
+    _, _, trig_freq = simulate_rtp_batch(200_000, rng=np.random.default_rng(20), paytable=model)
+    assert abs(trig_freq - np.mean(n_scatter == 2)) < 0.01
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from slot_cli import main, json_safe
+
+
+def test_spins_must_be_positive(capsys):
+    with pytest.raises(SystemExit):
+        main(["sim", "--spins", "0"])
+    assert "--spins" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv, flag", [
+    (["fs-tail", "--seed", "abc"], "--seed"),
+    (["sim", "--seed", "-1"], "--seed"),
+    (["sim", "--epsilon", "0"], "--epsilon"),
+    (["sim", "--epsilon", "-0.01"], "--epsilon"),
+    (["sim", "--epsilon", "nan"], "--epsilon"),
+])
+def test_invalid_seed_and_epsilon_are_rejected(capsys, argv, flag):
+    with pytest.raises(SystemExit):
+        main(argv)
+    assert flag in capsys.readouterr().err
+
+
+def test_json_output_is_strict(tmp_path):
+    data = {"rate": float("inf"), "nested": {"x": float("nan"), "ok": 1.5}, "list": (1, float("-inf"))}
+    assert json_safe(data) == {"rate": None, "nested": {"x": None, "ok": 1.5}, "list": [1, None]}
+    path = tmp_path / "tail.json"
+    assert main(["fs-tail", "--spins", "2000", "--seed", "1", "-q", "-o", str(path)]) == 0
+    out = json.loads(path.read_text(), parse_constant=lambda c: pytest.fail(f"ogiltig JSON: {c}"))
+    assert out["rounds"] == 2000
+
+
+def test_long_simulations_report_progress():
+    from slot_importance import tail_estimates
+    from slot_buy import simulate_buy
+
+    updates = []
+    tail_estimates(3_000, rng=1, batch_size=1_000, progress=updates.append)
+    assert updates == [1_000, 2_000, 3_000]
+    updates.clear()
+    simulate_buy(2_500, rng=1, batch_size=1_000, progress=updates.append)
+    assert updates == [1_000, 2_000, 2_500]
@@ -0,0 +1,63 @@
+import numpy as np
+
+from slot_math import SYMBOLS
+from slot_batch import array_to_grid
+from slot_codec import pack_grids, unpack_grids, pack_grid, unpack_grid, WILD_CODE, PACKED_BYTES
+from slot_bench import make_corpus
+
+
+def test_pack_grids_round_trip_with_wild_reels():
+    grids, wild_mask = make_corpus(2_000, 3)
+    packed = pack_grids(grids, wild_mask)
+    assert packed.shape == (len(grids), PACKED_BYTES) and packed.dtype == np.uint8
+    out, out_mask = unpack_grids(packed)
+    assert np.array_equal(out_mask, wild_mask)
+    assert (out[wild_mask[:, None, :].repeat(4, axis=1)] == WILD_CODE).all()
+    keep = ~wild_mask[:, None, :].repeat(4, axis=1)
+    assert np.array_equal(out[keep], grids[keep])
+
+
+def test_wild_code_is_first_code_after_symbols():
+    assert WILD_CODE == len(SYMBOLS) == 10
+    grids = np.zeros((1, 4, 5), dtype=np.uint8)
+    packed = pack_grids(grids, np.array([False, False, True, False, False]))
+    # reel 2 = cell 2 i rad 0 => höga nibbeln i byte 1 (cellerna 2, 3)
+    assert packed[0, 1] == WILD_CODE << 4
+
+
+def test_pack_grid_matches_vectorised_and_round_trips():
+    grids, wild_mask = make_corpus(500, 8)
+    packed = pack_grids(grids, wild_mask)
+    for g, w, row in zip(grids, wild_mask, packed):
+        wild_reels = np.flatnonzero(w).tolist()
+        grid = array_to_grid(g)
+        data = pack_grid(grid, wild_reels)
+        assert data == row.tobytes()
+        out, reels = unpack_grid(data)
+        assert reels == wild_reels
+        for r in range(4):
+            for c in range(5):
+                assert out[r][c] == ("W" if c in wild_reels else grid[r][c])
+
+
+def test_odd_cell_count():
+    rng = np.random.default_rng(5)
+    grids = rng.integers(0, len(SYMBOLS), size=(50, 3, 5), dtype=np.uint8)   # 15 celler
+    packed = pack_grids(grids, np.array([False, True, False, False, False]))
+    assert packed.shape == (50, 8)
+    assert (packed[:, -1] & 0x0F == 0).all()                                   # utfyllnad
+    out, mask = unpack_grids(packed, rows=3, reels=5)
+    assert mask[:, 1].all() and not mask[:, [0, 2, 3, 4]].any()
+    assert np.array_equal(out[:, :, [0, 2, 3, 4]], grids[:, :, [0, 2, 3, 4]])
+    grid = [[SYMBOLS[v] for v in row] for row in grids[0]]
+    data = pack_grid(grid, [1])
+    assert data == packed[0].tobytes()
+    assert unpack_grid(data, rows=3, reels=5) == ([["W" if c == 1 else grid[r][c] for c in range(5)]
+                                                   for r in range(3)], [1])
+
+
+def test_empty_batch():
+    packed = pack_grids(np.empty((0, 4, 5), dtype=np.uint8), np.zeros(5, dtype=bool))
+    assert packed.shape == (0, PACKED_BYTES)
+    grids, mask = unpack_grids(packed)
+    assert grids.shape == (0, 4, 5) and mask.shape == (0, 5)
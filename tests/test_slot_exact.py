@@ -0,0 +1,76 @@
+import os
+
+import slot_exact
+from slot_math import GAME_MODEL
+from slot_exact import _reel_group_cache, _group_caches, model_hash, GROUP_CACHE_MODELS
+from slot_sensitivity import _with_knob
+
+
+def test_reel_group_cache_follows_model_content():
+    # tillfälliga modeller med samma id får inte dela cache
+    a = _with_knob(GAME_MODEL, "A", 0.05)
+    cache_a = _reel_group_cache(a)
+    cache_a["marker"] = True
+    del a
+    b = _with_knob(GAME_MODEL, "A", 0.02)
+    assert "marker" not in _reel_group_cache(b)
+    # samma innehåll => samma cache
+    assert _reel_group_cache(_with_knob(GAME_MODEL, "A", 0.05)) is cache_a
+
+
+def test_reel_group_cache_is_bounded():
+    for w in range(GROUP_CACHE_MODELS + 3):
+        _reel_group_cache(_with_knob(GAME_MODEL, "B", 0.01 * (w + 1)))
+    assert len(_group_caches) <= GROUP_CACHE_MODELS
+    assert model_hash(_with_knob(GAME_MODEL, "B", 0.01 * (GROUP_CACHE_MODELS + 3))) in _group_caches
+
+
+def test_array_cache_is_bounded_and_versioned(tmp_path, monkeypatch):
+    monkeypatch.setattr(slot_exact, "CACHE_DIR", str(tmp_path))
+    models = [_with_knob(GAME_MODEL, "C", 0.01 * (w + 1)) for w in range(slot_exact.MEMORY_CACHE_MODELS + 2)]
+    for m in models:
+        slot_exact.spin_win_pmf(m, (0, 1, 2, 3, 4))
+    assert len(slot_exact._memory_cache) <= slot_exact.MEMORY_CACHE_MODELS
+    assert model_hash(models[-1]) in slot_exact._memory_cache
+    name = f"v{slot_exact.CACHE_VERSION}_{model_hash(models[0])}_spin_01234.npz"
+    assert name in os.listdir(tmp_path)
+
+
+def test_fs_round_cap_discretisation_error_is_small():
+    from slot_exact import fs_round_exact
+
+    coarse = fs_round_exact(n_buckets=500)
+    fine = fs_round_exact(n_buckets=1000)
+    assert coarse["ev_uncapped"] - coarse["ev"] > 500          # capkorrektionen är stor
+    assert abs(coarse["ev"] - fine["ev"]) < 1e-4
+    assert abs(coarse["cap_hit_prob"] - fine["cap_hit_prob"]) < 2e-5
+
+
+def test_fs_round_none_means_uncapped():
+    from slot_exact import fs_round_exact
+
+    uncapped = fs_round_exact(max_win_mult=None)
+    assert uncapped["ev"] == uncapped["ev_uncapped"]
+    assert uncapped["cap_hit_prob"] == 0.0
+    assert fs_round_exact()["ev"] == fs_round_exact(max_win_mult=GAME_MODEL.max_win_mult)["ev"]
+
+
+def test_exact_base_stats_match_seeded_simulation():
+    import numpy as np
+    from slot_batch import spin_columns, evaluate_columns_batch, column_tables
+    from slot_exact import exact_base_stats, exact_hit_frequency
+
+    stats = exact_base_stats()
+    assert abs(stats["rtp"] - 0.70689) < 1e-5
+    assert abs(stats["hit_freq"] - 0.48418) < 1e-5
+    assert stats["hit_freq"] == exact_hit_frequency()
+
+    rng = np.random.default_rng(6)
+    n = 2_000_000
+    cols = spin_columns(n, rng, GAME_MODEL)
+    wins = evaluate_columns_batch(cols, GAME_MODEL)
+    trig = column_tables(GAME_MODEL)["scatters"][cols].sum(axis=1) == GAME_MODEL.max_scatters
+    # inom 4 standardfel
+    assert abs(wins.mean() - stats["rtp"]) < 4 * wins.std() / np.sqrt(n)
+    for freq, p in ((np.mean(wins > 0), stats["hit_freq"]), (trig.mean(), stats["trigger_prob"])):
+        assert abs(freq - p) < 4 * np.sqrt(p * (1 - p) / n)
@@ -0,0 +1,96 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import slot_export
+from slot_export import MANIFEST, SpinExport, export_spins, _chunk_path
+from slot_parallel import parallel_simulate
+
+N_SPINS = 12_000
+CHUNK = 2_500       # sista chunken är ofullständig (2 000 spins)
+
+
+@pytest.fixture(scope="module")
+def export_dir(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("export"))
+    export_spins(directory, n_spins=N_SPINS, seed=21, workers=2, chunk_spins=CHUNK)
+    return directory
+
+
+def test_export_totals_match_parallel_simulate(export_dir):
+    data = SpinExport(export_dir)
+    totals = parallel_simulate(n_spins=N_SPINS, seed=21, workers=1, chunk_spins=CHUNK)
+    base, fs = data.read("base_win"), data.read("fs_win")
+    win = base + fs
+    assert len(data) == totals["spins"] == N_SPINS
+    assert data.chunk_sizes == [CHUNK] * 4 + [2_000]
+    assert int((base > 0).sum()) == totals["hits"]          # hits = basvinster
+    assert int(data.read("fs_triggered").sum()) == totals["triggers"]
+    assert np.isclose(win.sum(), totals["total_win"], rtol=1e-12)
+    assert np.array_equal(data.read("fs_triggered"), data.read("scatters") == 3)
+
+
+def test_memmap_slicing_across_chunks(export_dir):
+    data = SpinExport(export_dir)
+    index = data.read("index")
+    assert np.array_equal(index, np.arange(N_SPINS))
+    for start, stop in [(0, 1), (CHUNK - 3, CHUNK + 4), (1_000, 9_999), (N_SPINS - 5, N_SPINS + 100)]:
+        assert np.array_equal(data.read("index", start, stop), index[start:min(stop, N_SPINS)])
+    assert data.read("fs_win", 50, 50).size == 0
+    chunk = data.chunk("base_win", 1)
+    assert isinstance(chunk, np.memmap) and len(chunk) == CHUNK
+    assert sum(len(c["index"]) for c in data.iter_chunks(["index"])) == N_SPINS
+
+
+def test_manifest_written_atomically(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    seen = []
+    real_replace = os.replace
+
+    def checking_replace(src, dst):
+        # manifestet byts bara ut i sin helhet, och först när chunkens kolumner finns
+        if dst.endswith(MANIFEST):
+            with open(src, encoding="utf-8") as f:
+                state = json.load(f)
+            last = len(state["chunks"]) - 1
+            assert all(os.path.exists(_chunk_path(directory, c, last)) for c in state["columns"])
+            seen.append(len(state["chunks"]))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(slot_export.os, "replace", checking_replace)
+    export_spins(directory, n_spins=3 * CHUNK, seed=2, workers=1, chunk_spins=CHUNK)
+    assert seen == [1, 2, 3]
+    assert not [f for f in os.listdir(directory) if f.endswith(".tmp")]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_interrupted_export_and_missing_chunks(tmp_path):
+    directory = str(tmp_path)
+
+    def crash_after_two(done):
+        if done >= 2 * CHUNK:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        export_spins(directory, n_spins=4 * CHUNK, seed=3, workers=1, chunk_spins=CHUNK,
+                     progress=crash_after_two)
+    # en halvskriven tredje chunk syns inte: bara manifestets chunks räknas
+    stray = _chunk_path(directory, "base_win", 2)
+    np.save(stray, np.zeros(10))
+    data = SpinExport(directory)
+    assert len(data) == 2 * CHUNK
+    assert np.array_equal(data.read("index"), np.arange(2 * CHUNK))
+    with pytest.raises(IndexError):
+        data.chunk("base_win", 2)
+
+    os.remove(_chunk_path(directory, "fs_win", 1))
+    with pytest.raises(FileNotFoundError):
+        data.read("fs_win")
+    np.save(_chunk_path(directory, "base_win", 0), np.zeros(CHUNK - 1))
+    with pytest.raises(ValueError):
+        data.chunk("base_win", 0)
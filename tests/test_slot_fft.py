@@ -0,0 +1,30 @@
+import numpy as np
+
+from slot_batch import simulate_fs_rounds
+from slot_exact import fs_round_exact
+from slot_fft import fs_round_pmf
+
+
+def test_cap_semantics_agree_across_paths():
+    # samma cap => exakt DP, FFT-gitter och simulering ger samma EV
+    cap = 200.0
+    exact = fs_round_exact(max_win_mult=cap)
+    pmf = fs_round_pmf(max_win_mult=cap, step=0.25)
+    assert abs(pmf["mean"] - exact["ev"]) < 1e-3
+    assert abs(pmf["cap_hit_prob"] - exact["cap_hit_prob"]) < 1e-4
+    wins, _ = simulate_fs_rounds(100_000, 12, max_win_mult=cap)
+    se = wins.std() / np.sqrt(wins.size)
+    assert abs(wins.mean() - exact["ev"]) < 4 * se
+    assert abs(np.mean(wins >= cap) - exact["cap_hit_prob"]) < 4 * np.sqrt(exact["cap_hit_prob"] / wins.size)
+
+
+def test_none_means_uncapped():
+    pmf = fs_round_pmf(max_win_mult=None, step=2.0, horizon=20_000)
+    exact = fs_round_exact(max_win_mult=None)
+    assert pmf["cap_hit_prob"] == 0.0 and 0.0 < pmf["overflow_prob"] < 0.01
+    assert pmf["mean"] == exact["ev"] == exact["ev_uncapped"]
+    # modellens cap som default; P(>= capen) är samma massa som overflow vid horizon = capen
+    capped = fs_round_pmf(step=2.0)
+    assert capped["values"][-1] == 5000.0 and capped["cap_hit_prob"] > 0.005
+    at_cap = fs_round_pmf(max_win_mult=None, step=2.0, horizon=5000)
+    assert abs(at_cap["overflow_prob"] - capped["cap_hit_prob"]) < 1e-12
@@ -0,0 +1,22 @@
+from slot_math import GAME_MODEL
+from slot_exact import fs_round_exact
+from slot_fft import fs_round_pmf, exceedance
+from slot_importance import tail_estimates
+
+Z = 1.96
+N_SE = 4        # tillåten avvikelse i standardfel (ci = Z * standardfel)
+
+
+def test_is_estimates_match_exact_round_distribution():
+    res = tail_estimates(60_000, thresholds=(500, 1000, 2500), rng=21, z=Z)
+    exact = fs_round_exact()
+    pmf = fs_round_pmf()
+    exact_tails = exceedance(pmf["values"], pmf["probs"], (500, 1000, 2500))
+
+    assert abs(res["ev"] - exact["ev"]) < N_SE * res["ev_ci"] / Z
+    cap = res["tails"][GAME_MODEL.max_win_mult]
+    assert abs(res["cap_hit_prob"] - exact["cap_hit_prob"]) < N_SE * cap["ci"] / Z
+    for t, p in exact_tails.items():
+        row = res["tails"][t]
+        assert row["hits"] > 1000 and row["speedup"] > 1.0
+        assert abs(row["p"] - p) < N_SE * row["ci"] / Z, (t, row, p)
@@ -0,0 +1,117 @@
+import random
+from math import sqrt
+
+import pytest
+
+from slot_math import (
+    GAME_MODEL,
+    AliasSampler,
+    as_game_model,
+    evaluate_spin,
+    evaluate_megaways_win,
+    find_winning_positions,
+    spin_grid_exact,
+)
+from slot_exact import scatter_count_probs
+from slot_bitboard import grid_to_bitboard, evaluate_bitboard, find_winning_positions_bitboard
+from slot_bitboard import scatter_count as board_scatter_count
+
+
+def assert_frequencies(draws, values, probs, z=5.0):
+    n = len(draws)
+    for value, p in zip(values, probs):
+        freq = sum(1 for d in draws if d == value) / n
+        assert abs(freq - p) <= z * sqrt(p * (1.0 - p) / n), (value, freq, p)
+
+
+@pytest.mark.parametrize("sampler, values, weights", [
+    (GAME_MODEL.symbol_sampler, GAME_MODEL.symbols, GAME_MODEL.probs),
+    (GAME_MODEL.wild_count_sampler, GAME_MODEL.wild_reel_counts, GAME_MODEL.wild_reel_count_weights),
+    (GAME_MODEL.mult_sampler, GAME_MODEL.fs_multipliers, GAME_MODEL.fs_mult_weights),
+])
+def test_alias_sampler_frequencies(sampler, values, weights):
+    total = sum(weights)
+    probs = [w / total for w in weights]
+    draws = sampler.sample_many(300_000, random.Random(1))
+    assert_frequencies(draws, values, probs)
+    rng = random.Random(2)
+    assert_frequencies([sampler.sample(rng) for _ in range(100_000)], values, probs)
+
+
+def test_alias_sampler_zero_weight_never_drawn():
+    sampler = AliasSampler(["x", "y", "z"], [1.0, 0.0, 3.0])
+    assert "y" not in sampler.sample_many(50_000, random.Random(3))
+
+
+def test_spin_grid_exact_scatter_counts():
+    rng = random.Random(4)
+    n = 50_000
+    counts = [sum(row.count(GAME_MODEL.scatter) for row in spin_grid_exact(GAME_MODEL, rng)) for _ in range(n)]
+    assert max(counts) <= GAME_MODEL.max_scatters
+    assert_frequencies(counts, range(GAME_MODEL.max_scatters + 1), scatter_count_probs(GAME_MODEL))
+
+
+def _check(grid, wild_reels, total, ways, runs, positions, scatter_count):
+    res = evaluate_spin(grid, GAME_MODEL, wild_reels)
+    assert res.total == total
+    assert res.ways == ways
+    assert res.run_lengths == runs
+    assert res.positions == positions
+    assert res.scatter_count == scatter_count
+    assert evaluate_megaways_win(grid, GAME_MODEL, wild_reels) == total
+    assert find_winning_positions(grid, GAME_MODEL, wild_reels) == positions
+    board = grid_to_bitboard(grid, wild_reels)
+    assert evaluate_bitboard(board, GAME_MODEL) == total
+    assert find_winning_positions_bitboard(board, GAME_MODEL) == positions
+    assert board_scatter_count(board) == scatter_count
+
+
+def test_evaluate_spin_base_grid():
+    grid = [
+        ["A", "A", "A", "B", "C"],
+        ["A", "B", "D", "E", "F"],
+        ["G", "H", "I", "D", "E"],
+        ["F", "G", "H", "I", "D"],
+    ]
+    # A: 2 * 1 * 1 ways på 3 hjul, A3 = 5
+    _check(grid, None, 10.0, {"A": 2}, {"A": 3}, {(0, 0), (1, 0), (0, 1), (0, 2)}, 0)
+
+
+def test_evaluate_spin_wild_reel():
+    grid = [
+        ["C", "D", "C", "C", "C"],
+        ["C", "E", "D", "C", "E"],
+        ["F", "F", "G", "H", "C"],
+        ["H", "G", "F", "E", "C"],
+    ]
+    # hjul 1 wild (4 träffar): C 2*4*1*2*3 = 48 ways * C5 = 5, F 1*4*1 = 4 ways * F3 = 0.25
+    wild_col = {(r, 1) for r in range(4)}
+    c_pos = {(0, 0), (1, 0), (0, 2), (0, 3), (1, 3), (0, 4), (2, 4), (3, 4)}
+    f_pos = {(2, 0), (3, 2)}
+    _check(grid, [1], 241.0, {"C": 48, "F": 4}, {"C": 5, "F": 3}, c_pos | f_pos | wild_col, 0)
+
+
+def test_evaluate_spin_unpaid_run_and_scatters():
+    grid = [
+        ["H", "H", "H", "A", "S"],
+        ["B", "C", "D", "E", "F"],
+        ["S", "G", "I", "B", "C"],
+        ["E", "F", "S", "C", "D"],
+    ]
+    # H har bara 3 hjul (H3 betalar inget); scattern under wild reel 2 räknas inte
+    res = evaluate_spin(grid, GAME_MODEL, [2])
+    assert res.total == 0.0
+    assert res.ways == {} and res.positions == set()
+    assert res.scatter_positions == {(0, 4), (2, 0)}
+    assert res.scatter_count == 2
+
+
+def test_as_game_model_compares_paytable_content():
+    assert as_game_model(dict(GAME_MODEL.paytable)) is GAME_MODEL
+    pays = dict(GAME_MODEL.paytable)
+    pays[("A", 5)] = 100
+    model = as_game_model(pays)
+    assert model is not GAME_MODEL and model.pays["A"][5] == 100
+    assert as_game_model(dict(pays)) is model             # kompileras en gång
+    pays[("A", 5)] = 200                                  # ändrad på plats
+    assert as_game_model(pays).pays["A"][5] == 200
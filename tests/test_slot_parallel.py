@@ -0,0 +1,62 @@
+import pytest
+
+from slot_parallel import parallel_simulate, simulate_until, load_checkpoint
+
+N_SPINS = 60_000
+CHUNK = 5_000
+
+
+def _key(totals):
+    return ({k: v for k, v in totals.items() if k != "stats"}, totals["stats"].to_dict())
+
+
+def test_same_seed_same_result_for_any_worker_count():
+    runs = [_key(parallel_simulate(n_spins=N_SPINS, seed=11, workers=w, chunk_spins=CHUNK))
+            for w in (1, 3)]
+    assert runs[0] == runs[1]
+
+
+def test_simulate_until_worker_invariant():
+    runs = [simulate_until(epsilon=0.5, seed=3, workers=w, chunk_spins=CHUNK, min_spins=CHUNK,
+                           max_spins=N_SPINS) for w in (1, 3)]
+    assert [r["spins"] for r in runs] == [runs[0]["spins"]] * 2
+    assert runs[0]["rtp"] == runs[1]["rtp"]
+    assert runs[0]["stats"].to_dict() == runs[1]["stats"].to_dict()
+
+
+def test_simulate_until_stops_at_cap_when_epsilon_unreachable():
+    res = simulate_until(epsilon=1e-6, seed=3, workers=1, chunk_spins=CHUNK, min_spins=CHUNK,
+                         max_spins=2 * CHUNK)
+    assert not res["converged"]
+    assert res["spins"] == 2 * CHUNK
+    assert res["spins_needed"] > res["spins"]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_checkpoint_resume_matches_uninterrupted(tmp_path):
+    path = str(tmp_path / "run.ck")
+    full = _key(parallel_simulate(n_spins=N_SPINS, seed=7, workers=1, chunk_spins=CHUNK))
+
+    def crash_after_five(totals):
+        if totals["spins"] >= 5 * CHUNK:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        parallel_simulate(n_spins=N_SPINS, seed=7, workers=1, chunk_spins=CHUNK, checkpoint=path,
+                          checkpoint_every=0.0, progress=crash_after_five)
+    # den femte chunken hann inte sparas
+    assert load_checkpoint(path)["next_chunk"] == 4
+    resumed = parallel_simulate(n_spins=N_SPINS, seed=7, workers=3, chunk_spins=CHUNK, checkpoint=path,
+                                resume=True)
+    assert _key(resumed) == full
+
+
+def test_resume_rejects_other_run(tmp_path):
+    path = str(tmp_path / "run.ck")
+    parallel_simulate(n_spins=2 * CHUNK, seed=1, workers=1, chunk_spins=CHUNK, checkpoint=path)
+    with pytest.raises(ValueError):
+        parallel_simulate(n_spins=2 * CHUNK, seed=2, workers=1, chunk_spins=CHUNK, checkpoint=path,
+                          resume=True)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from slot_math import GAME_MODEL, GameModel
+from slot_batch import simulate_rtp_batch
+from slot_reprice import record_outcomes
+
+N_SPINS = 60_000
+BATCH = 20_000
+SEED = 17
+
+
+def _uncapped(paytable):
+    # utan cap spelar simulate_fs_rounds rundorna till slut, som record_outcomes,
+    # så båda förbrukar exakt samma slumptal för samma seed
+    return GameModel(paytable=paytable, max_win_mult=None)
+
+
+def _fresh(paytable):
+    return simulate_rtp_batch(N_SPINS, rng=SEED, paytable=_uncapped(paytable), batch_size=BATCH)
+
+
+def test_unchanged_paytable_reproduces_recorded_rtp():
+    sample = record_outcomes(N_SPINS, SEED, _uncapped(GAME_MODEL.paytable), batch_size=BATCH)
+    res = sample.reprice([GAME_MODEL.paytable])
+    rtp, hit_freq, trig_freq = _fresh(GAME_MODEL.paytable)
+    assert len(sample.trigger_spins) / N_SPINS == trig_freq > 0
+    assert np.isclose(res["rtp"][0], rtp, rtol=1e-12)
+    assert res["hit_freq"][0] == hit_freq
+
+
+def test_single_symbol_change_matches_fresh_simulation():
+    sample = record_outcomes(N_SPINS, SEED, _uncapped(GAME_MODEL.paytable), batch_size=BATCH)
+    changed = {(sym, n): 3 * v if sym == "C" else v for (sym, n), v in GAME_MODEL.paytable.items()}
+    res = sample.reprice([GAME_MODEL.paytable, changed])
+    rtp, hit_freq, _ = _fresh(changed)
+    assert res["rtp"][1] > res["rtp"][0]
+    assert np.isclose(res["rtp"][1], rtp, rtol=1e-12)
+    assert res["hit_freq"][1] == hit_freq
+
+
+def test_cap_default_and_none():
+    sample = record_outcomes(N_SPINS, SEED, batch_size=BATCH)
+    capped = sample.reprice([GAME_MODEL.paytable])
+    assert sample.max_win_mult == GAME_MODEL.max_win_mult
+    assert np.array_equal(capped["rtp"], sample.reprice([GAME_MODEL.paytable], GAME_MODEL.max_win_mult)["rtp"])
+    uncapped = sample.reprice([GAME_MODEL.paytable], max_win_mult=None)
+    assert uncapped["cap_hit_prob"][0] == 0.0 and uncapped["rtp"][0] >= capped["rtp"][0]
@@ -0,0 +1,48 @@
+import slot_exact
+from slot_math import GAME_MODEL
+from slot_sensitivity import solve_target_rtp, total_rtp, _with_knob
+
+
+def _fresh_total_rtp(knob, value, include_fs=True):
+    # tomma cacher: RTP:n räknas om från grunden för en ny modell
+    slot_exact._memory_cache.clear()
+    slot_exact._group_caches.clear()
+    return total_rtp(_with_knob(GAME_MODEL, knob, value), include_fs, use_disk=False)
+
+
+def test_solve_target_rtp_symbol_weight():
+    tol = 1e-6
+    result = solve_target_rtp(0.96, knob="A", tol=tol)
+    assert result["converged"]
+    assert abs(_fresh_total_rtp("A", result["value"]) - 0.96) <= tol
+    # RTP:n faller med vikten för A (högst betalande, men fler A tränger undan
+    # F/G som står för flest ways); historiken ska vara monoton
+    values = [x for x, _ in result["history"][1:]]
+    rtps = [f for _, f in result["history"][1:]]
+    assert values == sorted(values)
+    assert rtps == sorted(rtps, reverse=True)
+
+
+def test_solve_target_rtp_base_only():
+    tol = 1e-9
+    result = solve_target_rtp(0.72, knob=("A", 5), include_fs=False, tol=tol)
+    assert result["converged"]
+    assert abs(_fresh_total_rtp(("A", 5), result["value"], include_fs=False) - 0.72) <= tol
+
+
+def test_symbol_sensitivity_per_probability_mass():
+    from slot_sensitivity import sensitivity_report, with_changes, _base_metrics
+
+    row = sensitivity_report()["symbols"]["A"]
+    probs = dict(GAME_MODEL.symbol_probs)
+    rest = 1.0 - probs["S"] - probs["A"]
+
+    def rtp_with_mass(delta):
+        # delta flyttas till A, övriga symboler (utom S) tappar proportionellt
+        moved = {s: p if s == "S" else p + delta if s == "A" else p * (rest - delta) / rest
+                 for s, p in probs.items()}
+        return _base_metrics(with_changes(GAME_MODEL, symbol_probs=moved))["rtp"]
+
+    h = 1e-6
+    assert abs(row["d_rtp_per_prob"] - (rtp_with_mass(h) - rtp_with_mass(-h)) / (2 * h)) < 1e-5
+    assert row["d_rtp"] < 0 and row["d_rtp_per_prob"] < 0
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pytest
+
+from slot_stats import LogHistogram, RunningStats
+
+
+def _data(n=30_000, seed=11):
+    # som spinvinster: mest nollor, tung svans
+    rng = np.random.default_rng(seed)
+    x = rng.lognormal(0.0, 1.5, n)
+    x[rng.random(n) < 0.55] = 0.0
+    return x
+
+
+def _accumulate(values):
+    stats = RunningStats()
+    for x in values:
+        stats.add(float(x))
+    return stats
+
+
+def test_merged_shards_match_numpy():
+    x = _data()
+    shards = np.split(x, [1, 5_000, 5_000, 17_000])         # inkl. en tom shard
+    merged = RunningStats()
+    for shard in shards:
+        merged.merge(_accumulate(shard))
+    single = _accumulate(x)
+
+    centred = x - x.mean()
+    var = np.mean(centred ** 2)
+    assert merged.n == x.size
+    assert merged.mean == pytest.approx(x.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(var, rel=1e-10)
+    assert merged.skewness == pytest.approx(np.mean(centred ** 3) / var ** 1.5, rel=1e-9)
+    assert merged.kurtosis == pytest.approx(np.mean(centred ** 4) / var ** 2 - 3.0, rel=1e-9)
+    assert (merged.min, merged.max) == (x.min(), x.max())
+    assert merged.hist.counts == single.hist.counts
+    assert merged.tail_counts == [int((x >= t).sum()) for t in merged.tails]
+
+
+def test_dict_round_trip_is_lossless():
+    stats = _accumulate(_data(5_000, 3))
+    d = stats.to_dict()
+    back = RunningStats.from_dict(json.loads(json.dumps(d)))
+    assert back.to_dict() == d
+    assert back.summary() == stats.summary()
+    empty = RunningStats()
+    assert RunningStats.from_dict(json.loads(json.dumps(empty.to_dict()))).to_dict() == empty.to_dict()
+    # en återläst ackumulator går att fortsätta på
+    back.add(2.0)
+    stats.add(2.0)
+    assert back.to_dict() == stats.to_dict()
+
+
+def test_merge_rejects_different_layouts():
+    with pytest.raises(ValueError):
+        RunningStats(tails=(100,)).merge(RunningStats())
+    with pytest.raises(ValueError):
+        LogHistogram(per_decade=10).merge(LogHistogram())
+    d = LogHistogram().to_dict()
+    d["counts"] = d["counts"][:-1]
+    with pytest.raises(ValueError):
+        LogHistogram.from_dict(d)
+
+
+def test_log_histogram_buckets_and_percentiles():
+    hist = LogHistogram(lo=0.01, hi=100_000.0, per_decade=20)
+    assert len(hist.counts) == 1 + 7 * 20
+    assert hist.index(0.0) == 0
+    assert hist.index(1e-6) == 1 and hist.index(1e9) == len(hist.counts) - 1
+    for x in (0.013, 1.0, 7.5, 4321.0):
+        lo, hi = hist.edges(hist.index(x))
+        assert lo <= x * (1 + 1e-12) and x < hi * (1 + 1e-12)
+
+    x = _data(20_000, 5)
+    for v in x:
+        hist.add(float(v))
+    assert hist.percentile(0.3) == 0.0
+    width = 10 ** (1 / hist.per_decade)                       # en hinks relativa bredd
+    for q in (0.6, 0.9, 0.99):
+        exact = np.quantile(x, q)
+        assert exact / width <= hist.percentile(q) <= exact * width
@@ -0,0 +1,26 @@
+import numpy as np
+
+from slot_math import GAME_MODEL
+from slot_exact import fs_round_exact
+from slot_stratified import spin_classes, stratum_probs, stratified_fs_ev
+
+N_SE = 4        # tillåten avvikelse i standardfel
+
+
+def test_stratum_probs_are_accurate_in_the_tail():
+    probs = spin_classes()[2]
+    n0 = GAME_MODEL.fs_spins
+    weights = stratum_probs(probs, n0)
+    assert abs(weights.sum() - 1.0) < 1e-12 and (weights > 0).all()
+    # sista klassen (alla wilds x8): P = 1 - (1 - p)^n0 ~ n0 * p, långt under avrundningsbruset i 1 - ...
+    assert np.isclose(weights[-1], -np.expm1(n0 * np.log1p(-probs[-1])), rtol=1e-12)
+
+
+def test_stratified_ev_matches_exact():
+    res = stratified_fs_ev(60_000, rng=22)
+    exact = fs_round_exact()["ev"]
+    assert abs(res["ev"] - exact) < N_SE * np.sqrt(res["variance"]) + res["bias_bound"]
+    assert res["bias_bound"] < 1e-5
+    # inget stratum under pilotgolvet, och budgeten hålls
+    sizes = np.array([s[3] for s in res["strata"]])
+    assert sizes.min() >= 20 and sizes.max() > 1_000 and res["rounds"] <= 60_000